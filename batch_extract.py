@@ -0,0 +1,288 @@
+"""批量提取多个菜品PDF：每个PDF单独配置页码范围与类别，跨文件并行，输出各自的结果和一份汇总目录
+
+用法示例：
+    python batch_extract.py menus/                          # 目录下所有PDF（可用同名.toml/.json单独配置）
+    python batch_extract.py batch.toml --workers 8          # 按清单提取，总共最多使用8个进程
+    python batch_extract.py batch.json --output-dir out --jsonl
+    python batch_extract.py menus/ --sqlite menus.sqlite      # 所有PDF写入同一个SQLite数据库（每个PDF一个版本）
+    python batch_extract.py batch.toml --dedup dedup.json     # 跨版本近似重复检测与变更报告（版本顺序同清单顺序）
+
+清单格式（TOML，JSON结构相同：{"defaults": {...}, "pdf": [...]}，也可直接是PDF配置列表）：
+    [defaults]                  # 可选：所有PDF共用的配置
+    start_page = 14
+    page_to_category = [[14, 138, "正餐菜品", "main"], [139, 150, "炸品", "fried"]]
+
+    [[pdf]]
+    path = "老乡鸡.pdf"         # 相对路径相对于清单所在目录
+    end_page = 210
+    default_category = ["其他", "other"]
+    output = "老乡鸡.json"      # 可选，默认为 输出目录/PDF文件名.json
+
+未配置的项使用extract_table.py中的模块配置（START_PAGE、END_PAGE、PAGE_TO_CATEGORY等）。
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+import tomllib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import extract_dedup
+import extract_outputs
+import extract_table
+
+OUTPUT_DIR = "batch_output"  # 默认输出目录
+CATALOGUE_NAME = "catalogue.json"  # 汇总目录文件名（位于输出目录下）
+CONFIG_KEYS = ("start_page", "end_page", "page_to_category", "default_category", "output")
+
+# ---------------------- 配置读取 ----------------------
+def load_config_file(path):
+    """读取TOML或JSON配置文件"""
+    if path.lower().endswith(".toml"):
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def _check_keys(config, source):
+    unknown = set(config) - set(CONFIG_KEYS) - {"path"}
+    if unknown:
+        raise ValueError(f"{source}：未知配置项{sorted(unknown)}，可用配置项为{list(CONFIG_KEYS)}")
+
+def normalize_job(config, base_dir, source):
+    """单个PDF的配置 → 提取任务（补全默认值，类别配置转为元组，相对路径以base_dir为基准）"""
+    _check_keys(config, source)
+    if "path" not in config:
+        raise ValueError(f"{source}：缺少PDF路径（path）")
+    job = {
+        "path": os.path.join(base_dir, config["path"]),
+        "start_page": config.get("start_page", extract_table.START_PAGE),
+        "end_page": config.get("end_page", extract_table.END_PAGE),
+        "page_to_category": [tuple(item) for item in config.get("page_to_category", extract_table.PAGE_TO_CATEGORY)],
+        "default_category": tuple(config["default_category"]) if config.get("default_category") else None,
+        "output": os.path.join(base_dir, config["output"]) if config.get("output") else None,
+    }
+    if not os.path.isfile(job["path"]):
+        raise FileNotFoundError(f"{source}：找不到PDF文件{job['path']}")
+    for item in job["page_to_category"]:
+        if len(item) != 4:
+            raise ValueError(f"{source}：page_to_category每项应为[起始页, 结束页, 类别, 英文类别]，实际为{list(item)}")
+    if job["default_category"] is not None and len(job["default_category"]) != 2:
+        raise ValueError(f"{source}：default_category应为[类别, 英文类别]")
+    return job
+
+def load_manifest(manifest_path):
+    """读取清单文件，返回提取任务列表"""
+    data = load_config_file(manifest_path)
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    if isinstance(data, list):
+        defaults, entries = {}, data
+    else:
+        defaults, entries = data.get("defaults", {}), data.get("pdf", [])
+    _check_keys(defaults, f"{manifest_path} [defaults]")
+    if not entries:
+        raise ValueError(f"{manifest_path}：清单中没有PDF")
+    return [normalize_job({**defaults, **entry}, base_dir, f"{manifest_path} 第{i+1}个PDF")
+            for i, entry in enumerate(entries)]
+
+def scan_directory(directory):
+    """扫描目录下的PDF；同名的.toml/.json文件（如 老乡鸡.toml）作为该PDF的单独配置"""
+    jobs = []
+    for name in sorted(os.listdir(directory)):
+        if not name.lower().endswith(".pdf"):
+            continue
+        stem = os.path.splitext(name)[0]
+        config = {}
+        for ext in (".toml", ".json"):
+            sidecar = os.path.join(directory, stem + ext)
+            if os.path.exists(sidecar):
+                config = load_config_file(sidecar)
+                break
+        jobs.append(normalize_job({**config, "path": name}, directory, os.path.join(directory, name)))
+    if not jobs:
+        raise ValueError(f"{directory}：目录下没有PDF文件")
+    return jobs
+
+def load_jobs(source):
+    return scan_directory(source) if os.path.isdir(source) else load_manifest(source)
+
+def assign_outputs(jobs, output_dir, jsonl=False):
+    """为未指定输出路径的任务分配 输出目录/文件名.json(l)，文件名重复时追加序号"""
+    ext = ".jsonl" if jsonl else ".json"
+    used = {os.path.abspath(job["output"]) for job in jobs if job["output"]}
+    for job in jobs:
+        if job["output"]:
+            continue
+        stem = os.path.splitext(os.path.basename(job["path"]))[0]
+        candidate, n = os.path.join(output_dir, stem + ext), 1
+        while os.path.abspath(candidate) in used:
+            n += 1
+            candidate = os.path.join(output_dir, f"{stem}_{n}{ext}")
+        used.add(os.path.abspath(candidate))
+        job["output"] = candidate
+
+# ---------------------- 进程分配 ----------------------
+def plan_workers(jobs, budget):
+    """在总进程预算内分配并行：文件数不少于预算时每个文件串行、跨文件并行；
+    文件数较少时多出的进程分给各文件做页级并行（余数优先分给大文件）
+    返回(同时处理的文件数, 每个任务的页级进程数列表)"""
+    budget = max(1, budget)
+    slots = min(len(jobs), budget)
+    per_file, extra = divmod(budget, slots)
+    order = sorted(range(len(jobs)), key=lambda i: -os.path.getsize(jobs[i]["path"]))
+    workers = [per_file] * len(jobs)
+    if len(jobs) <= budget:
+        for i in order[:extra]:
+            workers[i] += 1
+    return slots, workers
+
+# ---------------------- 单个文件提取 ----------------------
+def _counting(dishes, categories):
+    """边产出菜品边统计类别数量"""
+    for dish in dishes:
+        categories[dish["类别"]] += 1
+        yield dish
+
+def run_job(job, options, jsonl=False, verbose=False):
+    """提取单个PDF并写出结果，返回该文件的汇总信息（出错时记录错误而不中断整批）"""
+    started = time.perf_counter()
+    summary = {"pdf": job["path"], "output": job["output"], "start_page": job["start_page"],
+               "end_page": job["end_page"], "dishes": 0, "categories": {}, "seconds": 0.0, "error": None}
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(job["output"])), exist_ok=True)
+        log = contextlib.nullcontext(sys.stdout) if verbose else open(os.devnull, "w")
+        with log as out, contextlib.redirect_stdout(out):
+            dishes = extract_table.iter_dishes(job["path"], job["start_page"], job["end_page"],
+                                               job["page_to_category"], job["default_category"], **options)
+            categories = Counter()
+            if jsonl:
+                summary["dishes"], _ = extract_table.write_dishes_jsonl(_counting(dishes, categories), job["output"])
+            else:
+                dishes = list(_counting(dishes, categories))
+                with open(job["output"], "w", encoding="utf-8") as f:
+                    json.dump(dishes, f, ensure_ascii=False, indent=2)
+                summary["dishes"] = len(dishes)
+        summary["categories"] = dict(categories)
+    except Exception as exc:
+        summary["error"] = f"{type(exc).__name__}: {exc}"
+    summary["seconds"] = round(time.perf_counter() - started, 2)
+    return summary
+
+def iter_job_results(jobs, budget, options, jsonl=False, verbose=False):
+    """按进程预算并行提取所有文件，按完成顺序产出(任务序号, 汇总信息)"""
+    slots, workers = plan_workers(jobs, budget)
+    if slots == 1:
+        for i, job in enumerate(jobs):
+            yield i, run_job(job, {**options, "workers": workers[i]}, jsonl, verbose)
+        return
+    # 大文件先提交，避免最后剩一个大文件单独拖尾
+    order = sorted(range(len(jobs)), key=lambda i: -os.path.getsize(jobs[i]["path"]))
+    with ProcessPoolExecutor(max_workers=slots) as executor:
+        futures = {executor.submit(run_job, jobs[i], {**options, "workers": workers[i]}, jsonl, verbose): i
+                   for i in order}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+# ---------------------- 汇总目录 ----------------------
+def _read_dishes(path, jsonl):
+    with open(path, encoding="utf-8") as f:
+        if jsonl:
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+def write_catalogue(summaries, catalogue_path, jsonl=False):
+    """汇总所有文件：各文件统计、类别总数，以及全部菜品（每道菜附"来源"字段）"""
+    categories = Counter()
+    dishes = []
+    for summary in summaries:
+        if summary["error"]:
+            continue
+        categories.update(summary["categories"])
+        source = os.path.splitext(os.path.basename(summary["pdf"]))[0]
+        dishes.extend({"来源": source, **dish} for dish in _read_dishes(summary["output"], jsonl))
+    catalogue = {
+        "files": summaries,
+        "total_dishes": len(dishes),
+        "categories": dict(categories.most_common()),
+        "dishes": dishes,
+    }
+    with open(catalogue_path, "w", encoding="utf-8") as f:
+        json.dump(catalogue, f, ensure_ascii=False, indent=2)
+    return catalogue
+
+def write_sqlite_editions(summaries, db_path, jsonl=False):
+    """把每个成功文件的结果写入同一个SQLite数据库，版本名为PDF文件名，返回写入的菜品总数"""
+    total = 0
+    for summary in summaries:
+        if summary["error"]:
+            continue
+        edition = os.path.splitext(os.path.basename(summary["pdf"]))[0]
+        total += extract_outputs.write_sqlite(_read_dishes(summary["output"], jsonl), db_path, edition)
+    return total
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量提取多个菜品PDF（目录或TOML/JSON清单）")
+    parser.add_argument("source", help="PDF所在目录，或TOML/JSON清单文件")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="总进程预算（跨文件并行+页级并行共用，默认CPU核数%(default)s）")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="输出目录（默认%(default)s）")
+    parser.add_argument("--catalogue", help=f"汇总目录路径（默认 输出目录/{CATALOGUE_NAME}）")
+    parser.add_argument("--jsonl", action="store_true", help="每个文件以JSON Lines格式输出")
+    parser.add_argument("--cache", default=extract_table.CACHE_PATH, help="页面缓存数据库路径（所有文件共用）")
+    parser.add_argument("--watermark-filter", action="store_true", default=extract_table.WATERMARK_FILTER,
+                        help="表格提取前按字符属性去掉水印字（见extract_table.py --watermark-filter）")
+    parser.add_argument("--structured-steps", action="store_true", default=extract_table.STRUCTURED_STEPS,
+                        help="输出结构化的份数和步骤（见extract_table.py --structured-steps）")
+    parser.add_argument("--low-memory", action="store_true", default=extract_table.LOW_MEMORY,
+                        help="逐页释放解析缓存")
+    parser.add_argument("--prescan", action="store_true", default=extract_table.PRESCAN,
+                        help="完整提取前预扫描，跳过不可能含菜品表格的页（见extract_table.py --prescan）")
+    parser.add_argument("--page-timeout", type=float, default=extract_table.PAGE_TIME_BUDGET, metavar="SECONDS",
+                        help="单页表格提取的时间预算（见extract_table.py --page-timeout）")
+    parser.add_argument("--page-memory", type=float, default=extract_table.PAGE_MEMORY_BUDGET_MB, metavar="MB",
+                        help="单页表格提取的内存预算（见extract_table.py --page-memory）")
+    parser.add_argument("--sqlite", metavar="DB", help="同时把所有文件的结果写入该SQLite数据库（每个PDF一个版本）")
+    parser.add_argument("--dedup", metavar="REPORT_JSON",
+                        help="同时生成跨版本去重与变更报告（规范菜品id、相对上一文件的变更，见extract_dedup.py）；"
+                             "报告已存在时沿用其中的规范id")
+    parser.add_argument("--verbose", action="store_true", help="输出每个文件的逐道菜提取日志")
+    args = parser.parse_args(argv)
+
+    jobs = load_jobs(args.source)
+    assign_outputs(jobs, args.output_dir, args.jsonl)
+    options = {"cache_path": args.cache, "low_memory": args.low_memory,
+               "watermark_filter": args.watermark_filter, "structured_steps": args.structured_steps,
+               "page_time_budget": args.page_timeout, "page_memory_mb": args.page_memory, "prescan": args.prescan}
+    slots, _ = plan_workers(jobs, args.workers)
+    print(f"共{len(jobs)}个PDF，进程预算{args.workers}，同时处理{slots}个文件")
+
+    started = time.perf_counter()
+    summaries = [None] * len(jobs)
+    for done, (i, summary) in enumerate(iter_job_results(jobs, args.workers, options, args.jsonl, args.verbose), 1):
+        summaries[i] = summary
+        status = f"失败：{summary['error']}" if summary["error"] else f"{summary['dishes']}道菜品"
+        print(f"[{done}/{len(jobs)}] {summary['pdf']} → {status}（{summary['seconds']}秒）")
+    elapsed = time.perf_counter() - started
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    catalogue_path = args.catalogue or os.path.join(args.output_dir, CATALOGUE_NAME)
+    catalogue = write_catalogue(summaries, catalogue_path, args.jsonl)
+    failed = [s for s in summaries if s["error"]]
+    print(f"\n批量提取完成！{len(jobs) - len(failed)}/{len(jobs)}个文件成功，共{catalogue['total_dishes']}道菜品，"
+          f"耗时{elapsed:.1f}秒")
+    print(f"汇总目录：{catalogue_path}")
+    if args.sqlite:
+        print(f"SQLite数据库：{args.sqlite}（{write_sqlite_editions(summaries, args.sqlite, args.jsonl)}道菜品）")
+    if args.dedup:
+        editions = [(os.path.splitext(os.path.basename(s["pdf"]))[0], _read_dishes(s["output"], args.jsonl))
+                    for s in summaries if not s["error"]]
+        previous = extract_dedup.read_previous_report(args.dedup)
+        report = extract_dedup.write_dedup_report(editions, args.dedup, previous=previous)
+        extract_dedup.print_dedup_summary(report, args.dedup)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
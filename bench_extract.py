@@ -0,0 +1,477 @@
+"""extract_table.py 的基准测试与黄金回归检查（纯离线，普通Linux即可运行）
+
+用法示例：
+    python bench_extract.py synth --pages 200 --output synthetic.pdf   # 生成带水印的合成表格PDF
+    python bench_extract.py micro                                        # 各清洗函数的微基准
+    python bench_extract.py e2e --pages 10 100 --workers 1 4              # 端到端页/秒与峰值内存
+    python bench_extract.py golden                                       # 合成PDF逐字节对比黄金输出 + 老乡鸡.pdf与已提交JSON对比
+    python bench_extract.py golden --update-synthetic                    # 有意改变输出后重新生成合成PDF的黄金输出
+    python bench_extract.py coldstart --workers 4                        # 冷启动：导入+分词器加载（CLI与每个工作进程）
+    python bench_extract.py all                                          # 依次运行以上全部（快速参数）
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+import extract_table
+
+GOLDEN_JSON = "dish_info_category_page_img.json"  # 已提交的菜品JSON（完整菜谱的提取结果，仓库中只有4页节选PDF）
+GOLDEN_PDF = extract_table.PDF_PATH
+# 已提交JSON与节选PDF提取结果在改动前就存在的差异：(品名, 字段) → 说明（按品名比较时不计为回归）
+KNOWN_GOLDEN_DIFFERENCES = {
+    ("毛豆烧土鸡", "配料"): "节选PDF中“豆米”粘连水印字“告”，提取为“豆告米”（最初版本的提取结果即如此）",
+}
+SYNTHETIC_GOLDEN = os.path.join("tests", "golden", "synthetic_40.json")  # 合成PDF（40页，种子0）的黄金输出，逐字节比较
+SYNTHETIC_GOLDEN_PAGES = 40
+
+# ---------------------- 合成PDF生成 ----------------------
+PAGE_WIDTH, PAGE_HEIGHT = 595.3, 841.9
+TABLE_TOP = 72
+COLUMN_X = [76.25, 136, 206, 326, 426, 519.05]  # 5列表格的列边界
+FONT_SIZE = 9
+LINE_HEIGHT = 12
+CELL_PADDING = 4
+WATERMARK_SEQUENCE = "告报源溯品菜鸡乡老"  # 真实PDF中水印字出现的顺序
+SECTIONS = [(category, end - start + 1) for start, end, category, _ in extract_table.PAGE_TO_CATEGORY]
+
+def _pdf_text(text):
+    """UniGB-UCS2-H编码：直接写UTF-16BE十六进制串（使用PDF内置STSong-Light字体，无需字体文件）"""
+    return "<" + text.encode("utf-16-be").hex().upper() + ">"
+
+def _wrap(text, width):
+    """按单元格宽度折行（字体为等宽，每字占FONT_SIZE宽度）"""
+    per_line = max(1, int((width - 2 * CELL_PADDING) // FONT_SIZE))
+    lines = []
+    for part in text.split("\n"):
+        lines.extend(part[i:i + per_line] for i in range(0, max(len(part), 1), per_line))
+    return lines
+
+def _render_table(rows):
+    """把表格行渲染为PDF内容流；rows中每个单元格为(文本或None, 跨列数)，None表示与上方单元格合并"""
+    ops = ["0.5 w"]
+    y = PAGE_HEIGHT - TABLE_TOP
+    for row in rows:
+        col = 0
+        cells = []
+        height = 0
+        for text, span in row:
+            x0, x1 = COLUMN_X[col], COLUMN_X[col + span]
+            lines = _wrap(text, x1 - x0) if text else []
+            height = max(height, len(lines) * LINE_HEIGHT + 2 * CELL_PADDING)
+            cells.append((text, x0, x1, lines))
+            col += span
+        height = max(height, LINE_HEIGHT + 2 * CELL_PADDING)
+        for text, x0, x1, lines in cells:
+            if text is not None:
+                ops.append(f"{x0:.2f} {y:.2f} m {x1:.2f} {y:.2f} l S")
+            ops.append(f"{x0:.2f} {y:.2f} m {x0:.2f} {y - height:.2f} l S")
+            for idx, line in enumerate(lines):
+                ty = y - CELL_PADDING - FONT_SIZE - idx * LINE_HEIGHT
+                ops.append(f"BT /F1 {FONT_SIZE} Tf {x0 + CELL_PADDING:.2f} {ty:.2f} Td {_pdf_text(line)} Tj ET")
+        ops.append(f"{COLUMN_X[-1]:.2f} {y:.2f} m {COLUMN_X[-1]:.2f} {y - height:.2f} l S")
+        y -= height
+    ops.append(f"{COLUMN_X[0]:.2f} {y:.2f} m {COLUMN_X[-1]:.2f} {y:.2f} l S")
+    # 菜品图片占位（右上角）
+    ops.append(f"q 128 0 0 96 383 {PAGE_HEIGHT - TABLE_TOP - 100:.2f} cm /Im1 Do Q")
+    return "\n".join(ops)
+
+def _watermark(text, rng, probability):
+    """按概率在文本中插入一个水印字（模拟水印碎字混入单元格）"""
+    if not text or rng.random() >= probability:
+        return text
+    pos = rng.randint(0, len(text))
+    return text[:pos] + rng.choice(WATERMARK_SEQUENCE) + text[pos:]
+
+def _dish_tables(dish, rng):
+    """由一道菜生成1~2页的表格行（约1/4的菜品制作工艺跨页）"""
+    info = dish["基本信息"]
+    process = dish["餐厅操作工艺"]
+    steps_text = process.get("制作工艺", "")
+    portion = "10"
+    if steps_text.startswith("（"):
+        portion = steps_text[1:steps_text.find("）")]
+        steps_text = steps_text[steps_text.find("份") + 1:].strip()
+    steps = [s + "；" for s in steps_text.split("；") if s] or ["1.按标准操作"]
+    steps[-1] = steps[-1].rstrip("；")
+
+    split_at = len(steps) // 2 if len(steps) >= 2 and rng.random() < 0.25 else len(steps)
+    rows = [
+        [("基本信息", 1), (info.get("品名", "菜品"), 1), ("味型", 1), (info.get("味型", ""), 2)],
+        [(None, 1), (None, 1), ("最佳风味期", 1), (info.get("最佳风味期", ""), 2)],
+        [(None, 1), ("加工等级", 1), (info.get("加工等级", ""), 3)],
+        [(None, 1), ("配 料", 1), (_watermark("、".join(info.get("配料", [])), rng, 0.2), 3)],
+        [("原料来源", 1), (info.get("配料", ["原料"])[0], 1), ("告\n老乡鸡中央厨房", 3)],
+        [("原料配送", 1), ("配送方式", 1), ("报\n冷链运输", 3)],
+        [("餐厅\n操作工艺", 1), ("烹饪方式", 1), (rng.choice(["", "菜\n"]) + process.get("烹饪方式", ""), 3)],
+        [(None, 1), (f"鸡\n乡\n老\n制作工艺\n({portion}份)", 1), ("\n".join(steps[:split_at]), 3)],
+    ]
+    tables = [rows]
+    if split_at < len(steps):
+        tables.append([[("", 1), ("", 1), ("\n".join(steps[split_at:]), 3)]])
+    return tables
+
+def _image_stream(rng):
+    """生成一张64x48的纯色渐变RGB图片（Flate压缩）"""
+    width, height = 64, 48
+    base = [rng.randint(60, 200) for _ in range(3)]
+    raw = bytearray()
+    for y in range(height):
+        for x in range(width):
+            raw += bytes(min(255, c + (x + y) // 2) for c in base)
+    data = zlib.compress(bytes(raw))
+    header = (f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} /ColorSpace /DeviceRGB"
+              f" /BitsPerComponent 8 /Filter /FlateDecode /Length {len(data)} >>\nstream\n").encode("latin-1")
+    return header + data + b"\nendstream"
+
+def make_synthetic_pdf(output_path, pages, seed=0, source_json=GOLDEN_JSON):
+    """生成pages页的带水印合成菜品表格PDF，菜品内容取自已提交的JSON；返回各类别的页码范围"""
+    rng = random.Random(seed)
+    with open(source_json, encoding="utf-8") as f:
+        dishes = json.load(f)
+
+    # 按PAGE_TO_CATEGORY的比例分配各类别页数，每个类别以一页分隔页开头
+    total = sum(size for _, size in SECTIONS)
+    quotas = [max(2, round(pages * size / total)) for _, size in SECTIONS]
+    quotas[0] += pages - sum(quotas)
+    page_contents = []  # 元素：(内容流, 是否有图片)
+    sections = []
+    dish_idx = 0
+    for (category, _), quota in zip(SECTIONS, quotas):
+        if quota <= 0:
+            continue
+        start = len(page_contents) + 1
+        page_contents.append((f"BT /F1 36 Tf 200 420 Td {_pdf_text(category)} Tj ET", False))
+        while len(page_contents) - start + 1 < quota:
+            for table_rows in _dish_tables(dishes[dish_idx % len(dishes)], rng):
+                if len(page_contents) - start + 1 >= quota:
+                    break
+                page_contents.append((_render_table(table_rows), True))
+            dish_idx += 1
+        sections.append((start, len(page_contents), category))
+
+    objects = [None, None]  # 1: Catalog, 2: Pages（最后填充）
+    font_id = 3
+    objects.append("<< /Type /Font /Subtype /Type0 /BaseFont /STSong-Light /Encoding /UniGB-UCS2-H"
+                   " /DescendantFonts [4 0 R] >>")
+    objects.append("<< /Type /Font /Subtype /CIDFontType0 /BaseFont /STSong-Light"
+                   " /CIDSystemInfo << /Registry (Adobe) /Ordering (GB1) /Supplement 4 >>"
+                   " /FontDescriptor 5 0 R /DW 1000 >>")
+    objects.append("<< /Type /FontDescriptor /FontName /STSong-Light /Flags 6 /FontBBox [0 -200 1000 900]"
+                   " /ItalicAngle 0 /Ascent 880 /Descent -120 /CapHeight 880 /StemV 80 >>")
+    page_ids = []
+    for content, has_image in page_contents:
+        data = content.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+        content_id = len(objects)
+        xobject = ""
+        if has_image:
+            objects.append(_image_stream(rng))
+            xobject = f" /XObject << /Im1 {len(objects)} 0 R >>"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}]"
+                       f" /Resources << /Font << /F1 {font_id} 0 R >>{xobject} >> /Contents {content_id} 0 R >>")
+        page_ids.append(len(objects))
+    objects[0] = "<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for obj_id, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        body = obj if isinstance(obj, bytes) else obj.encode("latin-1")
+        out += b"%d 0 obj\n" % obj_id + body + b"\nendobj\n"
+    xref_pos = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_pos)
+    with open(output_path, "wb") as f:
+        f.write(out)
+    return {"pages": len(page_contents), "sections": sections}
+
+# ---------------------- 微基准 ----------------------
+def collect_raw_tables(pdf_path, max_pages=40):
+    """收集PDF前max_pages页的原始表格（微基准的输入数据）"""
+    import pdfplumber
+    tables = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page in pdf.pages[:max_pages]:
+            table = page.extract_table()
+            if table:
+                tables.append(table)
+    return tables
+
+def _time_per_call(func, args_list, repeat, clear_caches=True):
+    """返回每次调用的最短平均耗时（微秒）；每轮开始前清空分词缓存，避免只测到缓存命中"""
+    best = float("inf")
+    for _ in range(repeat):
+        if clear_caches:
+            extract_table.cached_lcut.cache_clear()
+        start = time.perf_counter()
+        for args in args_list:
+            func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best / max(len(args_list), 1) * 1e6
+
+def run_microbenchmarks(pdf_path, repeat=5):
+    """对各清洗/解析函数分别计时"""
+    raw_tables = collect_raw_tables(pdf_path)
+    cells = [cell for table in raw_tables for row in table for cell in row if cell]
+    extract_table.clean_cell_smart("预热", None)  # 触发jieba词典和有效词表的加载
+    with contextlib.redirect_stdout(io.StringIO()):
+        cleaned_tables = [extract_table.clean_table_rows(table) for table in raw_tables]
+    process_texts = [cell for table in cleaned_tables for row in table for cell in row if "；" in cell]
+
+    results = {
+        "clean_cell_smart": _time_per_call(extract_table.clean_cell_smart, [(c, None) for c in cells], repeat),
+        "clean_cell_smart[配料]": _time_per_call(extract_table.clean_cell_smart, [(c, "配料") for c in cells], repeat),
+        "clean_cell_smart[制作工艺]": _time_per_call(extract_table.clean_cell_smart, [(c, "制作工艺") for c in cells], repeat),
+        "split_stuck_content": _time_per_call(extract_table.split_stuck_content, [(c,) for c in cells], repeat),
+        "fix_brackets": _time_per_call(extract_table.fix_brackets, [(t,) for t in process_texts], repeat),
+        "clean_table_rows": _time_per_call(extract_table.clean_table_rows, [(t,) for t in raw_tables], repeat),
+        "parse_table": _time_per_call(extract_table.parse_table, [(t,) for t in cleaned_tables], repeat),
+    }
+    return {"pdf": pdf_path, "cells": len(cells), "tables": len(raw_tables), "us_per_call": results}
+
+# ---------------------- 端到端 ----------------------
+def _e2e_child(pdf_path, workers):
+    """在子进程中运行完整提取，输出耗时与峰值内存（含工作进程）"""
+    import pdfplumber
+    with pdfplumber.open(pdf_path) as pdf:
+        pages = len(pdf.pages)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        dishes = extract_table.extract_dish_info_final(pdf_path, 1, None, workers=workers)
+    seconds = time.perf_counter() - start
+    peak_kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    print(json.dumps({"pages": pages, "workers": workers, "dishes": len(dishes), "seconds": round(seconds, 3),
+                      "pages_per_sec": round(pages / seconds, 2), "peak_rss_mb": round(peak_kb / 1024, 1)}))
+
+def run_e2e(page_counts, worker_counts, seed=0):
+    """对不同页数的合成PDF和不同进程数分别跑端到端提取（每次都在新进程中，避免缓存和内存互相影响）"""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in page_counts:
+            pdf_path = os.path.join(tmp, f"synthetic_{pages}.pdf")
+            make_synthetic_pdf(pdf_path, pages, seed=seed)
+            for workers in worker_counts:
+                proc = subprocess.run([sys.executable, os.path.abspath(__file__), "_e2e-child", pdf_path, str(workers)],
+                                      capture_output=True, text=True, check=True,
+                                      cwd=os.path.dirname(os.path.abspath(__file__)))
+                results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+                print(f"{pages}页 workers={workers}：{results[-1]['pages_per_sec']}页/秒，"
+                      f"峰值内存{results[-1]['peak_rss_mb']}MB")
+    return results
+
+# ---------------------- 冷启动 ----------------------
+COLDSTART_CODE = """
+import json, sys, time
+start = time.perf_counter()
+import extract_table
+imported = time.perf_counter()
+extract_table.TOKENIZER_DICT_PATH = sys.argv[1] or None
+extract_table.clean_cell_smart("预热", None)
+ready = time.perf_counter()
+print(json.dumps({"import": imported - start, "tokenizer": ready - imported}))
+"""
+
+COLDSTART_WORKERS_CODE = """
+import json, sys, time
+from concurrent.futures import ProcessPoolExecutor
+import bench_extract
+workers = int(sys.argv[2])
+start = time.perf_counter()
+with ProcessPoolExecutor(max_workers=workers) as executor:
+    per_worker = list(executor.map(bench_extract._coldstart_worker, [sys.argv[1]] * workers))
+print(json.dumps({"wall": time.perf_counter() - start, "per_worker": per_worker}))
+"""
+
+def _coldstart_worker(dict_path):
+    """工作进程中首次清洗单元格的耗时（含jieba导入、词典加载和有效词表构建）"""
+    extract_table.TOKENIZER_DICT_PATH = dict_path or None
+    start = time.perf_counter()
+    extract_table.clean_cell_smart("预热", None)
+    return time.perf_counter() - start
+
+def _run_code(code, *argv):
+    proc = subprocess.run([sys.executable, "-c", code, *argv], capture_output=True, text=True, check=True,
+                          cwd=os.path.dirname(os.path.abspath(__file__)))
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def run_coldstart(workers=4, repeat=3):
+    """分别用jieba默认词典和预构建词典，在新进程中测量CLI冷启动（导入模块+首次分词）和工作进程冷启动，取最短"""
+    if extract_table.read_tokenizer_dict_header() is None:
+        extract_table.build_tokenizer_dict()
+    results = {}
+    for name, dict_path in (("jieba", ""), ("prebuilt", extract_table.TOKENIZER_DICT_PATH)):
+        cli = [_run_code(COLDSTART_CODE, dict_path) for _ in range(repeat)]
+        pool = [_run_code(COLDSTART_WORKERS_CODE, dict_path, str(workers)) for _ in range(repeat)]
+        results[name] = {
+            "import_s": round(min(r["import"] for r in cli), 3),
+            "tokenizer_s": round(min(r["tokenizer"] for r in cli), 3),
+            "workers": workers,
+            "worker_tokenizer_s": round(min(max(r["per_worker"]) for r in pool), 3),
+            "pool_wall_s": round(min(r["wall"] for r in pool), 3),
+        }
+        r = results[name]
+        print(f"{name:<10}导入{r['import_s']:.3f}s  首次分词{r['tokenizer_s']:.3f}s  "
+              f"{workers}个工作进程：每进程{r['worker_tokenizer_s']:.3f}s，进程池总计{r['pool_wall_s']:.3f}s")
+    return results
+
+# ---------------------- 黄金回归 ----------------------
+def run_golden(pdf_path=GOLDEN_PDF, golden_json=GOLDEN_JSON):
+    """对比pdf_path的提取结果与已提交的JSON
+    PDF为完整菜谱（菜品数相同）时逐字节比较；否则（如菜谱节选）按品名逐字段比较基本信息和餐厅操作工艺，
+    KNOWN_GOLDEN_DIFFERENCES中的差异单独列出（known），不计入mismatches"""
+    import pdfplumber
+    with open(golden_json, encoding="utf-8") as f:
+        golden = json.load(f)
+    with pdfplumber.open(pdf_path) as pdf:
+        total_pages = len(pdf.pages)
+    # 页数少于配置的起始页时视为菜谱节选，提取全部页面
+    start_page, end_page = (extract_table.START_PAGE, extract_table.END_PAGE) \
+        if total_pages >= extract_table.START_PAGE else (1, None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        dishes = extract_table.extract_dish_info_final(pdf_path, start_page, end_page)
+
+    mismatches, known = [], []
+    if len(dishes) == len(golden):
+        if json.dumps(dishes, ensure_ascii=False, indent=2) != json.dumps(golden, ensure_ascii=False, indent=2):
+            for idx, (got, want) in enumerate(zip(dishes, golden)):
+                if got != want:
+                    mismatches.append({"index": idx, "品名": want["基本信息"].get("品名"), "got": got, "want": want})
+        mode = "byte"
+    else:
+        golden_by_name = {d["基本信息"].get("品名"): d for d in golden}
+        for dish in dishes:
+            name = dish["基本信息"].get("品名")
+            want = golden_by_name.get(name)
+            if want is None:
+                mismatches.append({"品名": name, "error": "黄金JSON中不存在该菜品"})
+                continue
+            for section in ("基本信息", "餐厅操作工艺"):
+                for field in dict.fromkeys([*dish[section], *want[section]]):
+                    got, expected = dish[section].get(field), want[section].get(field)
+                    if got != expected:
+                        entry = {"品名": name, "section": section, "field": field, "got": got, "want": expected}
+                        (known if (name, field) in KNOWN_GOLDEN_DIFFERENCES else mismatches).append(entry)
+        mode = "by-name"
+    return {"pdf": pdf_path, "mode": mode, "dishes": len(dishes), "mismatches": mismatches, "known": known}
+
+def extract_synthetic(pdf_path, **options):
+    """提取合成PDF的全部页面（输出格式与写出的JSON文件相同）"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        dishes = extract_table.extract_dish_info_final(pdf_path, 1, None, **options)
+    return json.dumps(dishes, ensure_ascii=False, indent=2)
+
+def run_synthetic_golden(golden_json=SYNTHETIC_GOLDEN, pages=SYNTHETIC_GOLDEN_PAGES, update=False):
+    """生成合成PDF并与黄金输出逐字节比较（合成PDF可重复生成，不依赖仓库外的完整菜谱）；update=True时改写黄金输出"""
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = os.path.join(tmp, "synthetic_golden.pdf")
+        make_synthetic_pdf(pdf_path, pages)
+        output = extract_synthetic(pdf_path)
+    if update:
+        os.makedirs(os.path.dirname(golden_json), exist_ok=True)
+        with open(golden_json, "w", encoding="utf-8") as f:
+            f.write(output)
+    with open(golden_json, encoding="utf-8") as f:
+        golden = json.load(f)
+    dishes = json.loads(output)
+    mismatches = [{"index": idx, "品名": want["基本信息"].get("品名"), "got": got, "want": want}
+                  for idx, (got, want) in enumerate(zip(dishes, golden)) if got != want]
+    if len(dishes) != len(golden):
+        mismatches.append({"error": f"菜品数{len(dishes)}，黄金输出为{len(golden)}"})
+    return {"pages": pages, "mode": "byte", "dishes": len(dishes), "mismatches": mismatches}
+
+# ---------------------- 命令行 ----------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="extract_table.py 基准测试与黄金回归检查")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    synth = sub.add_parser("synth", help="生成合成水印表格PDF")
+    synth.add_argument("--pages", type=int, default=200)
+    synth.add_argument("--seed", type=int, default=0)
+    synth.add_argument("--output", default="synthetic.pdf")
+
+    micro = sub.add_parser("micro", help="清洗/解析函数微基准")
+    micro.add_argument("--pdf", help="输入PDF（默认生成40页合成PDF）")
+    micro.add_argument("--repeat", type=int, default=5)
+
+    e2e = sub.add_parser("e2e", help="端到端页/秒与峰值内存")
+    e2e.add_argument("--pages", type=int, nargs="+", default=[10, 100])
+    e2e.add_argument("--workers", type=int, nargs="+", default=[1])
+
+    golden = sub.add_parser("golden", help="与已提交JSON对比")
+    golden.add_argument("--pdf", default=GOLDEN_PDF)
+    golden.add_argument("--json", default=GOLDEN_JSON)
+    golden.add_argument("--update-synthetic", action="store_true", help=f"重新生成{SYNTHETIC_GOLDEN}（有意改变输出时）")
+
+    coldstart = sub.add_parser("coldstart", help="冷启动耗时：jieba默认词典 vs 预构建词典")
+    coldstart.add_argument("--workers", type=int, default=4)
+    coldstart.add_argument("--repeat", type=int, default=3)
+
+    sub.add_parser("all", help="快速运行全部检查")
+
+    child = sub.add_parser("_e2e-child")
+    child.add_argument("pdf")
+    child.add_argument("workers", type=int)
+
+    for p in (micro, e2e, golden, coldstart):
+        p.add_argument("--report", help="把结果写入JSON文件")
+    args = parser.parse_args(argv)
+
+    if args.command == "_e2e-child":
+        _e2e_child(args.pdf, args.workers)
+        return 0
+    if args.command == "synth":
+        meta = make_synthetic_pdf(args.output, args.pages, seed=args.seed)
+        print(f"已生成{meta['pages']}页合成PDF：{args.output}")
+        for start, end, category in meta["sections"]:
+            print(f"  {start}-{end}：{category}")
+        return 0
+
+    report = {}
+    if args.command in ("micro", "all"):
+        with tempfile.TemporaryDirectory() as tmp:
+            pdf_path = getattr(args, "pdf", None)
+            if not pdf_path:
+                pdf_path = os.path.join(tmp, "synthetic_micro.pdf")
+                make_synthetic_pdf(pdf_path, 40)
+            report["micro"] = run_microbenchmarks(pdf_path, repeat=getattr(args, "repeat", 3))
+        for name, us in report["micro"]["us_per_call"].items():
+            print(f"{name:<28}{us:>10.1f} µs/次")
+    if args.command in ("e2e", "all"):
+        report["e2e"] = run_e2e(getattr(args, "pages", [10, 100]), getattr(args, "workers", [1]))
+    if args.command in ("coldstart", "all"):
+        report["coldstart"] = run_coldstart(getattr(args, "workers", 2), getattr(args, "repeat", 1))
+    if args.command in ("golden", "all"):
+        report["synthetic_golden"] = run_synthetic_golden(update=getattr(args, "update_synthetic", False))
+        report["golden"] = run_golden(getattr(args, "pdf", GOLDEN_PDF) or GOLDEN_PDF,
+                                      getattr(args, "json", GOLDEN_JSON))
+        synthetic = report["synthetic_golden"]
+        print(f"合成PDF黄金回归（{synthetic['pages']}页，逐字节）：{synthetic['dishes']}道菜，"
+              f"{len(synthetic['mismatches'])}处不一致")
+        for mismatch in synthetic["mismatches"]:
+            print("  " + json.dumps(mismatch, ensure_ascii=False))
+        print(f"黄金回归（{report['golden']['mode']}）：{report['golden']['dishes']}道菜，"
+              f"{len(report['golden']['mismatches'])}处不一致，{len(report['golden']['known'])}处已知差异")
+        for mismatch in report["golden"]["mismatches"]:
+            print("  " + json.dumps(mismatch, ensure_ascii=False))
+
+    if getattr(args, "report", None):
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    failed = report.get("golden", {}).get("mismatches") or report.get("synthetic_golden", {}).get("mismatches")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
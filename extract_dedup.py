@@ -0,0 +1,293 @@
+"""跨版本菜品去重与变更报告：对多个PDF版本的提取结果做近似重复检测（MinHash+LSH，近线性时间），
+给每道菜分配规范菜品id，并按版本输出相对上一版本的变更（下游只需重新处理真正变化的菜品）
+
+用法示例：
+    python extract_dedup.py 2024春.json 2024夏.json 2024秋.jsonl --output dedup_report.json   # 按参数顺序为版本顺序
+    python extract_dedup.py batch_output/catalogue.json                                        # 批量提取的汇总目录（按"来源"分版本）
+    python batch_extract.py menus/ --dedup dedup_report.json                                   # 批量提取后直接去重
+    python extract_dedup.py 2025春.json --previous dedup_report.json --output dedup_report.json   # 沿用上一次报告的规范id
+
+报告结构：
+    dishes:   [{"edition", "position", "name", "canonical_id", "content_hash"}]   每道菜的规范id（近似重复的菜品共用一个）
+    clusters: {规范id: [[版本, 序号], ...]}                                        包含多个成员的近似重复簇
+    changes:  {版本: {"unchanged", "changed", "new", "removed"}}                  相对上一版本的变更（规范id列表）
+    id_map:   {内容哈希: 规范id}、signatures: {规范id: MinHash签名}                   供下一次运行沿用规范id（--previous）
+规范id取自簇内最早版本中最早出现的菜品内容哈希，同一道菜在后续版本中的id保持不变。
+给定上一次的报告时，与上一次报告中的菜品内容相同或近似重复的菜品沿用其规范id（与本次参与去重的版本集合无关），
+报告中的id_map/signatures为上一次与本次的并集；本次的第一个版本不在上一次报告中时，它的变更相对上一次报告的最后一个版本计算。
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import time
+import zlib
+from collections import defaultdict
+
+DEDUP_VERSION = 2
+SHINGLE_SIZE = 3  # 字符shingle长度
+SHINGLE_FIELDS = ("品名", "配料", "制作工艺")  # 参与近似重复判断的字段
+NUM_PERM = 64  # MinHash签名长度
+LSH_BANDS = 16  # LSH分段数（每段NUM_PERM/LSH_BANDS行；命中阈值约为(1/分段数)^(1/行数)≈0.5）
+SIMILARITY_THRESHOLD = 0.7  # 候选对的shingle Jaccard相似度不低于该值才视为同一道菜
+MINHASH_SEED = 20240601  # 哈希函数系数的随机种子（固定，保证签名可复现）
+CANONICAL_ID_LENGTH = 12
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_NORMALIZE_PATTERN = re.compile(r"[^\w]+")  # 去掉空白和标点（各版本排版差异）
+
+# ---------------------- 读取 ----------------------
+def _read(path):
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+def load_editions(paths):
+    """结果文件 → [(版本名, 菜品列表)]：普通结果文件以文件名为版本名；
+    batch_extract的汇总目录按每道菜的"来源"拆分版本（保持汇总目录中的文件顺序）"""
+    editions = []
+    for path in paths:
+        data = _read(path)
+        if isinstance(data, dict) and "dishes" in data:
+            grouped = defaultdict(list)
+            for dish in data["dishes"]:
+                dish = dict(dish)
+                grouped[dish.pop("来源")].append(dish)
+            editions.extend(grouped.items())
+        else:
+            editions.append((os.path.splitext(os.path.basename(path))[0], data))
+    return editions
+
+# ---------------------- MinHash ----------------------
+def _field_text(dish, field):
+    for group in ("基本信息", "餐厅操作工艺"):
+        if field in dish.get(group, {}):
+            value = dish[group][field]
+            return "".join(value) if isinstance(value, list) else str(value or "")
+    return ""
+
+def dish_shingles(dish):
+    """菜品 → shingle哈希集合：各字段去掉空白和标点后取SHINGLE_SIZE字shingle（带字段序号，不同字段互不混淆）"""
+    shingles = set()
+    for field_idx, field in enumerate(SHINGLE_FIELDS):
+        text = _NORMALIZE_PATTERN.sub("", _field_text(dish, field))
+        if len(text) < SHINGLE_SIZE:
+            if text:
+                shingles.add(zlib.crc32(f"{field_idx}{text}".encode("utf-8")))
+            continue
+        for i in range(len(text) - SHINGLE_SIZE + 1):
+            shingles.add(zlib.crc32(f"{field_idx}{text[i:i + SHINGLE_SIZE]}".encode("utf-8")))
+    return shingles
+
+def hash_coefficients(num_perm=NUM_PERM, seed=MINHASH_SEED):
+    """NUM_PERM个哈希函数h(x)=(a*x+b) mod p的系数（模拟随机排列）"""
+    rng = random.Random(seed)
+    return [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME)) for _ in range(num_perm)]
+
+def minhash_signature(shingles, coefficients):
+    """shingle集合的MinHash签名（每个哈希函数下的最小值）；空集合返回全最大值"""
+    if not shingles:
+        return tuple(_MAX_HASH for _ in coefficients)
+    return tuple(min(((a * x + b) % _MERSENNE_PRIME) & _MAX_HASH for x in shingles) for a, b in coefficients)
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+def signature_similarity(a, b):
+    """两个MinHash签名的相似度估计（相同位置取值相等的比例，近似shingle Jaccard相似度）"""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+def lsh_keys(signature, bands=LSH_BANDS):
+    rows = len(signature) // bands
+    return [(band, tuple(signature[band * rows:(band + 1) * rows])) for band in range(bands)]
+
+# ---------------------- 聚类 ----------------------
+class DisjointSet:
+    """并查集（簇的代表为序号最小的成员，即最早版本中最早出现的菜品）"""
+
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, i):
+        root = i
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[i] != root:
+            self.parent[i], i = root, self.parent[i]
+        return root
+
+    def union(self, i, j):
+        root_i, root_j = self.find(i), self.find(j)
+        if root_i != root_j:
+            self.parent[max(root_i, root_j)] = min(root_i, root_j)
+
+def content_hash(dish):
+    """菜品内容哈希（不含图片路径：页码变化不算内容变化）"""
+    content = {key: value for key, value in dish.items() if key != "图片"}
+    return hashlib.sha1(json.dumps(content, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+def cluster_dishes(dishes, threshold=SIMILARITY_THRESHOLD, bands=LSH_BANDS):
+    """对菜品列表做近似重复聚类，返回(每道菜所在簇的代表序号, 内容哈希列表, {不同内容的首个菜品序号: MinHash签名})
+    内容完全相同的菜品先按内容哈希合并，只对不同内容计算签名；LSH同一分桶内的菜品与桶内尚未同簇的每个菜品核对相似度
+    （只与桶内首个菜品比较会在它未达阈值时漏掉其余近似重复），分桶通常很小，整体近线性时间"""
+    hashes = [content_hash(dish) for dish in dishes]
+    clusters = DisjointSet(len(dishes))
+    first_by_hash = {}
+    unique = []  # 各不同内容的首个菜品序号
+    for i, digest in enumerate(hashes):
+        if digest in first_by_hash:
+            clusters.union(first_by_hash[digest], i)
+        else:
+            first_by_hash[digest] = i
+            unique.append(i)
+
+    coefficients = hash_coefficients()
+    shingles = {i: dish_shingles(dishes[i]) for i in unique}
+    signatures = {}
+    buckets = defaultdict(list)
+    for i in unique:
+        signatures[i] = minhash_signature(shingles[i], coefficients)
+        for key in lsh_keys(signatures[i], bands):
+            bucket = buckets[key]
+            for j in bucket:
+                if clusters.find(j) != clusters.find(i) and jaccard(shingles[j], shingles[i]) >= threshold:
+                    clusters.union(j, i)
+            bucket.append(i)
+    return [clusters.find(i) for i in range(len(dishes))], hashes, signatures
+
+def assign_canonical_ids(roots, hashes, signatures, previous=None, threshold=SIMILARITY_THRESHOLD):
+    """簇代表 → 规范id。给定上一次的报告时优先沿用其id：簇内最早的、内容哈希在上一次id表中的成员的id；
+    否则用上一次保存的MinHash签名做LSH查找，估计相似度不低于threshold的沿用最相似的id；
+    都没有时取簇代表的内容哈希前缀。每个id只分给一个簇"""
+    previous = previous or {}
+    id_map = previous.get("id_map") or {entry["content_hash"]: entry["canonical_id"]
+                                        for entry in previous.get("dishes", [])}
+    previous_signatures = previous.get("signatures", {})
+    buckets = defaultdict(list)
+    for canonical_id, signature in previous_signatures.items():
+        for key in lsh_keys(signature):
+            buckets[key].append(canonical_id)
+
+    members = defaultdict(list)
+    for i, root in enumerate(roots):
+        members[root].append(i)
+    canonical, used = {}, set()
+    for root in sorted(members):
+        canonical_id = next((id_map[hashes[i]] for i in members[root]
+                             if hashes[i] in id_map and id_map[hashes[i]] not in used), None)
+        if canonical_id is None and buckets:
+            signature = signatures[root]
+            candidates = {candidate for key in lsh_keys(signature) for candidate in buckets.get(key, ())
+                          if candidate not in used}
+            scored = [(signature_similarity(signature, previous_signatures[candidate]), candidate)
+                      for candidate in candidates]
+            similarity, best = max(scored, default=(0, None))
+            canonical_id = best if similarity >= threshold else None
+        canonical[root] = canonical_id or hashes[root][:CANONICAL_ID_LENGTH]
+        used.add(canonical[root])
+    return canonical
+
+# ---------------------- 报告 ----------------------
+def _previous_baseline(previous, editions):
+    """上一次报告中最后一个版本的{规范id: 内容哈希集合}（该版本也在本次运行中时返回None）"""
+    if not previous or not previous.get("editions") or previous["editions"][-1] in {name for name, _ in editions}:
+        return None
+    baseline = defaultdict(set)
+    for entry in previous.get("dishes", []):
+        if entry["edition"] == previous["editions"][-1]:
+            baseline[entry["canonical_id"]].add(entry["content_hash"])
+    return baseline
+
+def dedup_editions(editions, threshold=SIMILARITY_THRESHOLD, previous=None):
+    """[(版本名, 菜品列表)]（按版本先后排列）→ 去重与变更报告（结构见模块说明）
+    previous为上一次的报告（沿用其规范id，第一个版本相对其最后一个版本计算变更）"""
+    refs = [(edition, position, dish) for edition, dishes in editions for position, dish in enumerate(dishes)]
+    roots, hashes, signatures = cluster_dishes([dish for _, _, dish in refs], threshold)
+    canonical = assign_canonical_ids(roots, hashes, signatures, previous, threshold)
+
+    entries = []
+    members = defaultdict(list)
+    edition_hashes = defaultdict(lambda: defaultdict(set))  # 版本 → {规范id: 内容哈希集合}
+    for (edition, position, dish), root, digest in zip(refs, roots, hashes):
+        canonical_id = canonical[root]
+        entries.append({"edition": edition, "position": position, "name": _field_text(dish, "品名"),
+                        "canonical_id": canonical_id, "content_hash": digest})
+        members[canonical_id].append([edition, position])
+        edition_hashes[edition][canonical_id].add(digest)
+
+    changes = {}
+    last = _previous_baseline(previous, editions)
+    for edition, _ in editions:
+        current = edition_hashes[edition]
+        if last is None:
+            report = {"unchanged": [], "changed": [], "new": sorted(current), "removed": []}
+        else:
+            report = {"unchanged": [], "changed": [], "new": [],
+                      "removed": sorted(set(last) - set(current))}
+            for canonical_id, digests in current.items():
+                if canonical_id not in last:
+                    report["new"].append(canonical_id)
+                elif digests == last[canonical_id]:
+                    report["unchanged"].append(canonical_id)
+                else:
+                    report["changed"].append(canonical_id)
+            for status in ("unchanged", "changed", "new"):
+                report[status].sort()
+        changes[edition] = report
+        last = current
+
+    id_map = dict((previous or {}).get("id_map", {}))
+    id_map.update((entry["content_hash"], entry["canonical_id"]) for entry in entries)
+    signature_map = dict((previous or {}).get("signatures", {}))
+    signature_map.update((canonical[root], list(signatures[root])) for root in canonical)
+
+    return {
+        "version": DEDUP_VERSION,
+        "settings": {"shingle_size": SHINGLE_SIZE, "num_perm": NUM_PERM, "bands": LSH_BANDS, "threshold": threshold},
+        "editions": [edition for edition, _ in editions],
+        "dishes": entries,
+        "clusters": {canonical_id: positions for canonical_id, positions in members.items() if len(positions) > 1},
+        "changes": changes,
+        "id_map": id_map,
+        "signatures": signature_map,
+    }
+
+def read_previous_report(path):
+    """读取上一次的去重报告（不存在时返回None）"""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def write_dedup_report(editions, path, threshold=SIMILARITY_THRESHOLD, previous=None):
+    report = dedup_editions(editions, threshold, previous)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+def print_dedup_summary(report, path):
+    print(f"去重报告：{path}（{len(report['dishes'])}道菜品 → "
+          f"{len({entry['canonical_id'] for entry in report['dishes']})}个规范菜品，{len(report['clusters'])}个重复簇）")
+    for edition, change in report["changes"].items():
+        counts = "，".join(f"{label}{len(change[status])}" for status, label in
+                          (("unchanged", "未变"), ("changed", "变化"), ("new", "新增"), ("removed", "移除")))
+        print(f"  {edition}：{counts}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="跨版本菜品近似重复检测与变更报告（MinHash+LSH）")
+    parser.add_argument("results", nargs="+", help="各版本的提取结果JSON/JSONL（按版本先后排列），或batch_extract汇总目录")
+    parser.add_argument("--output", default="dedup_report.json", help="报告路径（默认%(default)s）")
+    parser.add_argument("--previous", metavar="REPORT_JSON", help="上一次的去重报告（沿用其中的规范id）")
+    parser.add_argument("--threshold", type=float, default=SIMILARITY_THRESHOLD,
+                        help="视为同一道菜的shingle Jaccard相似度下限（默认%(default)s）")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    previous = read_previous_report(args.previous)
+    if args.previous and previous is None:
+        parser.error(f"上一次的去重报告不存在：{args.previous}")
+    report = write_dedup_report(load_editions(args.results), args.output, args.threshold, previous)
+    print_dedup_summary(report, args.output)
+    print(f"耗时{time.perf_counter() - started:.2f}秒")
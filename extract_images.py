@@ -0,0 +1,246 @@
+"""菜品图片阶段：从每道菜表格起始页取出内嵌的菜品图片，生成多尺寸WebP/AVIF和低清占位图
+
+用法示例：
+    python extract_images.py dish_info_category_page_img.json                  # 默认输出到public/images
+    python extract_images.py dishes.jsonl --pdf 老乡鸡.pdf --output-dir out --workers 4
+    python extract_table.py --images public/images                          # 提取菜品后直接运行图片阶段
+
+每张图片的输出（以 main_page_47_img 为例）：
+    main_page_47_img-160.webp / main_page_47_img-196.avif ...   # IMAGE_WIDTHS中小于原图宽度的各尺寸+原尺寸
+    images_manifest.json                                        # 各图片的源哈希、尺寸、文件列表和base64占位图
+源图片（内嵌图片流的原始字节）哈希未变且输出文件齐全时跳过，新版PDF只重新编码有变化的图片。
+依赖Pillow（pip install pillow）；Pillow不支持AVIF时只生成WebP。
+"""
+import argparse
+import base64
+import hashlib
+import io
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import pdfplumber
+from pdfminer.pdftypes import PDFStream, resolve1
+from PIL import Image, features
+
+import extract_outputs
+from extract_table import _name
+
+PDF_PATH = "老乡鸡.pdf"
+DISHES_JSON = "dish_info_category_page_img.json"  # 提取结果（JSON或JSONL）
+IMAGE_DIR = os.path.join("public", "images")  # 输出目录
+MANIFEST_NAME = "images_manifest.json"  # 图片清单文件名（位于输出目录下）
+IMAGE_WIDTHS = (160, 320, 640)  # 响应式尺寸（像素宽度），大于原图的尺寸不生成
+IMAGE_FORMATS = ("webp", "avif")
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+PLACEHOLDER_WIDTH = 16  # 低清占位图宽度（内联为base64 data URI）
+PLACEHOLDER_QUALITY = 30
+IMAGE_SETTINGS_VERSION = 1  # 编码参数版本号：修改尺寸/质量等编码逻辑后请递增，使已生成的图片全部重新编码
+WORKERS = os.cpu_count() or 1
+
+IMAGE_PATH_PATTERN = re.compile(r"_page_(\d+)_img\.\w+$")
+ICC_COLOR_SPACES = {1: "DeviceGray", 3: "DeviceRGB", 4: "DeviceCMYK"}  # ICCBased颜色空间的分量数/N → 对应的设备颜色空间
+
+# ---------------------- 内嵌图片读取 ----------------------
+def available_formats():
+    """当前Pillow支持的输出格式"""
+    return tuple(fmt for fmt in IMAGE_FORMATS if features.check(fmt))
+
+def settings_key(formats):
+    """编码参数的指纹：参数变化时所有图片都需要重新编码"""
+    settings = [IMAGE_SETTINGS_VERSION, IMAGE_WIDTHS, formats, WEBP_QUALITY, AVIF_QUALITY,
+                PLACEHOLDER_WIDTH, PLACEHOLDER_QUALITY]
+    return hashlib.sha256(json.dumps(settings).encode("utf-8")).hexdigest()[:16]
+
+def page_image_streams(page):
+    """页面资源中直接引用的图片XObject（不解释内容流，比page.images快得多）"""
+    xobjects = resolve1((page.page_obj.resources or {}).get("XObject")) or {}
+    streams = []
+    for ref in xobjects.values():
+        stream = resolve1(ref)
+        if _name(stream.get("Subtype")) == "Image":
+            streams.append(stream)
+    return streams
+
+def dish_image_stream(page):
+    """页面上的菜品图片：取像素面积最大的内嵌图片，没有图片时返回None"""
+    streams = page_image_streams(page)
+    if not streams:
+        return None
+    return max(streams, key=lambda s: (s.get("Width") or 0) * (s.get("Height") or 0))
+
+def stream_source(stream):
+    """图片流 → 可跨进程传递的源数据（解码所需属性+数据），DCT/JPX为原始编码字节"""
+    filters = [_name(f) for f, _ in stream.get_filters()]
+    return {
+        "filter": filters[-1] if filters else None,
+        "width": stream.get("Width"),
+        "height": stream.get("Height"),
+        "color_space": color_space_name(stream.get("ColorSpace")),
+        "bits": stream.get("BitsPerComponent"),
+        "data": stream.get_data(),
+    }
+
+def color_space_name(value):
+    """颜色空间 → 名称：ICCBased按分量数/N换成对应的设备颜色空间（菜品照片最常见），
+    其他数组形式的颜色空间（Indexed、Separation等）返回其类型名，由decode_source报不支持"""
+    value = resolve1(value)
+    if not isinstance(value, list):
+        return _name(value)
+    family = _name(resolve1(value[0])) if value else None
+    if family == "ICCBased" and len(value) > 1:
+        profile = resolve1(value[1])
+        components = resolve1(profile.get("N")) if isinstance(profile, PDFStream) else None
+        return ICC_COLOR_SPACES.get(components, f"ICCBased/N={components}")
+    return str(family)
+
+def source_hash(source):
+    digest = hashlib.sha256(source["data"])
+    digest.update(json.dumps({k: v for k, v in source.items() if k != "data"}, sort_keys=True,
+                             default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+def decode_source(source):
+    """源数据 → PIL图片；菜品照片不透明，忽略软蒙版（SMask）"""
+    if source["filter"] in ("DCTDecode", "JPXDecode"):
+        image = Image.open(io.BytesIO(source["data"]))
+        image.load()
+        return image
+    modes = {"DeviceRGB": "RGB", "DeviceGray": "L", "DeviceCMYK": "CMYK"}
+    mode = modes.get(source["color_space"])
+    if mode is None or source["bits"] != 8:
+        raise ValueError(f"不支持的图片格式：{source['color_space']} {source['bits']}位")
+    return Image.frombytes(mode, (source["width"], source["height"]), source["data"])
+
+# ---------------------- 编码（在工作进程中执行）----------------------
+def _encode(image, fmt, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt.upper(), quality=quality)
+    return buffer.getvalue()
+
+def target_widths(width):
+    """小于原图宽度的响应式尺寸，原图不超过最大尺寸时再加上原尺寸（不放大）"""
+    widths = [w for w in IMAGE_WIDTHS if w < width]
+    if width <= max(IMAGE_WIDTHS):
+        widths.append(width)
+    return widths
+
+def encode_image(task):
+    """解码一张源图片并写出所有尺寸/格式，返回该图片的清单条目"""
+    stem, source, output_dir, formats = task
+    image = decode_source(source)
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    files = {fmt: {} for fmt in formats}
+    for width in target_widths(image.width):
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for fmt in formats:
+            name = f"{stem}-{width}.{fmt}"
+            with open(os.path.join(output_dir, name), "wb") as f:
+                f.write(_encode(resized, fmt, WEBP_QUALITY if fmt == "webp" else AVIF_QUALITY))
+            files[fmt][str(width)] = name
+    placeholder_height = max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))
+    placeholder = _encode(image.resize((PLACEHOLDER_WIDTH, placeholder_height), Image.BILINEAR),
+                          "webp", PLACEHOLDER_QUALITY)
+    return {
+        "width": image.width,
+        "height": image.height,
+        "files": files,
+        "placeholder": "data:image/webp;base64," + base64.b64encode(placeholder).decode("ascii"),
+    }
+
+# ---------------------- 图片阶段 ----------------------
+def dish_image_pages(dishes):
+    """菜品 → {图片名(不含扩展名): 表格起始页码}，页码从"图片"字段（..._page_页码_img.png）中解析"""
+    pages = {}
+    for dish in dishes:
+        match = IMAGE_PATH_PATTERN.search(dish.get("图片") or "")
+        if match:
+            stem = os.path.splitext(os.path.basename(dish["图片"]))[0]
+            pages[stem] = int(match.group(1))
+    return pages
+
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("images", {})
+
+def _is_current(entry, digest, key, output_dir):
+    """清单条目的源哈希和编码参数都未变，且输出文件都还在"""
+    if not entry or entry.get("source_hash") != digest or entry.get("settings") != key:
+        return False
+    return all(os.path.exists(os.path.join(output_dir, name))
+               for sizes in entry["files"].values() for name in sizes.values())
+
+def extract_dish_images(pdf_path, dishes, output_dir=IMAGE_DIR, workers=WORKERS, force=False):
+    """为每道菜生成图片：主进程按页读取图片流并比对哈希，只把有变化的图片交给进程池编码
+    返回统计{"encoded", "skipped", "missing", "failed"}"""
+    os.makedirs(output_dir, exist_ok=True)
+    formats = available_formats()
+    key = settings_key(formats)
+    previous = {} if force else load_manifest(output_dir)
+    manifest = {}
+    stats = {"encoded": 0, "skipped": 0, "missing": [], "failed": {}}
+    pending = {}  # 图片名 → (页码, 源哈希)
+    tasks = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for stem, page_num in sorted(dish_image_pages(dishes).items(), key=lambda item: item[1]):
+            stream = dish_image_stream(pdf.pages[page_num - 1]) if 1 <= page_num <= len(pdf.pages) else None
+            if stream is None:
+                stats["missing"].append(stem)
+                continue
+            source = stream_source(stream)
+            digest = source_hash(source)
+            if _is_current(previous.get(stem), digest, key, output_dir):
+                manifest[stem] = previous[stem]
+                stats["skipped"] += 1
+                continue
+            pending[stem] = (page_num, digest)
+            tasks.append((stem, source, output_dir, formats))
+
+    parallel = workers > 1 and len(tasks) > 1
+    with ProcessPoolExecutor(max_workers=workers) if parallel else nullcontext() as executor:
+        results = executor.map(_safe_encode, tasks, chunksize=4) if parallel else map(_safe_encode, tasks)
+        for (stem, *_), (entry, error) in zip(tasks, results):
+            if error:
+                stats["failed"][stem] = error
+                continue
+            page_num, digest = pending[stem]
+            manifest[stem] = {"page": page_num, "source_hash": digest, "settings": key, **entry}
+            stats["encoded"] += 1
+
+    with open(os.path.join(output_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump({"formats": list(formats), "widths": list(IMAGE_WIDTHS),
+                   "images": dict(sorted(manifest.items()))}, f, ensure_ascii=False, indent=2)
+    return stats
+
+def _safe_encode(task):
+    """单张图片编码失败（不支持的颜色空间、损坏的数据等）只记录错误，不中断整个阶段"""
+    try:
+        return encode_image(task), None
+    except Exception as exc:
+        return None, f"{type(exc).__name__}: {exc}"
+
+def print_image_stats(stats, output_dir):
+    print(f"图片阶段完成：新生成{stats['encoded']}张，未变化跳过{stats['skipped']}张 → {output_dir}")
+    if stats["missing"]:
+        print(f"以下{len(stats['missing'])}张图片在起始页上未找到内嵌图片：{', '.join(stats['missing'])}")
+    for stem, error in stats["failed"].items():
+        print(f"图片{stem}编码失败：{error}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="从PDF中提取菜品图片并生成多尺寸WebP/AVIF")
+    parser.add_argument("dishes", nargs="?", default=DISHES_JSON, help="提取结果JSON/JSONL（默认%(default)s）")
+    parser.add_argument("--pdf", default=PDF_PATH, help="源PDF（默认%(default)s）")
+    parser.add_argument("--output-dir", default=IMAGE_DIR, help="输出目录（默认%(default)s）")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="编码进程数（默认%(default)s）")
+    parser.add_argument("--force", action="store_true", help="忽略清单，全部重新编码")
+    args = parser.parse_args()
+    stats = extract_dish_images(args.pdf, extract_outputs.load_dishes(args.dishes), args.output_dir, args.workers, args.force)
+    print_image_stats(stats, args.output_dir)
@@ -0,0 +1,601 @@
+"""菜品数据的附加输出：前端用的预构建检索索引、按类别分片输出、紧凑列式编码等（由extract_table.py在同一次运行中生成，也可单独运行）
+
+用法示例：
+    python extract_table.py --index search_index.json                   # 提取菜品并同时生成检索索引
+    python extract_table.py --shards public/data                        # 按类别分片输出（清单+各类别详情分片）
+    python extract_outputs.py index dish_info_category_page_img.json --output search_index.json
+    python extract_outputs.py shards dish_info_category_page_img.json --output-dir public/data
+    python extract_outputs.py compact dish_info_category_page_img.json --output catalogue.msgpack.br
+    python extract_outputs.py compact dish_info_category_page_img.json --report   # 各紧凑编码的体积/解析耗时对比
+    python extract_outputs.py sqlite dish_info_category_page_img.json --output dishes.sqlite --edition 2024春
+    python extract_outputs.py query dishes.sqlite --ingredient 蚕豆酱 --cooking-method 蒸 --max-flavour-hours 3
+"""
+import argparse
+import contextlib
+import gzip
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import statistics
+import time
+from collections import Counter, defaultdict
+
+# 可选依赖：MessagePack和brotli仅在选用对应编码时需要
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+INDEX_VERSION = 1
+SHARD_MANIFEST_VERSION = 2
+SHARD_MANIFEST_NAME = "manifest.json"  # 分片清单文件名（内容会变，不带哈希；分片文件名带内容哈希，可长期缓存）
+SHARD_HASH_LENGTH = 10  # 分片文件名中内容哈希的长度
+FALLBACK_SHARD = "other"  # 类别没有英文名时使用的分片名
+COMPACT_FORMAT = "dish-columnar"
+COMPACT_VERSION = 1
+INTERN_MAX_RATIO = 0.5  # 某列不同取值数/非空值数不超过该比例时，该列字符串放入字典表（以序号存储）
+INDEX_FIELDS = ("配料", "味型", "烹饪方式", "类别")  # 建倒排索引的字段
+NAME_NGRAM_SIZES = (1, 2)  # 品名n-gram长度（单字+双字，覆盖任意长度的子串查询）
+
+_NOTE_PATTERN = re.compile(r"[（(][^）)]*[）)]")  # 配料中的括号备注，如"鸡油（门店根据区域口味调整）"
+_SPLIT_PATTERN = re.compile(r"[、，,/或]+")
+
+def _dump_compact(data, path):
+    """不缩进、无多余空格的JSON"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+
+def load_dishes(path):
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+def dish_field(dish, field):
+    """按字段名取值：基本信息/餐厅操作工艺中的字段或顶层字段"""
+    for group in ("基本信息", "餐厅操作工艺"):
+        if field in dish.get(group, {}):
+            return dish[group][field]
+    return dish.get(field)
+
+# ---------------------- 预构建检索索引 ----------------------
+def ingredient_tokens(ingredient):
+    """配料 → 检索词：去掉括号备注，按顿号/逗号/"或"拆分，如"鸡油（门店…）"→["鸡油"]"""
+    text = _NOTE_PATTERN.sub("", ingredient)
+    return [token.strip() for token in _SPLIT_PATTERN.split(text) if token.strip()]
+
+def field_tokens(dish, field):
+    value = dish_field(dish, field)
+    if not value:
+        return []
+    if field == "配料":
+        return [token for item in value for token in ingredient_tokens(item)]
+    return [value.strip()] if isinstance(value, str) else [str(v).strip() for v in value]
+
+def name_ngrams(name):
+    return {name[i:i + n] for n in NAME_NGRAM_SIZES for i in range(len(name) - n + 1)}
+
+def build_search_index(dishes):
+    """构建检索索引；菜品id为其在输出JSON中的序号
+    fields: {字段: {检索词: [菜品id...]}}，name_ngrams: {n-gram: [菜品id...]}，
+    categories: {类别: 菜品数量}（按数量降序），names: 按id排列的品名（展示搜索结果无需加载完整数据）"""
+    postings = {field: defaultdict(set) for field in INDEX_FIELDS}
+    ngrams = defaultdict(set)
+    categories = Counter()
+    names = []
+    for dish_id, dish in enumerate(dishes):
+        for field in INDEX_FIELDS:
+            for token in field_tokens(dish, field):
+                postings[field][token].add(dish_id)
+        name = dish_field(dish, "品名") or ""
+        for gram in name_ngrams(name):
+            ngrams[gram].add(dish_id)
+        categories[dish.get("类别")] += 1
+        names.append(name)
+    as_lists = lambda table: {key: sorted(ids) for key, ids in sorted(table.items())}
+    return {
+        "version": INDEX_VERSION,
+        "count": len(dishes),
+        "names": names,
+        "categories": dict(categories.most_common()),
+        "fields": {field: as_lists(postings[field]) for field in INDEX_FIELDS},
+        "name_ngrams": as_lists(ngrams),
+    }
+
+def search_index(index, name=None, **field_values):
+    """在索引上查询（与前端的查询逻辑一致，便于校验）：品名子串与各字段取值取交集，返回菜品id列表
+    例：search_index(index, name="鸡蛋", 类别="正餐菜品", 配料="葱花")"""
+    result = None
+    def narrow(ids):
+        nonlocal result
+        result = set(ids) if result is None else result & set(ids)
+    if name:
+        size = max(n for n in NAME_NGRAM_SIZES if n <= len(name))
+        for i in range(len(name) - size + 1):
+            narrow(index["name_ngrams"].get(name[i:i + size], ()))
+        # n-gram命中后再核对完整子串（n-gram交集可能包含不连续的匹配）
+        narrow(i for i in (result or ()) if name in index["names"][i])
+    for field, value in field_values.items():
+        narrow(index["fields"][field].get(value, ()))
+    return sorted(range(index["count"]) if result is None else result)
+
+def write_search_index(dishes, path):
+    index = build_search_index(dishes)
+    _dump_compact(index, path)
+    return index
+
+# ---------------------- 按类别分片输出 ----------------------
+def _shard_bytes(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def write_category_shards(dishes, output_dir, category_shards):
+    """按类别分片写出：每个类别一个详情分片（文件名带内容哈希），以及只含概要信息的清单
+    category_shards为{类别: 分片名}（如{"正餐菜品": "main"}），未列出的类别归入FALLBACK_SHARD
+    菜品id为其在输出JSON中的序号（与检索索引一致），返回清单
+    清单的previous_files记录上一代分片：仍持有上一代清单（长期缓存）的客户端可以继续加载，再下一次写出时才删除"""
+    os.makedirs(output_dir, exist_ok=True)
+    previous = _read_shard_manifest(output_dir)
+    shards = defaultdict(dict)
+    shard_categories = defaultdict(list)
+    entries = []
+    for dish_id, dish in enumerate(dishes):
+        category = dish.get("类别")
+        shard = category_shards.get(category, FALLBACK_SHARD)
+        shards[shard][str(dish_id)] = dish
+        if category not in shard_categories[shard]:
+            shard_categories[shard].append(category)
+        entries.append({"id": dish_id, "name": dish_field(dish, "品名"), "category": category,
+                        "image": dish.get("图片"), "shard": shard})
+
+    shard_files = {}
+    for shard, shard_dishes in shards.items():
+        data = _shard_bytes({"shard": shard, "dishes": shard_dishes})
+        digest = hashlib.sha256(data).hexdigest()
+        file_name = f"{shard}.{digest[:SHARD_HASH_LENGTH]}.json"
+        path = os.path.join(output_dir, file_name)
+        if not os.path.exists(path):  # 同名即同内容，无需重写
+            with open(path, "wb") as f:
+                f.write(data)
+        shard_files[shard] = {"file": file_name, "hash": digest, "categories": shard_categories[shard],
+                              "count": len(shard_dishes), "bytes": len(data)}
+    current = {info["file"] for info in shard_files.values()}
+    last = [info["file"] for info in previous.get("shards", {}).values()]
+
+    manifest = {"version": SHARD_MANIFEST_VERSION, "count": len(dishes), "shards": shard_files,
+                "previous_files": sorted(set(last) - current), "dishes": entries}
+    # 清单最后写出：写出过程中被读取时，旧清单引用的分片仍然存在
+    _dump_compact(manifest, os.path.join(output_dir, SHARD_MANIFEST_NAME))
+    _remove_stale_shards(output_dir, previous.get("previous_files", []), current | set(last))
+    return manifest
+
+def _read_shard_manifest(output_dir):
+    path = os.path.join(output_dir, SHARD_MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def _remove_stale_shards(output_dir, stale_files, keep):
+    """删除上上一代分片：只删除旧清单previous_files中列出、且不被本次和上一代清单引用的文件
+    （输出目录可能与其他带哈希的静态资源共用，不按文件名模式删除）"""
+    for name in stale_files:
+        path = os.path.join(output_dir, os.path.basename(name))
+        if name not in keep and os.path.exists(path):
+            os.remove(path)
+
+# ---------------------- 紧凑列式编码 ----------------------
+# 结构：{"format", "version", "count",
+#        "strings": 字典表（高重复字符串只存一次）,
+#        "shapes": 菜品结构表（各分组及其字段顺序，如[["基本信息", ["品名", "味型", ...]], ["图片", null], ...]）,
+#        "shape": 每道菜的结构序号,
+#        "columns": {字段路径: {"interned": 是否存字典表序号, "values": 按菜品排列的值}}}
+# 字段路径为"分组/字段"（如"基本信息/味型"）或顶层字段名；菜品缺少的字段在列中为null，由结构表区分缺失与取值
+def _dish_shape(dish):
+    return tuple((key, tuple(value) if isinstance(value, dict) else None) for key, value in dish.items())
+
+def _shape_paths(shape):
+    for group, keys in shape:
+        if keys is None:
+            yield group, (group,)
+        else:
+            for key in keys:
+                yield f"{group}/{key}", (group, key)
+
+def _internable(values):
+    """列中非空值全部是字符串或字符串列表，且重复度足够高"""
+    flat = []
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, str):
+            flat.append(value)
+        elif isinstance(value, list) and all(isinstance(item, str) for item in value):
+            flat.extend(value)
+        else:
+            return False
+    return bool(flat) and len(set(flat)) <= len(flat) * INTERN_MAX_RATIO
+
+def encode_compact(dishes):
+    """菜品列表 → 紧凑列式结构（decode_compact的逆过程）"""
+    shapes, shape_ids = [], {}
+    columns = defaultdict(lambda: [None] * len(dishes))
+    dish_shapes = []
+    for dish_id, dish in enumerate(dishes):
+        shape = _dish_shape(dish)
+        if shape not in shape_ids:
+            shape_ids[shape] = len(shapes)
+            shapes.append(shape)
+        dish_shapes.append(shape_ids[shape])
+        for path, keys in _shape_paths(shape):
+            value = dish
+            for key in keys:
+                value = value[key]
+            columns[path][dish_id] = value
+
+    strings, string_ids = [], {}
+    def intern(text):
+        if text not in string_ids:
+            string_ids[text] = len(strings)
+            strings.append(text)
+        return string_ids[text]
+
+    encoded_columns = {}
+    for path, values in columns.items():
+        interned = _internable(values)
+        if interned:
+            values = [None if v is None else intern(v) if isinstance(v, str) else [intern(item) for item in v]
+                      for v in values]
+        encoded_columns[path] = {"interned": interned, "values": values}
+    return {
+        "format": COMPACT_FORMAT,
+        "version": COMPACT_VERSION,
+        "count": len(dishes),
+        "strings": strings,
+        "shapes": [[[group, list(keys) if keys is not None else None] for group, keys in shape] for shape in shapes],
+        "shape": dish_shapes,
+        "columns": encoded_columns,
+    }
+
+def decode_compact(data):
+    """紧凑列式结构 → 菜品列表（与原输出结构、字段顺序完全一致）"""
+    if data.get("format") != COMPACT_FORMAT:
+        raise ValueError(f"不是紧凑菜品编码：format={data.get('format')!r}")
+    strings = data["strings"]
+    columns = {}
+    for path, column in data["columns"].items():
+        values = column["values"]
+        if column["interned"]:
+            values = [None if v is None else strings[v] if isinstance(v, int) else [strings[i] for i in v]
+                      for v in values]
+        columns[path] = values
+    shapes = [[(group, keys) for group, keys in shape] for shape in data["shapes"]]
+    dishes = []
+    for dish_id, shape_id in enumerate(data["shape"]):
+        dish = {}
+        for group, keys in shapes[shape_id]:
+            if keys is None:
+                dish[group] = columns[group][dish_id]
+            else:
+                dish[group] = {key: columns[f"{group}/{key}"][dish_id] for key in keys}
+        dishes.append(dish)
+    return dishes
+
+def _require(module, name):
+    if module is None:
+        raise RuntimeError(f"该编码需要安装{name}：pip install {name}")
+    return module
+
+def compact_variant(path):
+    """按文件扩展名确定编码与压缩方式，如catalogue.msgpack.br → ("msgpack", "brotli")"""
+    name = path.lower()
+    compression = "gzip" if name.endswith(".gz") else "brotli" if name.endswith(".br") else None
+    if compression:
+        name = name.rsplit(".", 1)[0]
+    return ("msgpack" if name.endswith(".msgpack") else "json"), compression
+
+def dumps_compact(dishes, encoding="json", compression=None):
+    """菜品列表 → 紧凑编码的字节串（encoding为json/msgpack，compression为None/gzip/brotli）"""
+    data = encode_compact(dishes)
+    if encoding == "msgpack":
+        payload = _require(msgpack, "msgpack").packb(data, use_bin_type=True)
+    else:
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if compression == "gzip":
+        return gzip.compress(payload, compresslevel=9, mtime=0)
+    if compression == "brotli":
+        return _require(brotli, "brotli").compress(payload, quality=11)
+    return payload
+
+def loads_compact(payload, encoding="json", compression=None):
+    """dumps_compact的逆过程，返回菜品列表"""
+    if compression == "gzip":
+        payload = gzip.decompress(payload)
+    elif compression == "brotli":
+        payload = _require(brotli, "brotli").decompress(payload)
+    if encoding == "msgpack":
+        data = _require(msgpack, "msgpack").unpackb(payload, raw=False)
+    else:
+        data = json.loads(payload)
+    return decode_compact(data)
+
+def write_compact(dishes, path):
+    """按扩展名（.json/.msgpack，可加.gz/.br）写出紧凑编码，返回字节数"""
+    payload = dumps_compact(dishes, *compact_variant(path))
+    with open(path, "wb") as f:
+        f.write(payload)
+    return len(payload)
+
+def read_compact(path):
+    with open(path, "rb") as f:
+        return loads_compact(f.read(), *compact_variant(path))
+
+def _median_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def compare_encodings(dishes, repeat=20):
+    """当前格式（indent=2的JSON）与各紧凑编码的体积和解析耗时（解析到菜品列表为止，取中位数）
+    未安装的可选依赖对应的编码跳过；每种编码都会校验解码结果与原数据一致"""
+    baseline = json.dumps(dishes, ensure_ascii=False, indent=2).encode("utf-8")
+    rows = [{"variant": "json (indent=2，当前格式)", "bytes": len(baseline),
+             "parse_ms": _median_ms(lambda: json.loads(baseline), repeat)}]
+    baseline_gzip = gzip.compress(baseline, compresslevel=9, mtime=0)
+    rows.append({"variant": "json+gzip (indent=2)", "bytes": len(baseline_gzip),
+                 "parse_ms": _median_ms(lambda: json.loads(gzip.decompress(baseline_gzip)), repeat)})
+    for encoding in ("json", "msgpack"):
+        for compression in (None, "gzip", "brotli"):
+            if (encoding == "msgpack" and msgpack is None) or (compression == "brotli" and brotli is None):
+                continue
+            payload = dumps_compact(dishes, encoding, compression)
+            if loads_compact(payload, encoding, compression) != dishes:
+                raise AssertionError(f"{encoding}/{compression}解码结果与原数据不一致")
+            rows.append({"variant": f"{encoding}" + (f"+{compression}" if compression else "") + "（列式）",
+                         "bytes": len(payload),
+                         "parse_ms": _median_ms(lambda: loads_compact(payload, encoding, compression), repeat)})
+    for row in rows:
+        row["size_ratio"] = round(row["bytes"] / rows[0]["bytes"], 3)
+        row["parse_ms"] = round(row["parse_ms"], 3)
+    return rows
+
+def print_encoding_report(rows):
+    print(f"{'编码':<28}{'字节数':>10}{'体积比':>8}{'解析耗时(ms)':>14}")
+    for row in rows:
+        print(f"{row['variant']:<28}{row['bytes']:>10}{row['size_ratio']:>8}{row['parse_ms']:>14}")
+
+def print_shard_summary(manifest, output_dir):
+    shards = "，".join(f"{name} {info['count']}道" for name, info in manifest["shards"].items())
+    print(f"分片输出：{output_dir}/{SHARD_MANIFEST_NAME}（{manifest['count']}道菜品；{shards}）")
+
+# ---------------------- SQLite数据库（FTS5全文索引） ----------------------
+# 表结构（多个PDF版本写入同一数据库，按版本名整体替换）：
+#   editions(id, name, dishes, created)                        版本：一个PDF/一次提取结果
+#   dishes(id, edition_id, position, name, flavor, flavour_window, flavour_minutes, grade,
+#          cooking_method, category, image, process, servings)  菜品（position为在输出JSON中的序号）
+#   ingredients(dish_id, position, name, raw)                   配料检索词（raw为原配料，如"鸡油（门店…）"）
+#   steps(dish_id, number, title, content, seconds)             制作步骤（seconds为步骤中时长之和）
+#   step_quantities(dish_id, step, material, amount, unit)      步骤中的用量
+#   dish_fts(name, ingredients, process)                        品名/配料/制作工艺全文索引（trigram分词，rowid=dishes.id）
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS editions (
+    id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, dishes INTEGER NOT NULL, created TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS dishes (
+    id INTEGER PRIMARY KEY, edition_id INTEGER NOT NULL REFERENCES editions(id), position INTEGER NOT NULL,
+    name TEXT, flavor TEXT, flavour_window TEXT, flavour_minutes REAL, grade TEXT, cooking_method TEXT,
+    category TEXT, image TEXT, process TEXT, servings INTEGER);
+CREATE TABLE IF NOT EXISTS ingredients (
+    dish_id INTEGER NOT NULL REFERENCES dishes(id), position INTEGER NOT NULL, name TEXT NOT NULL, raw TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS steps (
+    dish_id INTEGER NOT NULL REFERENCES dishes(id), number INTEGER NOT NULL, title TEXT, content TEXT,
+    seconds INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS step_quantities (
+    dish_id INTEGER NOT NULL REFERENCES dishes(id), step INTEGER NOT NULL, material TEXT, amount REAL,
+    unit TEXT NOT NULL);
+CREATE VIRTUAL TABLE IF NOT EXISTS dish_fts USING fts5(name, ingredients, process, tokenize='trigram');
+CREATE INDEX IF NOT EXISTS dishes_edition ON dishes(edition_id);
+CREATE INDEX IF NOT EXISTS dishes_category ON dishes(category);
+CREATE INDEX IF NOT EXISTS dishes_flavor ON dishes(flavor);
+CREATE INDEX IF NOT EXISTS dishes_cooking_method ON dishes(cooking_method);
+CREATE INDEX IF NOT EXISTS dishes_flavour_minutes ON dishes(flavour_minutes);
+CREATE INDEX IF NOT EXISTS ingredients_name ON ingredients(name, dish_id);
+CREATE INDEX IF NOT EXISTS ingredients_dish ON ingredients(dish_id);
+CREATE INDEX IF NOT EXISTS steps_dish ON steps(dish_id);
+CREATE INDEX IF NOT EXISTS step_quantities_dish ON step_quantities(dish_id);
+CREATE INDEX IF NOT EXISTS step_quantities_material ON step_quantities(material);
+"""
+FTS_MIN_QUERY = 3  # trigram分词：不少于3个字的检索词走全文索引，更短的退化为LIKE扫描
+_FLAVOUR_PATTERN = re.compile(r"(\d+(?:\.\d+)?|半)\s*(小时|分钟)")
+_FLAVOUR_IMMEDIATE = ("现做即食", "即食")
+
+def flavour_minutes(window):
+    """最佳风味期 → 分钟数，如"2.5小时"→150、"半小时"→30、"现做即食"→0；无法识别时返回None"""
+    if not window:
+        return None
+    if any(word in window for word in _FLAVOUR_IMMEDIATE):
+        return 0
+    match = _FLAVOUR_PATTERN.search(window)
+    if not match:
+        return None
+    amount = 0.5 if match.group(1) == "半" else float(match.group(1))
+    return amount * 60 if match.group(2) == "小时" else amount
+
+def dish_steps(dish):
+    """菜品的份数和结构化步骤：已有“步骤”（--structured-steps输出）直接使用，否则解析制作工艺"""
+    process = dish.get("餐厅操作工艺", {})
+    if "步骤" in process:
+        return process.get("份数"), process["步骤"]
+    import extract_table  # 步骤解析规则在extract_table中，仅在需要时导入
+    parsed = extract_table.parse_process_steps(process.get("制作工艺", ""))
+    return parsed["份数"], parsed["步骤"]
+
+def open_sqlite(path):
+    """打开（必要时创建）菜品数据库"""
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(SQLITE_SCHEMA)
+    except sqlite3.OperationalError as exc:
+        conn.close()
+        raise RuntimeError(f"当前SQLite（{sqlite3.sqlite_version}）不支持FTS5 trigram分词，需要3.34及以上版本：{exc}")
+    return conn
+
+def _delete_edition(conn, edition_id):
+    dish_ids = "SELECT id FROM dishes WHERE edition_id = ?"
+    for table in ("ingredients", "steps", "step_quantities"):
+        conn.execute(f"DELETE FROM {table} WHERE dish_id IN ({dish_ids})", (edition_id,))
+    conn.execute(f"DELETE FROM dish_fts WHERE rowid IN ({dish_ids})", (edition_id,))
+    conn.execute("DELETE FROM dishes WHERE edition_id = ?", (edition_id,))
+    conn.execute("DELETE FROM editions WHERE id = ?", (edition_id,))
+
+def write_sqlite(dishes, path, edition):
+    """把菜品写入SQLite数据库的edition版本（已存在的同名版本整体替换），单个事务内批量写入，返回写入的菜品数"""
+    conn = open_sqlite(path)
+    try:
+        with conn:
+            row = conn.execute("SELECT id FROM editions WHERE name = ?", (edition,)).fetchone()
+            if row:
+                _delete_edition(conn, row[0])
+            edition_id = conn.execute(
+                "INSERT INTO editions (name, dishes, created) VALUES (?, ?, ?)",
+                (edition, len(dishes), time.strftime("%Y-%m-%dT%H:%M:%S"))).lastrowid
+            first_id = (conn.execute("SELECT MAX(id) FROM dishes").fetchone()[0] or 0) + 1
+            dish_rows, ingredient_rows, step_rows, quantity_rows, fts_rows = [], [], [], [], []
+            for position, dish in enumerate(dishes):
+                dish_id = first_id + position
+                info = dish.get("基本信息", {})
+                process = dish.get("餐厅操作工艺", {})
+                servings, steps = dish_steps(dish)
+                dish_rows.append((dish_id, edition_id, position, info.get("品名"), info.get("味型"),
+                                  info.get("最佳风味期"), flavour_minutes(info.get("最佳风味期")), info.get("加工等级"),
+                                  process.get("烹饪方式"), dish.get("类别"), dish.get("图片"),
+                                  process.get("制作工艺"), servings))
+                tokens = []
+                for raw in info.get("配料", []):
+                    for token in ingredient_tokens(raw):
+                        ingredient_rows.append((dish_id, len(tokens), token, raw))
+                        tokens.append(token)
+                for step in steps:
+                    step_rows.append((dish_id, step["序号"], step["标题"], step["内容"],
+                                      sum(duration["秒数"] for duration in step["时长"])))
+                    quantity_rows.extend((dish_id, step["序号"], quantity["原料"], quantity["数量"], quantity["单位"])
+                                         for quantity in step["用量"])
+                fts_rows.append((dish_id, info.get("品名") or "", " ".join(tokens), process.get("制作工艺") or ""))
+            conn.executemany("INSERT INTO dishes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", dish_rows)
+            conn.executemany("INSERT INTO ingredients VALUES (?, ?, ?, ?)", ingredient_rows)
+            conn.executemany("INSERT INTO steps VALUES (?, ?, ?, ?, ?)", step_rows)
+            conn.executemany("INSERT INTO step_quantities VALUES (?, ?, ?, ?, ?)", quantity_rows)
+            conn.executemany("INSERT INTO dish_fts (rowid, name, ingredients, process) VALUES (?, ?, ?, ?)", fts_rows)
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+    return len(dishes)
+
+def _fts_phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+def query_sqlite(conn, text=None, ingredients=(), cooking_methods=(), flavor=None, category=None, edition=None,
+                 max_flavour_hours=None):
+    """组合条件查询菜品，返回[(版本, 菜品id, 品名, 类别, 烹饪方式, 最佳风味期)]（各条件取交集）
+    text：品名/配料/制作工艺全文检索；ingredients：配料检索词（须全部包含）；cooking_methods：烹饪方式（任一）
+    例：query_sqlite(conn, ingredients=["蚕豆酱"], cooking_methods=["蒸"], max_flavour_hours=3)"""
+    where, params = [], []
+    if text:
+        if len(text) >= FTS_MIN_QUERY:
+            where.append("d.id IN (SELECT rowid FROM dish_fts WHERE dish_fts MATCH ?)")
+            params.append(_fts_phrase(text))
+        else:
+            where.append("d.id IN (SELECT rowid FROM dish_fts WHERE name LIKE ? OR ingredients LIKE ? OR process LIKE ?)")
+            params.extend([f"%{text}%"] * 3)
+    for ingredient in ingredients:
+        where.append("d.id IN (SELECT dish_id FROM ingredients WHERE name = ?)")
+        params.append(ingredient)
+    if cooking_methods:
+        where.append(f"d.cooking_method IN ({', '.join('?' * len(cooking_methods))})")
+        params.extend(cooking_methods)
+    for column, value in (("d.flavor", flavor), ("d.category", category), ("e.name", edition)):
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value)
+    if max_flavour_hours is not None:
+        where.append("d.flavour_minutes <= ?")
+        params.append(max_flavour_hours * 60)
+    sql = ("SELECT e.name, d.id, d.name, d.category, d.cooking_method, d.flavour_window "
+           "FROM dishes d JOIN editions e ON e.id = d.edition_id")
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return conn.execute(sql + " ORDER BY d.id", params).fetchall()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="从提取结果生成附加输出")
+    sub = parser.add_subparsers(dest="command", required=True)
+    index = sub.add_parser("index", help="生成预构建检索索引")
+    index.add_argument("dishes", help="提取结果JSON/JSONL")
+    index.add_argument("--output", default="search_index.json")
+    shards = sub.add_parser("shards", help="按类别分片输出")
+    shards.add_argument("dishes", help="提取结果JSON/JSONL")
+    shards.add_argument("--output-dir", required=True)
+    compact = sub.add_parser("compact", help="紧凑列式编码（.json/.msgpack，可加.gz/.br压缩）")
+    compact.add_argument("dishes", help="提取结果JSON/JSONL")
+    compact.add_argument("--output", help="输出路径，编码由扩展名决定，如catalogue.msgpack.br")
+    compact.add_argument("--report", nargs="?", const="-", metavar="REPORT_JSON",
+                         help="对比当前格式与各紧凑编码的体积和解析耗时（可写入JSON报告）")
+    sqlite = sub.add_parser("sqlite", help="写入SQLite数据库（菜品/配料/步骤表+FTS5全文索引）")
+    sqlite.add_argument("dishes", help="提取结果JSON/JSONL")
+    sqlite.add_argument("--output", default="dishes.sqlite", help="数据库路径（默认%(default)s）")
+    sqlite.add_argument("--edition", help="版本名（同名版本整体替换，默认为结果文件名）")
+    query = sub.add_parser("query", help="在SQLite数据库中查询菜品")
+    query.add_argument("db", help="数据库路径")
+    query.add_argument("--text", help="品名/配料/制作工艺全文检索")
+    query.add_argument("--ingredient", action="append", default=[], help="配料（可重复，须全部包含）")
+    query.add_argument("--cooking-method", action="append", default=[], help="烹饪方式（可重复，任一即可）")
+    query.add_argument("--flavor", help="味型")
+    query.add_argument("--category", help="类别")
+    query.add_argument("--edition", help="版本名")
+    query.add_argument("--max-flavour-hours", type=float, help="最佳风味期不超过该小时数")
+    args = parser.parse_args(argv)
+
+    if args.command == "query":
+        with contextlib.closing(sqlite3.connect(args.db)) as conn:
+            started = time.perf_counter()
+            rows = query_sqlite(conn, args.text, args.ingredient, args.cooking_method, args.flavor, args.category,
+                                args.edition, args.max_flavour_hours)
+            elapsed = (time.perf_counter() - started) * 1000
+        for edition, dish_id, name, category, cooking_method, window in rows:
+            print(f"[{edition}] #{dish_id} {name}（{category}，{cooking_method}，风味期{window}）")
+        print(f"共{len(rows)}道菜品（查询耗时{elapsed:.2f}ms）")
+        return
+
+    dishes = load_dishes(args.dishes)
+    if args.command == "index":
+        built = write_search_index(dishes, args.output)
+        print(f"检索索引：{args.output}（{built['count']}道菜品，"
+              f"{sum(len(v) for v in built['fields'].values())}个检索词，{len(built['name_ngrams'])}个品名n-gram）")
+    elif args.command == "shards":
+        import extract_table  # 类别→分片名取自extract_table的PAGE_TO_CATEGORY
+        manifest = write_category_shards(dishes, args.output_dir, extract_table.category_shard_names())
+        print_shard_summary(manifest, args.output_dir)
+    elif args.command == "compact":
+        if args.output:
+            size = write_compact(dishes, args.output)
+            print(f"紧凑编码：{args.output}（{size}字节）")
+        if args.report:
+            rows = compare_encodings(dishes)
+            print_encoding_report(rows)
+            if args.report != "-":
+                with open(args.report, "w", encoding="utf-8") as f:
+                    json.dump(rows, f, ensure_ascii=False, indent=2)
+    elif args.command == "sqlite":
+        edition = args.edition or os.path.splitext(os.path.basename(args.dishes))[0]
+        count = write_sqlite(dishes, args.output, edition)
+        print(f"SQLite数据库：{args.output}（版本{edition}，{count}道菜品）")
+
+if __name__ == "__main__":
+    main()
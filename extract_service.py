@@ -0,0 +1,441 @@
+"""本地菜品提取服务：上传PDF排队提取，进程池执行，通过SSE推送逐页进度和菜品结果（纯标准库，可离线运行）
+
+用法示例：
+    python extract_service.py --port 8765 --workers 2
+    curl --data-binary @老乡鸡.pdf "http://127.0.0.1:8765/jobs?start_page=14&end_page=210"
+    curl -N http://127.0.0.1:8765/jobs/<job_id>/events          # SSE：progress / dish / done / error 事件
+    curl http://127.0.0.1:8765/jobs/<job_id>/result
+
+接口：
+    POST /jobs                 请求体为PDF原始字节；查询参数start_page、end_page、page_to_category（JSON）、
+                               default_category（JSON）、watermark_filter（1/0）、structured_steps（1/0）、
+                               prescan（1/0）
+                               同一PDF哈希+配置已有结果时直接返回缓存结果，正在提取时返回同一任务
+    GET  /jobs/<id>            任务状态
+    GET  /jobs/<id>/events     SSE事件流（先重放已发生的事件，再实时推送）
+    GET  /jobs/<id>/result     提取结果（菜品JSON数组，任务完成后可用）
+    GET  /health（/status）    服务状态（排队数、运行数、保留/已淘汰的已结束任务数）
+已结束的任务最多保留MAX_FINISHED_JOBS个、FINISHED_JOB_TTL秒，之后查询其id返回404（重新提交会命中结果缓存）
+"""
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import parse_qs, urlsplit
+
+import extract_table
+
+HOST = "127.0.0.1"
+PORT = 8765
+WORKERS = 2  # 同时运行的提取任务数（进程池大小）
+MAX_QUEUED_JOBS = 32  # 排队上限，超过时拒绝新任务（503）
+MAX_FINISHED_JOBS = 256  # 内存中保留的已结束任务数上限（超出时淘汰最早结束的任务，结果缓存仍在磁盘上）
+FINISHED_JOB_TTL = 3600  # 已结束任务在内存中保留的最长秒数
+MAX_UPLOAD_MB = 200
+DATA_DIR = ".extract_service"  # 上传的PDF（按哈希命名）和结果缓存所在目录
+EVENT_DRAIN_TIMEOUT = 5  # 任务结束后等待其剩余事件送达的最长秒数（工作进程异常退出时不会再有事件）
+FORWARDED = "_forwarded"  # 工作进程事件流的结束标记
+
+STATUS_TEXT = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+# ---------------------- 任务配置与缓存键 ----------------------
+def parse_job_config(query):
+    """查询参数 → 提取配置（未指定的项使用extract_table的模块配置）"""
+    params = {key: values[-1] for key, values in parse_qs(query).items()}
+    flags = ("watermark_filter", "structured_steps", "prescan")
+    unknown = set(params) - {"start_page", "end_page", "page_to_category", "default_category", *flags}
+    if unknown:
+        raise ValueError(f"未知参数{sorted(unknown)}")
+    page_to_category = json.loads(params["page_to_category"]) if "page_to_category" in params else None
+    default_category = json.loads(params["default_category"]) if "default_category" in params else None
+    if page_to_category is not None and not (
+            isinstance(page_to_category, list) and all(_is_category_range(item) for item in page_to_category)):
+        raise ValueError("page_to_category应为[[起始页, 结束页, 类别, 英文类别], ...]")
+    if default_category is not None and not (
+            isinstance(default_category, list) and len(default_category) == 2
+            and all(isinstance(name, str) for name in default_category)):
+        raise ValueError("default_category应为[类别, 英文类别]")
+    return {
+        "start_page": int(params.get("start_page", extract_table.START_PAGE)),
+        "end_page": int(params["end_page"]) if params.get("end_page") else extract_table.END_PAGE,
+        "page_to_category": [list(item) for item in (page_to_category or extract_table.PAGE_TO_CATEGORY)],
+        "default_category": list(default_category) if default_category else None,
+        **{flag: params.get(flag, "0") in ("1", "true", "yes") for flag in flags},
+    }
+
+def _is_category_range(item):
+    return isinstance(item, list) and len(item) == 4 \
+        and all(isinstance(page, int) and not isinstance(page, bool) for page in item[:2]) \
+        and all(isinstance(name, str) for name in item[2:])
+
+def result_key(pdf_hash, config):
+    """结果缓存键：PDF内容哈希+提取配置+清洗规则指纹（规则变化后旧结果自动失效）"""
+    payload = json.dumps([pdf_hash, config, extract_table.cleaning_rules_key()], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+# ---------------------- 工作进程 ----------------------
+def run_extraction_job(job_id, pdf_path, config, events):
+    """在工作进程中提取一个PDF，逐页/逐道菜把事件放入events队列，返回菜品列表"""
+    def on_page(page_num, pages_done, total_pages):
+        events.put((job_id, "progress", {"page": page_num, "pages_done": pages_done, "total_pages": total_pages}))
+
+    dishes = []
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for dish in extract_table.iter_dishes(
+                    pdf_path, config["start_page"], config["end_page"],
+                    [tuple(item) for item in config["page_to_category"]],
+                    tuple(config["default_category"]) if config["default_category"] else None,
+                    watermark_filter=config["watermark_filter"], structured_steps=config["structured_steps"],
+                    prescan=config["prescan"], on_page=on_page):
+                dishes.append(dish)
+                events.put((job_id, "dish", dish))
+    finally:
+        events.put((job_id, FORWARDED, None))  # 本任务的事件到此为止
+    return dishes
+
+# ---------------------- 任务状态 ----------------------
+class Job:
+    """一个提取任务：记录全部事件（供SSE订阅者重放）并通知等待中的订阅者"""
+
+    def __init__(self, job_id, key, pdf_path, config):
+        self.id = job_id
+        self.key = key
+        self.pdf_path = pdf_path
+        self.config = config
+        self.status = "queued"
+        self.created = time.time()
+        self.finished = None
+        self.events = []
+        self.result = None
+        self.error = None
+        self.cached = False
+        self.changed = asyncio.Event()
+        self.forwarded = asyncio.Event()  # 工作进程的事件已全部送达
+
+    def emit(self, event, data):
+        self.events.append((event, data))
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def summary(self):
+        progress = next((data for event, data in reversed(self.events) if event == "progress"), None)
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "cached": self.cached,
+            "config": self.config,
+            "progress": progress,
+            "dishes": sum(1 for event, _ in self.events if event == "dish"),
+            "error": self.error,
+            "seconds": round((self.finished or time.time()) - self.created, 2),
+        }
+
+    async def iter_events(self):
+        """先重放已有事件，再等待新事件，直到任务结束"""
+        sent = 0
+        while True:
+            waiter = self.changed
+            while sent < len(self.events):
+                yield self.events[sent]
+                sent += 1
+            if self.status in ("done", "failed"):
+                return
+            await waiter.wait()
+
+class ExtractionService:
+    """任务排队、进程池调度和结果缓存"""
+
+    def __init__(self, workers=WORKERS, data_dir=DATA_DIR, max_queued=MAX_QUEUED_JOBS,
+                 max_finished=MAX_FINISHED_JOBS, finished_ttl=FINISHED_JOB_TTL):
+        self.workers = workers
+        self.upload_dir = os.path.join(data_dir, "uploads")
+        self.result_dir = os.path.join(data_dir, "results")
+        os.makedirs(self.upload_dir, exist_ok=True)
+        os.makedirs(self.result_dir, exist_ok=True)
+        self.jobs = {}
+        self.active = {}  # 缓存键 → 排队/运行中的任务（相同请求复用）
+        self.finished = OrderedDict()  # 已结束的任务id → 任务（按结束先后），超出数量或时间上限时淘汰
+        self.max_finished = max_finished
+        self.finished_ttl = finished_ttl
+        self.evicted = 0
+        self.queue = asyncio.Queue(maxsize=max_queued)
+        self.running = 0
+        self.manager = multiprocessing.Manager()
+        self.events = self.manager.Queue()
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        threading.Thread(target=self._forward_events, daemon=True).start()
+        self.runners = [asyncio.create_task(self._runner()) for _ in range(self.workers)]
+
+    def close(self):
+        self.events.put(None)
+        self.executor.shutdown(cancel_futures=True)
+        self.manager.shutdown()
+
+    def _forward_events(self):
+        """后台线程：把工作进程的事件转交给事件循环"""
+        while True:
+            item = self.events.get()
+            if item is None:
+                return
+            job_id, event, data = item
+            self.loop.call_soon_threadsafe(self._emit, job_id, event, data)
+
+    def _emit(self, job_id, event, data):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        if event == FORWARDED:
+            job.forwarded.set()
+        elif job.status == "running":
+            job.emit(event, data)
+
+    def submit(self, pdf_bytes, config):
+        """新任务入队；返回(任务, 是否新建)。缓存命中或相同任务进行中时直接返回已有任务"""
+        pdf_hash = hashlib.sha256(pdf_bytes).hexdigest()
+        key = result_key(pdf_hash, config)
+        if key in self.active:
+            return self.active[key], False
+        job = Job(uuid.uuid4().hex, key, os.path.join(self.upload_dir, f"{pdf_hash}.pdf"), config)
+        self.jobs[job.id] = job
+        cached = self._retained_result(key)
+        if cached is None:
+            cached = self._load_result(key)
+        if cached is not None:
+            job.cached = True
+            job.status = "running"
+            for dish in cached:
+                job.emit("dish", dish)
+            self._finish(job, cached)
+            return job, True
+        if self.queue.full():
+            del self.jobs[job.id]
+            raise OverflowError(f"排队任务已达上限{self.queue.maxsize}")
+        if not os.path.exists(job.pdf_path):
+            with open(job.pdf_path + ".part", "wb") as f:
+                f.write(pdf_bytes)
+            os.replace(job.pdf_path + ".part", job.pdf_path)
+        self.active[key] = job
+        self.queue.put_nowait(job)
+        return job, True
+
+    async def _runner(self):
+        while True:
+            job = await self.queue.get()
+            job.status = "running"
+            self.running += 1
+            executor = self.executor
+            try:
+                dishes = await self.loop.run_in_executor(
+                    executor, run_extraction_job, job.id, job.pdf_path, job.config, self.events)
+            except BrokenProcessPool as exc:
+                # 工作进程异常退出后进程池不可再用：换一个新进程池，后续任务不受影响
+                dishes = None
+                error = f"工作进程异常退出：{exc}"
+                if self.executor is executor:
+                    self.executor = ProcessPoolExecutor(max_workers=self.workers)
+                    executor.shutdown(wait=False, cancel_futures=True)
+            except Exception as exc:
+                dishes = None
+                error = f"{type(exc).__name__}: {exc}"
+            # 工作进程的事件经后台线程转交，等已发出的事件全部送达后再结束任务
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(job.forwarded.wait(), EVENT_DRAIN_TIMEOUT)
+            self.running -= 1
+            self.active.pop(job.key, None)
+            if dishes is None:
+                job.error = error
+                job.status = "failed"
+                job.finished = time.time()
+                job.emit("error", {"error": error})
+                self._retire(job)
+            else:
+                self._save_result(job.key, dishes)
+                self._finish(job, dishes)
+
+    def _finish(self, job, dishes):
+        job.result = dishes
+        job.status = "done"
+        job.finished = time.time()
+        job.emit("done", {"dishes": len(dishes), "cached": job.cached})
+        self._retire(job)
+
+    def _retire(self, job):
+        """任务结束：记入已结束任务，并淘汰超出数量或保留时间的旧任务（进行中的任务不淘汰）"""
+        self.finished[job.id] = job
+        self.evict_finished()
+
+    def evict_finished(self):
+        deadline = time.time() - self.finished_ttl
+        while self.finished:
+            job_id, job = next(iter(self.finished.items()))
+            if len(self.finished) <= self.max_finished and job.finished >= deadline:
+                break
+            del self.finished[job_id]
+            self.jobs.pop(job_id, None)
+            self.evicted += 1
+
+    def _retained_result(self, key):
+        """内存中仍保留的同一缓存键的已完成结果（重复提交时共用，不再读一份副本）"""
+        for job in reversed(self.finished.values()):
+            if job.key == key and job.status == "done":
+                return job.result
+        return None
+
+    def _result_path(self, key):
+        return os.path.join(self.result_dir, f"{key}.json")
+
+    def _load_result(self, key):
+        path = self._result_path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_result(self, key, dishes):
+        path = self._result_path(key)
+        with open(path + ".part", "w", encoding="utf-8") as f:
+            json.dump(dishes, f, ensure_ascii=False)
+        os.replace(path + ".part", path)
+
+    def health(self):
+        self.evict_finished()
+        return {"status": "ok", "workers": self.workers, "queued": self.queue.qsize(), "running": self.running,
+                "jobs": len(self.jobs), "finished": len(self.finished), "evicted": self.evicted}
+
+# ---------------------- HTTP ----------------------
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+async def read_request(reader, max_body):
+    """读取一个HTTP/1.1请求，返回(方法, 路径, 查询串, 请求体)"""
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    if not request_line:
+        raise ConnectionResetError
+    try:
+        method, target, _ = request_line.split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "请求行格式错误")
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1")
+        if line in ("\r\n", "\n", ""):
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise HttpError(400, "Content-Length格式错误")
+    if length > max_body:
+        raise HttpError(413, f"上传文件超过{max_body // 2**20}MB")
+    body = await reader.readexactly(length) if length else b""
+    url = urlsplit(target)
+    return method.upper(), url.path, url.query, body
+
+async def send_response(writer, status, payload=None, content_type="application/json; charset=utf-8", extra=()):
+    body = b"" if payload is None else (
+        payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+    head = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}", f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}", "Connection: close", *extra]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("utf-8") + body)
+    await writer.drain()
+
+async def stream_events(writer, job):
+    """SSE：每个事件一条"event: 类型 / data: JSON"消息，任务结束后关闭连接"""
+    head = ["HTTP/1.1 200 OK", "Content-Type: text/event-stream; charset=utf-8", "Cache-Control: no-cache",
+            "Connection: close"]
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("utf-8"))
+    async for event, data in job.iter_events():
+        writer.write(f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8"))
+        await writer.drain()
+
+def make_handler(service, max_body):
+    async def handle(reader, writer):
+        try:
+            method, path, query, body = await read_request(reader, max_body)
+            parts = [part for part in path.split("/") if part]
+            if parts in (["health"], ["status"]):
+                await send_response(writer, 200, service.health())
+            elif parts == ["jobs"]:
+                if method != "POST":
+                    raise HttpError(405, "请使用POST上传PDF")
+                if not body.startswith(b"%PDF"):
+                    raise HttpError(400, "请求体不是PDF文件")
+                try:
+                    config = parse_job_config(query)
+                except ValueError as exc:
+                    raise HttpError(400, f"参数错误：{exc}")
+                try:
+                    job, _ = service.submit(body, config)
+                except OverflowError as exc:
+                    raise HttpError(503, str(exc))
+                await send_response(writer, 200 if job.status == "done" else 202, job.summary(),
+                                    extra=[f"Location: /jobs/{job.id}"])
+            elif len(parts) >= 2 and parts[0] == "jobs":
+                service.evict_finished()
+                job = service.jobs.get(parts[1])
+                if job is None:
+                    raise HttpError(404, f"任务{parts[1]}不存在")
+                if len(parts) == 2:
+                    await send_response(writer, 200, job.summary())
+                elif parts[2:] == ["events"]:
+                    await stream_events(writer, job)
+                elif parts[2:] == ["result"]:
+                    if job.status != "done":
+                        raise HttpError(409, f"任务状态为{job.status}，结果尚不可用")
+                    await send_response(writer, 200, job.result)
+                else:
+                    raise HttpError(404, "接口不存在")
+            else:
+                raise HttpError(404, "接口不存在")
+        except HttpError as exc:
+            await send_response(writer, exc.status, {"error": str(exc)})
+        except (ConnectionResetError, asyncio.IncompleteReadError, BrokenPipeError):
+            pass
+        except Exception as exc:  # 未预料的错误也要给出响应，不能直接断开连接
+            print(f"[{time.strftime('%H:%M:%S')}] 处理请求出错：{type(exc).__name__}: {exc}")
+            with contextlib.suppress(Exception):
+                await send_response(writer, 500, {"error": f"服务内部错误：{type(exc).__name__}"})
+        finally:
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+    return handle
+
+async def serve(host=HOST, port=PORT, workers=WORKERS, data_dir=DATA_DIR, max_upload_mb=MAX_UPLOAD_MB):
+    service = ExtractionService(workers, data_dir)
+    await service.start()
+    server = await asyncio.start_server(make_handler(service, int(max_upload_mb * 2**20)), host, port)
+    print(f"提取服务已启动：http://{host}:{port}（{workers}个工作进程，数据目录{data_dir}）")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地菜品提取服务（上传PDF、SSE进度推送、结果缓存）")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="同时运行的提取任务数（默认%(default)s）")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="上传文件与结果缓存目录（默认%(default)s）")
+    parser.add_argument("--max-upload-mb", type=float, default=MAX_UPLOAD_MB)
+    args = parser.parse_args()
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(serve(args.host, args.port, args.workers, args.data_dir, args.max_upload_mb))
@@ -1,22 +1,63 @@
 import pdfplumber
+import argparse
+import array
 import json
+import gc
+import multiprocessing
+import os
 import re
-from collections import defaultdict
-import jieba
+import resource
+import time
+import hashlib
+import sqlite3
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+from pdfminer.pdftypes import PDFObjRef, PDFStream, resolve1
+
+import extract_outputs
 
 # ---------------------- 配置参数（重点修改这里！）----------------------
 PDF_PATH = "老乡鸡.pdf"  # 你的PDF文件路径
 OUTPUT_JSON = "dish_info_category_page_img_exp5.json"  # 输出JSON路径
+OUTPUT_JSONL = "dish_info_category_page_img_exp5.jsonl"  # --jsonl流式输出路径
 WATERMARK_CHARS = {"告", "报", "源", "溯", "品", "鸡", "乡", "老", "菜", "验", "证", "合", "格"}  # 水印碎字
 COMMON_FIELDS = {
     "基本信息", "品名", "味型", "最佳风味期", "加工等级", "配料",
     "原料来源", "原料加工", "原料配送", "配送方式", "配送周期",
     "餐厅操作工艺", "烹饪方式", "制作工艺", "操作工艺"
 }
+FIELD_SYNONYMS = {}  # 字段名的其他写法 → 标准字段名（如{"工艺流程": "制作工艺"}），与COMMON_FIELDS一起编入字段名匹配器
 SINGLE_CHAR_WHITELIST = {"炒", "蒸", "煮", "炸", "烤", "炖", "焖", "烩", "拌", "卤", "腌", "煎", "焗",
                          "咸", "鲜", "甜", "辣", "酸", "麻", "淡", "冷", "热"}  # 单字有效值
+# 按字段上下文的清洗策略（见CellCleaner），未列出的字段使用默认策略
+CLEAN_PROFILES = {
+    "配料": {"protect_watermark": True},  # 配料/品名：保留水印字（"鸡"、"老"、"菜"在食材名称中很常见）
+    "烹饪方式": {"single_char_passthrough": True, "strip_edge_watermark": True},
+    "味型": {"single_char_passthrough": True},
+}
+CULINARY_TERMS = {"鸡蛋", "鸡油", "鸡汤", "鸡汁", "鸡精", "鸡块", "鸡腿", "土鸡", "老鸡", "母鸡", "老抽",
+                  "菜籽油", "娃娃菜", "老鸡汤", "蒸柜", "蒸制", "品质"}  # 餐饮术语（补充jieba词典，用于有效词判断）
+TOKENIZER_DICT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jieba_culinary.dict")  # 预构建的分词词典（jieba核心词典+餐饮术语，位于本模块目录），不存在或过期时自动构建；None表示直接用jieba默认词典
 START_PAGE = 14  # 起始页码（从1开始）
 END_PAGE = 210    # 结束页码（可设为None表示读取到最后一页）
+WORKERS = 1  # 并行提取的进程数（1表示串行）
+CACHE_PATH = None  # 页面缓存数据库路径（如".extract_cache.sqlite"，None表示不启用缓存）
+LOW_MEMORY = False  # 是否逐页释放解析缓存（超大PDF使用）
+MEMORY_LIMIT_MB = None  # 常驻内存上限（MB），超限时清空解析缓存/重新打开PDF；None表示不限制
+PAGE_TIME_BUDGET = None  # 单页表格提取的时间预算（秒）：设置后每页在看门狗工作进程中提取，超出预算的页降级重试或跳过；None表示不启用
+PAGE_MEMORY_BUDGET_MB = None  # 单页表格提取的内存预算（MB，工作进程在提取前占用之外可再分配的地址空间），超出同样降级重试或跳过
+DEGRADED_TABLE_SETTINGS = {"edge_min_length_prefilter": 10, "edge_min_length": 10}  # 降级重试用的低成本表格设置：提前丢弃短于10pt的矢量碎线
+DEGRADED_TIME_FACTOR = 2  # 降级重试的时间预算为单页预算的倍数（重试在新的工作进程中进行，需要重新解析页面）
+WATERMARK_FILTER = False  # 是否在表格提取前按字符属性（字号/旋转/字体）去掉水印字，跳过基于分词的水印清洗
+WATERMARK_MIN_SIZE = 30  # 字号不小于该值的字符视为水印（正文约9-12pt，水印约76pt）
+WATERMARK_FONTS = ()  # 视为水印的字体名（子集前缀"ABCDEF+"之后的部分），如("STSong",)
+STRUCTURED_STEPS = False  # 是否在“餐厅操作工艺”中额外输出结构化的份数/步骤（用量、时长），见parse_process_steps
+PRESCAN = False  # 是否在完整提取前预扫描各页内容流（只统计表格线/文字/图片操作符），跳过不可能含菜品表格的页
+PRESCAN_MIN_RULINGS = 12  # 表格线（线段数+矩形数×4）少于该值的页视为无表格页（菜品表格页约20~30条，续写的工艺页约6条）
+PRESCAN_DIVIDER_MAX_TEXT = 60  # 无表格线、无图片且文字绘制操作符不超过该值的页视为分节页（用于建议PAGE_TO_CATEGORY的页码范围）
+CLEAN_RULES_VERSION = 3  # 清洗规则版本号：修改清洗函数逻辑后请递增，使清洗层缓存失效
 
 # 核心配置：页码范围→类别映射（按需修改！）
 # 格式：[(起始页, 结束页, 类别名称), ...]，范围包含边界，未匹配到的页码默认"其他类"
@@ -28,443 +69,1170 @@ PAGE_TO_CATEGORY = [
     (208, 210, "饮品", "beverage")
 ]
 DEFAULT_CATEGORY = "其他"  # 未匹配到页码范围时的默认类别
+DEFAULT_CATEGORY_ENG = "other"  # 默认类别的英文名（用于图片路径）
 # -------------------------------------------------------------------
 
-def get_category_by_page(page_num):
-    """根据当前页码获取对应类别（核心函数）"""
-    for start, end, category, category_eng in PAGE_TO_CATEGORY:
+# ---------------------- 运行剖析（按阶段/按页计时与计数，--profile启用）----------------------
+PROFILE_STAGES = ("open", "prescan", "extract", "clean", "merge", "parse", "categorize", "write", "images")
+
+class RunProfiler:
+    """记录各阶段耗时/调用次数、每页各阶段耗时以及计数器（jieba调用、缓存命中等）
+    并行提取时各工作进程分别记录，结束后合并到主进程（阶段耗时为各进程耗时之和）"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = defaultdict(lambda: {"seconds": 0.0, "calls": 0})
+        self.pages = defaultdict(lambda: defaultdict(float))
+        self.counters = defaultdict(int)
+        self.degraded = []  # 超出单页预算的页（见PageWatchdog）
+        self._lcut_info = cached_lcut.cache_info()
+
+    @contextmanager
+    def stage(self, name, page=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stats = self.stages[name]
+            stats["seconds"] += elapsed
+            stats["calls"] += 1
+            if page is not None:
+                self.pages[page][name] += elapsed
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def add_degraded(self, entry):
+        self.degraded.append(entry)
+
+    def snapshot(self):
+        """导出可序列化的统计数据（工作进程返回给主进程）"""
+        info = cached_lcut.cache_info()
+        counters = dict(self.counters)
+        counters["lcut_cache_hits"] = counters.get("lcut_cache_hits", 0) + info.hits - self._lcut_info.hits
+        return {
+            "stages": {name: dict(stats) for name, stats in self.stages.items()},
+            "pages": {page: dict(stages) for page, stages in self.pages.items()},
+            "counters": counters,
+            "degraded": list(self.degraded),
+        }
+
+    def merge(self, snapshot):
+        for name, stats in snapshot["stages"].items():
+            self.stages[name]["seconds"] += stats["seconds"]
+            self.stages[name]["calls"] += stats["calls"]
+        for page, stages in snapshot["pages"].items():
+            for name, seconds in stages.items():
+                self.pages[int(page)][name] += seconds
+        for name, n in snapshot["counters"].items():
+            self.counters[name] += n
+        self.degraded.extend(snapshot.get("degraded", ()))
+
+    def report(self, top_n=10):
+        """生成JSON报告：总耗时、各阶段统计、计数器、每页明细和最慢的top_n页"""
+        snapshot = self.snapshot()
+        page_totals = sorted(((sum(stages.values()), page) for page, stages in snapshot["pages"].items()),
+                             reverse=True)
+        return {
+            "wall_seconds": round(time.perf_counter() - self.started, 4),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "stages": {name: {"seconds": round(stats["seconds"], 4), "calls": stats["calls"]}
+                       for name, stats in sorted(snapshot["stages"].items(),
+                                                 key=lambda item: -item[1]["seconds"])},
+            "counters": dict(sorted(snapshot["counters"].items())),
+            "degraded_pages": sorted(snapshot["degraded"], key=lambda entry: entry["page"]),
+            "slowest_pages": [{"page": page, "seconds": round(total, 4),
+                               "stages": {k: round(v, 4) for k, v in snapshot["pages"][page].items()}}
+                              for total, page in page_totals[:top_n]],
+            "pages": {page: {k: round(v, 4) for k, v in stages.items()}
+                      for page, stages in sorted(snapshot["pages"].items())},
+        }
+
+    def print_summary(self, top_n=10):
+        report = self.report(top_n)
+        print(f"\n剖析结果（总耗时{report['wall_seconds']}秒，峰值内存{report['peak_rss_mb']}MB）：")
+        for name, stats in report["stages"].items():
+            print(f"  {name:<12}{stats['seconds']:>10.3f}秒  {stats['calls']:>7}次")
+        for name, n in report["counters"].items():
+            print(f"  {name:<24}{n:>8}")
+        print(f"最慢的{len(report['slowest_pages'])}页：")
+        for item in report["slowest_pages"]:
+            detail = "，".join(f"{k} {v:.3f}秒" for k, v in item["stages"].items())
+            print(f"  第{item['page']}页：{item['seconds']:.3f}秒（{detail}）")
+        if report["degraded_pages"]:
+            print(f"超出单页预算的{len(report['degraded_pages'])}页：")
+            for entry in report["degraded_pages"]:
+                print(f"  {describe_degraded(entry)}")
+
+_profiler = None
+_NULL_STAGE = nullcontext()
+
+@contextmanager
+def profile_run():
+    """在with块内启用剖析：with profile_run() as profiler: ...; profiler.report()"""
+    global _profiler
+    previous = _profiler
+    _profiler = RunProfiler()
+    try:
+        yield _profiler
+    finally:
+        _profiler = previous
+
+def profile_stage(name, page=None):
+    """剖析启用时返回计时上下文，否则返回空上下文（几乎无开销）"""
+    return _profiler.stage(name, page) if _profiler is not None else _NULL_STAGE
+
+def profile_count(name, n=1):
+    if _profiler is not None:
+        _profiler.count(name, n)
+
+def profile_degraded(entry):
+    if _profiler is not None:
+        _profiler.add_degraded(entry)
+
+def get_category_by_page(page_num, page_to_category=None, default_category=None):
+    """根据当前页码获取对应类别（核心函数），返回(类别, 英文类别)
+    page_to_category/default_category不指定时使用模块配置PAGE_TO_CATEGORY/DEFAULT_CATEGORY"""
+    for start, end, category, category_eng in (PAGE_TO_CATEGORY if page_to_category is None else page_to_category):
         if start <= page_num <= end:
             return (category,category_eng)
-    return DEFAULT_CATEGORY
+    return default_category or (DEFAULT_CATEGORY, DEFAULT_CATEGORY_ENG)
+
+def category_shard_names(page_to_category=None, default_category=None):
+    """类别→英文类别（分片输出的分片名），如{"正餐菜品": "main"}"""
+    names = {category: category_eng
+             for _, _, category, category_eng in (PAGE_TO_CATEGORY if page_to_category is None else page_to_category)}
+    category, category_eng = default_category or (DEFAULT_CATEGORY, DEFAULT_CATEGORY_ENG)
+    names.setdefault(category, category_eng)
+    return names
+
+# ---------------------- 分词器（延迟加载+预构建词典）----------------------
+TOKENIZER_DICT_FORMAT = 3
+_tokenizer = None
+_tokenizer_lexicon = None  # 预构建词典中词频>0的2~3字词（加载词典时一并得到，无需再遍历词频表；不含餐饮术语）
+
+def tokenizer_vocabulary():
+    """预构建词典收录的固定词汇（餐饮术语）及其指纹；词典只由jieba核心词典和这份代码内的词汇生成，
+    不读取以往的提取结果，提取结果不随工作目录或历史运行变化"""
+    import jieba
+    vocabulary = sorted(CULINARY_TERMS)
+    payload = json.dumps([jieba.__version__, vocabulary], ensure_ascii=False)
+    return vocabulary, hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+def build_tokenizer_dict(path=None):
+    """把jieba核心词典与餐饮术语合并后序列化到path（默认TOKENIZER_DICT_PATH），返回文件头
+    餐饮术语以词频0写入，分词结果与jieba默认词典完全一致；文件中的有效词只含词频>0的词，
+    餐饮术语在get_word_lexicon中按当前CULINARY_TERMS加入（监视模式删除术语后立即生效）
+    格式：一行JSON文件头 + 换行分隔的词（有效词在前） + 对应词频（int64数组），
+    加载时只需一次split和zip，比jieba自带的marshal缓存快数倍"""
+    import jieba  # 只在需要分词的路径上导入（导入本身约0.2秒）
+    path = path or TOKENIZER_DICT_PATH
+    tokenizer = jieba.Tokenizer()
+    tokenizer.initialize()
+    freq = dict(tokenizer.FREQ)
+    vocabulary, vocabulary_key = tokenizer_vocabulary()
+    added = [word for word in vocabulary if not freq.get(word)]
+    for word in added:
+        freq[word] = 0  # 词频为0的词条不进入分词的有向无环图（与jieba的前缀词条相同）
+    lexicon = [word for word, count in freq.items() if count > 0 and 2 <= len(word) <= 3]
+    lexicon_set = set(lexicon)
+    words = lexicon + [word for word in freq if word not in lexicon_set]
+    keys = "\n".join(words).encode("utf-8")
+    freqs = array.array("q", (freq[word] for word in words)).tobytes()
+    header = {
+        "format": TOKENIZER_DICT_FORMAT,
+        "vocabulary_key": vocabulary_key,
+        "total": tokenizer.total,
+        "words": len(words),
+        "lexicon": len(lexicon),
+        "vocabulary": len(vocabulary),
+        "added": len(added),
+        "keys_bytes": len(keys),
+        "checksum": hashlib.sha256(keys + freqs).hexdigest()[:16],
+    }
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(json.dumps(header, ensure_ascii=False).encode("utf-8") + b"\n")
+        f.write(keys)
+        f.write(freqs)
+    os.replace(tmp_path, path)  # 多个工作进程同时构建时也不会读到写了一半的文件
+    return header
+
+def read_tokenizer_dict_header(path=None):
+    """只读取预构建词典的文件头（不存在或格式不符时返回None）"""
+    path = path or TOKENIZER_DICT_PATH
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        header = json.loads(f.readline())
+    return header if header.get("format") == TOKENIZER_DICT_FORMAT else None
+
+def load_tokenizer_dict(path=None):
+    """读取预构建词典，返回(文件头, 词频表, 词频>0的2~3字词集合)"""
+    path = path or TOKENIZER_DICT_PATH
+    with open(path, "rb") as f:
+        header = json.loads(f.readline())
+        words = f.read(header["keys_bytes"]).decode("utf-8").split("\n")
+        freqs = array.array("q")
+        freqs.frombytes(f.read())
+    if header.get("format") != TOKENIZER_DICT_FORMAT or len(words) != len(freqs):
+        raise ValueError(f"分词词典{path}格式不符，请删除后重新构建")
+    return header, dict(zip(words, freqs)), frozenset(words[:header["lexicon"]])
+
+def tokenizer_key():
+    """分词词典指纹（计入清洗规则指纹）：预构建词典的校验和，未使用预构建词典时为"jieba" """
+    header = read_tokenizer_dict_header()
+    return header["checksum"] if header else "jieba"
+
+def ensure_tokenizer():
+    """返回已加载词典的分词器，首次调用时才导入jieba并加载（单独计入剖析的jieba_init阶段）
+    配置了TOKENIZER_DICT_PATH时加载预构建词典（不存在或词汇已变化则先构建），否则使用jieba默认词典"""
+    global _tokenizer, _tokenizer_lexicon
+    if _tokenizer is None:
+        with profile_stage("jieba_init"):
+            import jieba
+            if not TOKENIZER_DICT_PATH:
+                jieba.initialize()
+                _tokenizer = jieba.dt
+                return _tokenizer
+            header = read_tokenizer_dict_header()
+            if header is None or header.get("vocabulary_key") != tokenizer_vocabulary()[1]:
+                try:
+                    header = build_tokenizer_dict()
+                except OSError as e:  # 模块目录不可写：退回jieba默认词典（分词结果相同，只是加载较慢）
+                    print(f"⚠️  无法写入分词词典{TOKENIZER_DICT_PATH}（{e}），改用jieba默认词典")
+                    jieba.initialize()
+                    _tokenizer = jieba.dt
+                    return _tokenizer
+                print(f"已构建分词词典：{TOKENIZER_DICT_PATH}（{header['words']}个词条，新增餐饮术语{header['added']}个）")
+            header, freq, _tokenizer_lexicon = load_tokenizer_dict()
+            tokenizer = jieba.Tokenizer()
+            tokenizer.FREQ, tokenizer.total = freq, header["total"]
+            tokenizer.initialized = True
+            _tokenizer = tokenizer
+    return _tokenizer
+
+_word_lexicon = None
+
+def get_word_lexicon():
+    """有效词表（首次调用时构建）：词典中词频>0的2~3字词+餐饮术语
+    is_valid_word只检查水印字与前后字组成的2~3字短语，因此只收录这个长度范围的词"""
+    global _word_lexicon
+    if _word_lexicon is None:
+        tokenizer = ensure_tokenizer()
+        if _tokenizer_lexicon is not None:
+            _word_lexicon = _tokenizer_lexicon | CULINARY_TERMS
+        else:
+            lexicon = {word for word, freq in tokenizer.FREQ.items() if freq > 0 and 2 <= len(word) <= 3}
+            lexicon.update(CULINARY_TERMS)
+            _word_lexicon = frozenset(lexicon)
+    return _word_lexicon
+
+@lru_cache(maxsize=65536)
+def cached_lcut(text):
+    """按文本缓存jieba分词结果（相同的单元格文本只分词一次）"""
+    tokenizer = ensure_tokenizer()
+    profile_count("jieba_lcut")
+    return tuple(tokenizer.lcut(text))
 
 def is_valid_word(phrase):
-    """判断是否为有效词（支持单字白名单）"""
-    if len(phrase) == 1 and phrase in SINGLE_CHAR_WHITELIST:
-        return True
-    if len(phrase) < 2:
-        return False
-    words = jieba.lcut(phrase)
-    return phrase in words
+    """判断是否为有效词（支持单字白名单），查表实现，不做分词"""
+    if len(phrase) == 1:
+        return phrase in SINGLE_CHAR_WHITELIST
+    return phrase in get_word_lexicon()
 
 def split_stuck_content(content):
     """拆分粘连的“水印字+有效内容”"""
-    if not content:
-        return ""
-
-    words = jieba.lcut(content)
-    valid_parts = []
-    for word in words:
-        if all(c in WATERMARK_CHARS for c in word):
-            continue
-
-        cleaned_word = []
-        for c in word:
-            if c in WATERMARK_CHARS:
-                watermark_count = sum(1 for ch in word if ch in WATERMARK_CHARS)
-                if watermark_count / len(word) <= 0.5:
-                    cleaned_word.append(c)
+    return get_cell_cleaner().split_stuck(content)
+
+# ---------------------- 括号修复（线性扫描）----------------------
+_ASCII_LETTERS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_CLOSE_PUNCT = frozenset("，；。")
+
+def _content_kind(kind, ch):
+    """括号内容类型的状态转移：empty → num（纯数字）→ unit（数字+字母，如3g）；其他情况为other"""
+    if ch.isdecimal():
+        return "num" if kind in ("empty", "num") else "other"
+    if ch in _ASCII_LETTERS:
+        return "unit" if kind in ("num", "unit") else "other"
+    return "other"
+
+def _token_insert_pos(chars, start):
+    """从数字/字母片段起点start开始：数字+字母或字母+数字片段，再跳过一个句读和空白，返回补右括号的位置"""
+    n = len(chars)
+    i = start
+    if chars[i].isdecimal():
+        while i < n and chars[i].isdecimal():
+            i += 1
+        while i < n and chars[i] in _ASCII_LETTERS:
+            i += 1
+    else:
+        while i < n and chars[i] in _ASCII_LETTERS:
+            i += 1
+        while i < n and chars[i].isdecimal():
+            i += 1
+    if i < n and chars[i] in _CLOSE_PUNCT:
+        i += 1
+    while i < n and chars[i].isspace():
+        i += 1
+    return i
+
+def repair_brackets(text, split_chars=""):
+    """修复文本中的括号匹配问题（线性时间：一次逆序扫描+一次顺序扫描，不回溯、不反复切片拼接）
+    1. 括号内为数字+单位、纯数字，或逗号后即结束/空白时，把被识别成逗号/分号的右括号还原
+    2. 左括号仍多于右括号时，在未闭合左括号后的第一个数字/字母片段之后补右括号
+    同时记录修复后文本中位于括号外的split_chars分隔符位置，返回(修复后的文本, 分隔符位置列表)"""
+    if not text:
+        return text, []
+    n = len(text)
+    close_after = [False] * (n + 1)  # close_after[i]：位置i及之后是否还有右括号
+    for i in range(n - 1, -1, -1):
+        close_after[i] = close_after[i + 1] or text[i] == "）"
+
+    out = []
+    separators = []
+    opens = []  # 未闭合的左括号：[在out中的位置, 内容类型, 其后第一个数字/字母片段在out中的起点]
+    waiting = []  # 尚未遇到数字/字母片段、也未被右括号阻断的左括号
+    left_count = right_count = 0
+    since_close = 0  # 最近一个右括号之后新开的左括号数（宽松规则不跨越右括号）
+
+    def close_innermost():
+        nonlocal right_count, since_close
+        since_close = 0
+        opens.pop()
+        if opens:
+            opens[-1][1] = "other"
+        waiting.clear()  # 右括号之后的片段不再属于之前的左括号（补括号时不跨越右括号）
+        out.append("）")
+        right_count += 1
+
+    for i, ch in enumerate(text):
+        if ch == "（":
+            if opens:
+                opens[-1][1] = "other"
+            state = [len(out), "empty", None]
+            opens.append(state)
+            waiting.append(state)
+            out.append(ch)
+            left_count += 1
+            since_close += 1
+        elif ch == "）":
+            if opens:
+                close_innermost()
             else:
-                cleaned_word.append(c)
-
-        cleaned_word = "".join(cleaned_word).strip()
-        if cleaned_word:
-            valid_parts.append(cleaned_word)
-
-    merged = "".join(valid_parts)
-    # 改进：保护数字格式，避免在数字和小数点之间插入水印字符
-    # 先处理数字前后的水印，但要保护小数点
-    merged = re.sub(r"[" + "".join(WATERMARK_CHARS) + r"](\d+\.?\d*)", r"\1", merged)
-    merged = re.sub(r"(\d+\.?\d*)[" + "".join(WATERMARK_CHARS) + r"]", r"\1", merged)
-    # 清理数字中间的水印字符（但要保护小数点）
-    merged = re.sub(r"(\d)[" + "".join(WATERMARK_CHARS) + r"]+(\.\d+)", r"\1\2", merged)
-    merged = re.sub(r"(\d+\.)[" + "".join(WATERMARK_CHARS) + r"]+(\d)", r"\1\2", merged)
-
-    field_name = ""
-    for field in COMMON_FIELDS:
-        if field in merged:
-            field_name = field
-            break
-    if field_name:
-        content_after_field = re.sub(r"^.*?" + re.escape(field_name), "", merged)
-        if content_after_field and (content_after_field[0].isdigit() or content_after_field[0] == '.'):
-            # 改进：支持小数格式（如0.5, 1.等）
-            num_unit = re.match(r"(\d+\.?\d*[^\u4e00-\u9fa5]*?)", content_after_field).group(1) if re.match(r"\d+\.?\d*", content_after_field) else ""
-            rest_content = re.sub(r"^\d+\.?\d*[^\u4e00-\u9fa5]*?", "", content_after_field)
-            merged = f"{field_name}（{num_unit}）{rest_content}"
+                waiting.clear()
+                since_close = 0
+                out.append(ch)
+                right_count += 1
+        elif ch in "，；" and opens:
+            kind = opens[-1][1]
+            nxt = text[i + 1] if i + 1 < n else ""
+            later_close = close_after[i + 1]
+            # 内容非空：最内层括号有内容，或它外面还有本段新开的左括号（外层内容包含内层左括号）
+            loose = since_close and (kind != "empty" or since_close > 1)
+            if (kind == "unit" and nxt != "）") or (kind == "num" and not later_close) or \
+                    (loose and (not nxt or nxt.isspace()) and not later_close):
+                close_innermost()
+            else:
+                opens[-1][1] = "other"
+                out.append(ch)
         else:
-            merged = f"{field_name}{content_after_field}"
-
-    return merged.strip()
+            if opens:
+                opens[-1][1] = _content_kind(opens[-1][1], ch)
+            elif ch in split_chars:
+                separators.append(len(out))
+            if waiting and (ch.isdecimal() or ch in _ASCII_LETTERS):
+                for state in waiting:
+                    state[2] = len(out)
+                waiting.clear()
+            out.append(ch)
+
+    if left_count > right_count and opens:
+        inserted = set()
+        for _, _, token_start in reversed(opens):
+            if token_start is None:
+                continue
+            pos = _token_insert_pos(out, token_start)
+            if pos in inserted or (pos < len(out) and out[pos] == "）"):
+                continue
+            inserted.add(pos)
+        if inserted:
+            # 一次合并写入所有补上的右括号（逐个insert在未闭合括号很多时是平方级）
+            merged = []
+            start = 0
+            for pos in sorted(inserted):
+                merged.extend(out[start:pos])
+                merged.append("）")
+                start = pos
+            merged.extend(out[start:])
+            out = merged
+        if inserted and split_chars:
+            # 补上的右括号只影响第一个未闭合左括号之后的部分：只重扫这一段的括号深度
+            depth = 0
+            for i in range(opens[0][0], len(out)):
+                ch = out[i]
+                if ch == "（":
+                    depth += 1
+                elif ch == "）":
+                    depth = max(depth - 1, 0)
+                elif depth == 0 and ch in split_chars:
+                    separators.append(i)
+    return "".join(out), separators
 
 def fix_brackets(text):
-    """修复文本中的括号匹配问题"""
-    if not text:
-        return text
-
-    # 修复常见的括号错误：右括号被替换成逗号的情况
-    # 模式1：左括号 + 数字+单位 + 逗号/分号（如"（3g，"应该是"（3g）"）
-    # 注意：需要确保后面不是已经匹配的右括号
-    text = re.sub(r"（(\d+[a-zA-Z]+)([，；])(?![^）]*?）)", r"（\1）", text)
-    # 模式2：左括号 + 纯数字 + 逗号/分号（如"（1，"应该是"（1）"）
-    text = re.sub(r"（(\d+)([，；])(?![^）]*?）)", r"（\1）", text)
-    # 模式3：左括号 + 内容 + 逗号 + 空格或结束（可能是右括号位置）
-    # 这个模式更宽松，用于处理其他情况
-    text = re.sub(r"（([^）]+?)([，；])(\s|$)(?![^）]*?）)", r"（\1）\3", text)
-
-    # 再次检查：如果左括号后直接是数字+单位+逗号，且后面没有右括号，则修复
-    # 这个更精确的模式用于处理"（3g，"这种情况
-    text = re.sub(r"（(\d+[a-zA-Z]+)([，；])(?=\s|$|[^）])", r"（\1）", text)
-
-    # 统计并修复不匹配的括号
-    left_count = text.count('（')
-    right_count = text.count('）')
-    if left_count > right_count:
-        # 从右到左查找未匹配的左括号
-        bracket_stack = []
-        for i, char in enumerate(text):
-            if char == '（':
-                bracket_stack.append(i)
-            elif char == '）':
-                if bracket_stack:
-                    bracket_stack.pop()
-
-        # 对于未匹配的左括号，在其后合理位置添加右括号
-        for left_idx in reversed(bracket_stack):
-            # 在左括号后查找数字+单位或纯数字的模式
-            match = re.search(r"（([^）]*?)(\d+[a-zA-Z]*|[a-zA-Z]+\d*)([，；。]?\s*)", text[left_idx:])
-            if match:
-                insert_pos = left_idx + match.end()
-                if insert_pos < len(text) and text[insert_pos] != '）':
-                    text = text[:insert_pos] + '）' + text[insert_pos:]
-                elif insert_pos >= len(text):
-                    text = text + '）'
-
-    return text
+    """修复文本中的括号匹配问题，见repair_brackets"""
+    return repair_brackets(text)[0] if text else text
+
+def split_ingredients(text, cleaner=None):
+    """配料字符串 → 配料列表：括号修复的同一遍扫描中记录括号外的“、”“，”，按这些位置切分
+    每项只去掉首尾空白和明显无效的字符（配料中的“鸡”“老”“菜”等水印字不删除）"""
+    cleaner = cleaner or get_cell_cleaner()
+    text, separators = repair_brackets(text, "、，")
+    ingredients = []
+    start = 0
+    for end in separators + [len(text)]:
+        ingredient = text[start:end].strip()
+        if ingredient:
+            ingredient = cleaner.strip_ingredient_chars(ingredient)
+            if ingredient:
+                ingredients.append(ingredient)
+        start = end + 1
+    return ingredients
+
+# ---------------------- 字段名匹配（Aho-Corasick多模式匹配）----------------------
+FIELD_MATCH_CACHE_SIZE = 65536  # 按文本缓存的匹配结果条数上限（超出后清空重建）
+TABLE_LABELS = ("基本信息", "配料", "烹饪方式", "制作工艺", "餐厅操作工艺")  # 表格结构判断用到的字段名（即使不在COMMON_FIELDS中也识别）
+
+class FieldMatcher:
+    """字段名多模式匹配器：COMMON_FIELDS及其同义写法编译为一个Aho-Corasick自动机，一次扫描找出文本中的全部字段名及位置
+    扫描结果按文本缓存：同一单元格在清洗、跨页合并、解析各阶段只扫描一次
+    TABLE_LABELS始终参与匹配（fields可见），但has_field/first/is_label只认COMMON_FIELDS及其同义写法"""
+
+    def __init__(self, fields=None, synonyms=None):
+        self.canonical = {field: field for field in (COMMON_FIELDS if fields is None else fields)}
+        self.canonical.update(FIELD_SYNONYMS if synonyms is None else synonyms)
+        self._common = frozenset(self.canonical)
+        for label in TABLE_LABELS:
+            self.canonical.setdefault(label, label)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for label in self.canonical:
+            state = 0
+            for ch in label:
+                if ch not in self._goto[state]:
+                    self._goto[state][ch] = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = self._goto[state][ch]
+            self._output[state] = (label,)
+        # 按层次（BFS）计算失配指针，并把失配状态的输出并入当前状态
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                self._output[child] += self._output[self._fail[child]]
+                queue.append(child)
+        self._first_chars = frozenset(label[0] for label in self.canonical)
+        self._cache = {}
+
+    def scan(self, text):
+        """文本中的全部字段名命中[(起始位置, 字段名写法)]，按位置排序，同一位置较长的在前"""
+        if self._first_chars.isdisjoint(text):  # 不含任何字段名的首字，无需扫描
+            return ()
+        hits = self._cache.get(text)
+        if hits is None:
+            profile_count("field_scan")
+            goto, fail, output = self._goto, self._fail, self._output
+            found = []
+            state = 0
+            for i, ch in enumerate(text):
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(ch, 0)
+                for label in output[state]:
+                    found.append((i - len(label) + 1, label))
+            found.sort(key=lambda hit: (hit[0], -len(hit[1])))
+            hits = tuple(found)
+            if len(self._cache) >= FIELD_MATCH_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[text] = hits
+        return hits
+
+    def fields(self, text):
+        """文本中出现的标准字段名集合（含TABLE_LABELS）"""
+        return {self.canonical[label] for _, label in self.scan(text)}
+
+    def has_field(self, text):
+        """文本是否含任一通用字段名"""
+        return any(label in self._common for _, label in self.scan(text))
+
+    def first(self, text):
+        """最左（同一位置取最长）的通用字段名命中(起始位置, 字段名写法)，无命中时返回None"""
+        return next(((start, label) for start, label in self.scan(text) if label in self._common), None)
+
+    def is_label(self, text):
+        """文本是否恰好是通用字段名（或其同义写法）"""
+        return text in self._common
+
+_field_matcher = None
+
+def get_field_matcher():
+    """获取按当前配置（COMMON_FIELDS、FIELD_SYNONYMS）编译的共享匹配器，配置变更后调用reset_cell_cleaner重新编译"""
+    global _field_matcher
+    if _field_matcher is None:
+        _field_matcher = FieldMatcher()
+    return _field_matcher
+
+class CellCleaner:
+    """编译好的单元格清洗器：水印字集合、允许字符集、数字保护规则只在构造时编译一次
+
+    清洗策略按字段上下文（field_context）配置，见CLEAN_PROFILES：
+    - protect_watermark：保留全部水印字，跳过粘连拆分、分词、数字清理和有效内容比例检查
+    - single_char_passthrough：清洗后只剩单字时直接返回
+    - strip_edge_watermark：去掉结果首尾的水印字
+
+    watermark_free=True用于已在字符层过滤掉水印的文本（见filter_watermark_chars）：
+    跳过分词、逐字水印判断等全部水印处理，只做字符、小数点、字段名格式、括号等基础清洗
+    """
+
+    def __init__(self, watermark_chars=None, common_fields=None, whitelist=None, profiles=None,
+                 watermark_free=False):
+        self.watermark_free = watermark_free
+        self.watermark_chars = WATERMARK_CHARS if watermark_chars is None else watermark_chars
+        self.common_fields = tuple(COMMON_FIELDS if common_fields is None else common_fields)
+        self.field_matcher = get_field_matcher() if common_fields is None else FieldMatcher(self.common_fields)
+        self.whitelist = SINGLE_CHAR_WHITELIST if whitelist is None else whitelist
+        self.profiles = CLEAN_PROFILES if profiles is None else profiles
+
+        wm = "[" + "".join(re.escape(c) for c in self.watermark_chars) + "]"
+        # str.translate表：删除全部水印字（用于统计/判断水印字）
+        self._strip_watermark_table = str.maketrans("", "", "".join(self.watermark_chars))
+        self._disallowed_re = re.compile(r"[^\u4e00-\u9fa5a-zA-Z0-9，。、；：（）【】《》！？·\-—\d\.\s]")
+        self._ingredient_disallowed_re = re.compile(r"[^\u4e00-\u9fa5a-zA-Z0-9，。、；：（）【】《》！？·\s]")
+        self._multi_dot_re = re.compile(r"\.{2,}")
+        self._lonely_dot_re = re.compile(r"(?<!\d)\.(?!\d)")
+        self._context_char_re = re.compile(r"[\u4e00-\u9fa5a-zA-Z0-9，。、；：（）【】\d\.]")
+        self._spaces_re = re.compile(r"\s+")
+        self._edge_separators_re = re.compile(r"^[,，、;；:：]+|[,，、;；:：]+$")
+        self._leading_watermark_re = re.compile(r"^" + wm + r"+")
+        self._edge_watermark_re = re.compile(r"^" + wm + r"+|" + wm + r"+$")
+        # 粘连拆分阶段的数字保护：数字前后及数字中间的水印字
+        self._stuck_number_rules = [
+            (re.compile(wm + r"(\d+\.?\d*)"), r"\1"),
+            (re.compile(r"(\d+\.?\d*)" + wm), r"\1"),
+            (re.compile(r"(\d)" + wm + r"+(\.\d+)"), r"\1\2"),
+            (re.compile(r"(\d+\.)" + wm + r"+(\d)"), r"\1\2"),
+        ]
+        # 最终清理阶段的数字保护：多余小数点、数字中间误插入的水印字
+        self._final_dot_rule = (re.compile(r"(\d)\.+(\d)"), r"\1.\2")
+        self._final_number_rules = [
+            (re.compile(r"(\d)" + wm + r"+(\d)"), r"\1\2"),
+            (re.compile(r"(\d)" + wm + r"+(\.\d)"), r"\1\2"),
+            (re.compile(r"(\d\.)" + wm + r"+(\d)"), r"\1\2"),
+        ]
+        self._num_unit_re = re.compile(r"(\d+\.?\d*[^\u4e00-\u9fa5]*?)")
+        self._num_re = re.compile(r"\d+\.?\d*")
+        self._num_prefix_re = re.compile(r"^\d+\.?\d*[^\u4e00-\u9fa5]*?")
+
+    def profile(self, field_context):
+        """获取字段上下文对应的清洗策略（未配置的上下文使用默认策略）"""
+        return self.profiles.get(field_context, {}) if field_context else {}
+
+    def is_all_watermark(self, word):
+        return not word.translate(self._strip_watermark_table)
+
+    def has_watermark(self, text):
+        return len(text.translate(self._strip_watermark_table)) != len(text)
+
+    def strip_leading_watermark(self, text):
+        """去掉开头的水印字（如"品现调"→"现调"）；文本不含水印时原样返回"""
+        return text if self.watermark_free else self._leading_watermark_re.sub("", text)
+
+    def strip_ingredient_chars(self, text):
+        """配料字段的最保守清理：只删除非中文、数字、标点的字符"""
+        return self._ingredient_disallowed_re.sub("", text)
+
+    def split_stuck(self, content):
+        """拆分粘连的“水印字+有效内容”"""
+        if not content:
+            return ""
 
-def clean_cell_smart(cell, field_context=None):
-    """智能清洗单元格（支持单字值、粘连水印处理）"""
-    if not cell:
-        return ""
-
-    # 保留小数点，支持小数和整数后跟点的情况（如0.5和1.）
-    cleaned = re.sub(r"[^\u4e00-\u9fa5a-zA-Z0-9，。、；：（）【】《》！？·\-—\d\.\s]", "", cell)
-    cleaned = cleaned.replace("\n", "").strip()
-    if len(cleaned) < 1:
-        return ""
-
-    # 保护数字格式：确保小数点和数字的合理组合不被破坏
-    # 处理多个连续小数点的情况，只保留合理的小数点
-    cleaned = re.sub(r"\.{2,}", ".", cleaned)  # 多个连续小数点变为单个
-    # 保护数字格式：
-    # - 保留小数格式（如0.5, 1.5等）
-    # - 保留整数后跟点的情况（如1.）
-    # - 删除前面没有数字的小数点
-    cleaned = re.sub(r"(?<!\d)\.(?!\d)", "", cleaned)  # 删除前后都没有数字的孤立小数点
-    # 但保留数字后跟点的情况（如"1."），即使后面没有数字
-
-    # 对于配料字段，使用更保守的水印过滤策略
-    if field_context == "配料":
-        # 配料字段：不过度处理，只做基本的字符清理
-        # 不调用split_stuck_content，避免破坏词语完整性
-        # 只删除明显不是有效字符的内容（已经在前面通过正则表达式处理了）
-        pass  # 配料字段保持原样，后续通过字符级别的处理来保护词语
-    else:
-        cleaned = split_stuck_content(cleaned)
+        valid_parts = []
+        for word in cached_lcut(content):
+            stripped = word.translate(self._strip_watermark_table)
+            if not stripped:
+                continue
+            # 水印字占比不超过一半时整词保留，否则去掉其中的水印字
+            watermark_count = len(word) - len(stripped)
+            cleaned_word = (word if watermark_count / len(word) <= 0.5 else stripped).strip()
+            if cleaned_word:
+                valid_parts.append(cleaned_word)
+
+        merged = "".join(valid_parts)
+        # 保护数字格式，避免在数字和小数点之间插入水印字符
+        if self.has_watermark(merged):
+            for pattern, repl in self._stuck_number_rules:
+                merged = pattern.sub(repl, merged)
+        return self.format_field_prefix(merged)
+
+    def format_field_prefix(self, merged):
+        """单元格含字段名时去掉字段名之前的内容；字段名后紧跟数字时格式化为“字段名（数字单位）其余内容”
+        含多个字段名时取最左边的（同一位置取最长的，如“餐厅操作工艺”而不是其中的“操作工艺”），同义写法替换为标准字段名"""
+        hit = self.field_matcher.first(merged)
+        if hit:
+            start, label = hit
+            field_name = self.field_matcher.canonical[label]
+            content_after_field = merged[start + len(label):]
+            if content_after_field and (content_after_field[0].isdigit() or content_after_field[0] == '.'):
+                # 支持小数格式（如0.5, 1.等）
+                num_unit = self._num_unit_re.match(content_after_field).group(1) if self._num_re.match(content_after_field) else ""
+                rest_content = self._num_prefix_re.sub("", content_after_field)
+                merged = f"{field_name}（{num_unit}）{rest_content}"
+            else:
+                merged = f"{field_name}{content_after_field}"
+
+        return merged.strip()
+
+    def _keep_watermark_char(self, chars, i, valid_words, whole_len):
+        """判断位置i处的水印字是否应保留（结合前后字、有效词和数字上下文）"""
+        char = chars[i]
+        n = len(chars)
+        prev_char = chars[i-1] if i > 0 else None
+        next_char = chars[i+1] if i < n-1 else None
+
+        # 保护数字周围的字符：水印字在数字和小数点之间，很可能是误识别，保留它
+        prev_is_digit_or_dot = prev_char is not None and (prev_char.isdigit() or prev_char == '.')
+        next_is_digit_or_dot = next_char is not None and (next_char.isdigit() or next_char == '.')
+        if (prev_is_digit_or_dot and next_is_digit_or_dot) or \
+           (prev_char is not None and next_char is not None and prev_char.isdigit() and next_char == '.'):
+            return True
+
+        if prev_char is not None and is_valid_word(prev_char + char):
+            return True
+        if next_char is not None and is_valid_word(char + next_char):
+            return True
+        if prev_char is not None and next_char is not None and is_valid_word(prev_char + char + next_char):
+            return True
 
-    if len(cleaned) < 1:
-        return ""
+        for word in valid_words:
+            if char in word and len(word) > 1:
+                char_idx_in_word = word.find(char)
+                if char_idx_in_word > 0 and prev_char == word[char_idx_in_word-1]:
+                    return True
+                if char_idx_in_word < len(word)-1 and next_char == word[char_idx_in_word+1]:
+                    return True
+
+        if whole_len == 1 and char in self.whitelist:
+            return True
+
+        # 前后都不是有效字符时视为孤立水印
+        prev_valid = prev_char is not None and self._context_char_re.match(prev_char)
+        next_valid = next_char is not None and self._context_char_re.match(next_char)
+        return bool(prev_valid or next_valid)
+
+    def clean_watermark_free(self, cell, field_context=None):
+        """不含水印字的单元格的基础清洗（与clean的非水印步骤一致，不分词）"""
+        if not cell:
+            return ""
+        protect_watermark = self.profile(field_context).get("protect_watermark", False)
+        cleaned = self._disallowed_re.sub("", cell).replace("\n", "").strip()
+        if "." in cleaned:
+            cleaned = self._multi_dot_re.sub(".", cleaned)
+            cleaned = self._lonely_dot_re.sub("", cleaned)
+        if not protect_watermark:
+            # 与粘连拆分一致：分词后逐词去空白再拼接，即去掉全部空白（如"配 料"→"配料"）
+            cleaned = self.format_field_prefix(self._spaces_re.sub("", cleaned))
+        result = self._spaces_re.sub(" ", cleaned.strip())
+        result = fix_brackets(self._edge_separators_re.sub("", result))
+        if not protect_watermark and "." in result:
+            pattern, repl = self._final_dot_rule
+            result = pattern.sub(repl, result)
+        return result
+
+    def clean(self, cell, field_context=None):
+        """智能清洗单元格（支持单字值、粘连水印处理）"""
+        if self.watermark_free:
+            return self.clean_watermark_free(cell, field_context)
+        if not cell:
+            return ""
+        profile = self.profile(field_context)
+        protect_watermark = profile.get("protect_watermark", False)
 
-    if field_context and field_context in ["烹饪方式", "味型"] and len(cleaned) == 1:
-        return cleaned
+        # 保留小数点，支持小数和整数后跟点的情况（如0.5和1.）
+        cleaned = self._disallowed_re.sub("", cell)
+        cleaned = cleaned.replace("\n", "").strip()
+        if len(cleaned) < 1:
+            return ""
 
-    # 对于配料字段，完全跳过jieba分词和词语过滤，直接进入字符级别处理
-    # 这样可以避免jieba分词破坏"娃娃菜"、"老鸡汤"等完整词语
-    if field_context == "配料":
-        # 配料字段：不进行分词，直接保留所有字符
-        valid_words = []  # 不需要valid_words，因为我们会保留所有字符
-    else:
-        raw_words = jieba.lcut(cleaned)
-        valid_words = [word for word in raw_words if not all(c in WATERMARK_CHARS for c in word)]
+        # 保护数字格式：多个连续小数点变为单个，删除前后都没有数字的孤立小数点
+        # 但保留数字后跟点的情况（如"1."），即使后面没有数字
+        if "." in cleaned:
+            cleaned = self._multi_dot_re.sub(".", cleaned)
+            cleaned = self._lonely_dot_re.sub("", cleaned)
 
-    cleaned_chars = list(cleaned)
-    final_chars = []
-    n = len(cleaned_chars)
+        # 配料等受保护字段：不调用粘连拆分，避免破坏"娃娃菜"、"老鸡汤"等完整词语
+        if not protect_watermark:
+            cleaned = self.split_stuck(cleaned)
 
-    for i in range(n):
-        char = cleaned_chars[i]
-        if char not in WATERMARK_CHARS:
-            final_chars.append(char)
-            continue
+        if len(cleaned) < 1:
+            return ""
 
-        # 对于配料字段，完全跳过水印字符的删除
-        # 因为"鸡"、"老"、"菜"等字符在食材名称中很常见，不应该被删除
-        if field_context == "配料":
-            # 对于配料字段，保留所有字符，不删除任何水印字符
-            final_chars.append(char)
-            continue
+        if profile.get("single_char_passthrough") and len(cleaned) == 1:
+            return cleaned
 
-        # 改进：保护数字周围的字符，避免误删数字相关的内容
-        # 如果水印字符在数字附近，要更谨慎处理
-        prev_is_digit_or_dot = i > 0 and (cleaned_chars[i-1].isdigit() or cleaned_chars[i-1] == '.')
-        next_is_digit_or_dot = i < n-1 and (cleaned_chars[i+1].isdigit() or cleaned_chars[i+1] == '.')
-
-        # 如果水印字符在数字和小数点之间，很可能是误识别，保留它
-        if prev_is_digit_or_dot or next_is_digit_or_dot:
-            # 检查是否是数字格式的一部分（如"0.5"中的水印）
-            # 如果前后都是数字或小数点，可能是数字的一部分，保留
-            if (prev_is_digit_or_dot and next_is_digit_or_dot) or \
-               (i > 0 and i < n-1 and cleaned_chars[i-1].isdigit() and cleaned_chars[i+1] == '.'):
-                final_chars.append(char)
-                continue
+        if protect_watermark:
+            # 受保护字段：不分词，保留所有字符（包括水印字）
+            valid_words = []
+            result = cleaned
+        else:
+            valid_words = [word for word in cached_lcut(cleaned) if not self.is_all_watermark(word)]
+            if self.has_watermark(cleaned):
+                chars = cleaned
+                whole_len = len(cleaned)
+                result = "".join(
+                    char for i, char in enumerate(chars)
+                    if char not in self.watermark_chars or self._keep_watermark_char(chars, i, valid_words, whole_len)
+                )
+            else:
+                result = cleaned
+
+        result = result.strip()
+        result = self._spaces_re.sub(" ", result)
+        result = self._edge_separators_re.sub("", result)
+
+        # 修复括号匹配问题
+        result = fix_brackets(result)
+
+        # 最终清理：确保数字格式正确，不添加多余的小数点（受保护字段跳过，避免删除有效字符）
+        if not protect_watermark:
+            if "." in result:
+                pattern, repl = self._final_dot_rule
+                result = pattern.sub(repl, result)
+            if self.has_watermark(result):
+                for pattern, repl in self._final_number_rules:
+                    result = pattern.sub(repl, result)
+
+        if len(result) > 0:
+            if len(result) == 1 and result in self.whitelist:
+                return result
+            # 受保护字段跳过有效内容比例检查，因为已经保留了所有字符
+            if protect_watermark:
+                return result
+            if profile.get("strip_edge_watermark"):
+                result = self._edge_watermark_re.sub("", result).strip()
+            valid_content_ratio = len("".join(valid_words)) / len(result) if len(result) > 0 else 0
+            if valid_content_ratio < 0.3 and not self.field_matcher.has_field(result):
+                return ""
+
+        return result
+
+_cell_cleaners = {}
+
+def get_cell_cleaner(watermark_free=False):
+    """获取按当前配置编译的默认清洗器（配置变更后调用reset_cell_cleaner重新编译）
+    watermark_free=True返回用于字符层已过滤水印的文本的清洗器"""
+    if watermark_free not in _cell_cleaners:
+        _cell_cleaners[watermark_free] = CellCleaner(watermark_free=watermark_free)
+    return _cell_cleaners[watermark_free]
+
+def reset_cell_cleaner():
+    """清洗配置（水印字、字段名及同义写法、白名单、餐饮术语、清洗策略）变更后调用：丢弃已编译的清洗器、字段名匹配器和有效词表"""
+    global _word_lexicon, _field_matcher
+    _cell_cleaners.clear()
+    _word_lexicon = None
+    _field_matcher = None
 
-        phrases_to_check = []
-        if i > 0:
-            phrases_to_check.append(cleaned_chars[i-1] + char)
-        if i < n-1:
-            phrases_to_check.append(char + cleaned_chars[i+1])
-        if i > 0 and i < n-1:
-            phrases_to_check.append(cleaned_chars[i-1] + char + cleaned_chars[i+1])
-        if any(is_valid_word(phrase) for phrase in phrases_to_check):
-            final_chars.append(char)
+def clean_cell_smart(cell, field_context=None):
+    """智能清洗单元格（支持单字值、粘连水印处理）"""
+    return get_cell_cleaner().clean(cell, field_context)
+
+# ---------------------- 制作工艺结构化（份数/步骤/用量/时长）----------------------
+STEP_SEPARATORS = frozenset("、，；。：:;,")
+STEP_BOUNDARY_SEPARATORS = frozenset("；。;")  # 步骤之间的句读（其后紧跟的“2.10份”按步骤序号拆分）
+RANGE_CHARS = "-~～"  # 数量范围连接符（如40-45g）
+ASCII_UNITS = frozenset(("g", "kg", "ml", "mL", "L"))
+CJK_UNITS = ("千克", "公斤", "毫升", "克", "斤", "升", "个", "颗", "粒", "袋", "盒", "包", "勺", "块", "片", "只",
+             "根", "瓣", "条", "张", "串", "碗", "杯", "份", "滴")  # 较长的单位在前（前缀匹配取第一个）
+TIME_UNITS = (("小时", 3600), ("分钟", 60), ("秒", 1))
+MAX_MATERIAL_LEN = 8  # 用量后面的原料名最长字数（更长的多半是句子，不当作原料）
+MATERIAL_STOP_WORDS = ("出品", "均匀", "拌匀", "搅匀", "搅拌", "抓拌", "混合", "翻炒", "煸炒", "炒成", "炒熟", "炒香", "倒入",
+                       "放入", "平铺", "摆放", "点缀", "依次", "烧开", "清洗", "调制", "上色", "和", "于", "在")  # 原料名在这些词处截断
+ACTION_SKIP_CHARS = frozenset("中上内里后再在将入约各火柜")  # 动作两字中的首字为这些字时只取末字（如“水中煮” → 煮）
+
+def _scan_number(text, i):
+    """从数字开始扫描整数/小数，返回结束位置"""
+    n = len(text)
+    while i < n and text[i].isdecimal():
+        i += 1
+    if i + 1 < n and text[i] == "." and text[i + 1].isdecimal():
+        i += 1
+        while i < n and text[i].isdecimal():
+            i += 1
+    return i
+
+def _is_word_char(ch):
+    return not (ch.isdecimal() or ch in _ASCII_LETTERS or ch.isspace() or ch in "（）().") \
+        and ch not in STEP_SEPARATORS
+
+def lex_process(text):
+    """制作工艺文本 → 词法单元列表[(类型, 文本)]，一次顺序扫描
+    类型：num（整数/小数/范围，如2.5、40-45）、latin（英文字母，如g、ml）、word（中文等其他文字）、
+    sep（句读）、open/close（括号）、dot（步骤序号后的点）、space（空白）"""
+    tokens = []
+    n = len(text)
+    i = 0
+    while i < n:
+        ch = text[i]
+        start = i
+        if ch.isdecimal():
+            i = _scan_number(text, i)
+            if i + 1 < n and text[i] in RANGE_CHARS and text[i + 1].isdecimal():
+                i = _scan_number(text, i + 1)
+            kind = "num"
+        elif ch in _ASCII_LETTERS:
+            while i < n and text[i] in _ASCII_LETTERS:
+                i += 1
+            kind = "latin"
+        elif ch.isspace():
+            while i < n and text[i].isspace():
+                i += 1
+            kind = "space"
+        elif ch in "（）().":
+            i += 1
+            kind = {"（": "open", "(": "open", "）": "close", ")": "close"}.get(ch, "dot")
+        elif ch in STEP_SEPARATORS:
+            i += 1
+            kind = "sep"
+        else:
+            while i < n and _is_word_char(text[i]):
+                i += 1
+            kind = "word"
+        tokens.append((kind, text[start:i]))
+    return tokens
+
+def _parse_number(value):
+    """数量文本 → (下限, 上限)，非范围时上限为None；整数返回int"""
+    for sep in RANGE_CHARS:
+        if sep in value:
+            low, high = value.split(sep, 1)
+            return _parse_number(low)[0], _parse_number(high)[0]
+    return (float(value) if "." in value else int(value)), None
+
+def _match_unit(word, units):
+    for unit in units:
+        if word.startswith(unit):
+            return unit
+    return None
+
+def _is_terminator(tokens, i):
+    """位置i是否为原料名之后的边界（句读、括号、空白或结尾）"""
+    return i >= len(tokens) or tokens[i][0] in ("sep", "open", "close", "space")
+
+def scan_quantities(tokens):
+    """步骤的词法单元 → (用量列表, 时长列表)，一次顺序扫描
+    用量：数字+单位（650g、1包），单位后紧跟的短词作为原料（650g鸡蛋液、 → 鸡蛋液）
+    时长：数字+时间单位（蒸5分钟、2分30秒），时间单位前紧挨着的词取末尾两字作为动作"""
+    amounts, durations = [], []
+    n = len(tokens)
+    i = 0
+    while i < n:
+        kind, value = tokens[i]
+        if kind != "num" or i + 1 >= n or tokens[i + 1][0] not in ("word", "latin"):
+            i += 1
             continue
-
-        in_valid_word = False
-        for word in valid_words:
-            if char in word and len(word) > 1:
-                char_idx_in_word = word.find(char)
-                if char_idx_in_word >= 0:
-                    if char_idx_in_word > 0 and i > 0 and cleaned_chars[i-1] == word[char_idx_in_word-1]:
-                        in_valid_word = True
-                        break
-                    if char_idx_in_word < len(word)-1 and i < n-1 and cleaned_chars[i+1] == word[char_idx_in_word+1]:
-                        in_valid_word = True
-                        break
-        if in_valid_word:
-            final_chars.append(char)
+        unit_kind, unit_text = tokens[i + 1]
+        low, high = _parse_number(value)
+        time_unit = _match_unit(unit_text, [unit for unit, _ in TIME_UNITS]) if unit_kind == "word" else None
+        if unit_text == "分" and i + 3 < n and tokens[i + 2][0] == "num" and tokens[i + 3][1].startswith("秒"):
+            # 2分30秒：合并为秒
+            seconds = low * 60 + _parse_number(tokens[i + 2][1])[0]
+            durations.append(_duration(tokens, i, seconds, "秒", seconds, None,
+                                       value + "分" + tokens[i + 2][1] + "秒"))
+            i += 4
             continue
-
-        if len(cleaned) == 1 and char in SINGLE_CHAR_WHITELIST:
-            final_chars.append(char)
+        if time_unit:
+            factor = dict(TIME_UNITS)[time_unit]
+            durations.append(_duration(tokens, i, low, time_unit, low * factor,
+                                       high * factor if high is not None else None, value + time_unit))
+            i += 2
             continue
-
-        # 改进：保护数字格式，包括小数点
-        prev_valid = i > 0 and re.match(r"[\u4e00-\u9fa5a-zA-Z0-9，。、；：（）【】\d\.]", cleaned_chars[i-1])
-        next_valid = i < n-1 and re.match(r"[\u4e00-\u9fa5a-zA-Z0-9，。、；：（）【】\d\.]", cleaned_chars[i+1])
-        # 对于配料字段，更保守：只要前后有中文字符，就保留
-        if field_context == "配料":
-            if prev_valid or next_valid:
-                final_chars.append(char)
+        if unit_kind == "latin":
+            unit = unit_text if unit_text in ASCII_UNITS else None
+            material, next_i = None, i + 2
+            if unit and next_i < n and tokens[next_i][0] == "word":
+                material, next_i = _material(tokens, next_i, tokens[next_i][1]), next_i + 1
+        else:
+            unit = _match_unit(unit_text, CJK_UNITS)
+            material, next_i = (_material(tokens, i + 1, unit_text[len(unit):]) if unit else None), i + 2
+        if unit:
+            amount = {"数量": low, "单位": unit, "原料": material, "原文": value + unit}
+            if high is not None:
+                amount["数量上限"] = high
+            amounts.append(amount)
+        i = next_i if unit else i + 1
+    return amounts, durations
+
+def _material(tokens, i, word):
+    """用量后紧跟的词（位于tokens[i]）→ 原料名：在截断词处截断；未截断时须以句读/括号/空白结尾"""
+    cut = min((pos for pos in (word.find(stop) for stop in MATERIAL_STOP_WORDS) if pos >= 0), default=-1)
+    if cut >= 0:
+        word = word[:cut]
+    elif not _is_terminator(tokens, i + 1):
+        return None
+    word = word.removeprefix("的")
+    return word if word and len(word) <= MAX_MATERIAL_LEN else None
+
+def _duration(tokens, i, amount, unit, seconds, max_seconds, raw):
+    """时长条目：动作取数字前紧挨着的词的末尾两字（去掉“约”）"""
+    action = None
+    j = i - 1
+    if j >= 0 and tokens[j][0] == "word":
+        word = tokens[j][1].removesuffix("约")
+        action = word[-2:]
+        if len(action) == 2 and action[0] in ACTION_SKIP_CHARS:
+            action = action[1]
+        action = action or None
+    duration = {"动作": action, "数量": amount, "单位": unit, "秒数": seconds, "原文": raw}
+    if max_seconds is not None:
+        duration["秒数上限"] = max_seconds
+    return duration
+
+def _parse_step(number, tokens):
+    """单个步骤的词法单元 → 步骤字典；“调制蛋液：……”中冒号前的短语作为标题"""
+    title = None
+    for idx, (kind, value) in enumerate(tokens):
+        if kind == "sep":
+            head = "".join(v for _, v in tokens[:idx]).strip()
+            if value in "：:" and head and len(head) <= MAX_MATERIAL_LEN:
+                title = head
+                tokens = tokens[idx + 1:]
+            break
+    amounts, durations = scan_quantities(tokens)
+    content = "".join(v for _, v in tokens).strip().rstrip("；;。 ")
+    return {"序号": number, "标题": title, "内容": content, "用量": amounts, "时长": durations}
+
+def _split_step_number(tokens, idx, body, number):
+    """“1.800g”“2.10份”：词法扫描把步骤序号和紧随的用量读成了一个小数。
+    位于步骤开头（正文开头、空白、右括号或；。之后）且整数部分恰为下一个序号时，拆成序号、点和用量数字；
+    逗号、顿号、冒号之后的小数（“，2.5小时”）仍按小数处理"""
+    kind, value = tokens[idx]
+    if kind != "num" or "." not in value or value.split(".", 1)[0] != str(number):
+        return False
+    if idx != body and not (tokens[idx - 1][0] in ("space", "close") or tokens[idx - 1][1] in STEP_BOUNDARY_SEPARATORS):
+        return False
+    head, rest = value.split(".", 1)
+    tokens[idx:idx + 1] = [("num", head), ("dot", "."), ("num", rest)]
+    return True
+
+def parse_process_steps(text):
+    """制作工艺 → {"份数": 份数或None, "步骤": [{"序号", "标题", "内容", "用量", "时长"}, ...]}
+    开头的“（10）份”或“（1份）”为份数；步骤按“1.”“2.”……切分，序号须从1连续递增且前面是句读/空白，
+    避免把“2.5小时”“1.5kg”等小数当成步骤序号；没有序号时整段作为第1步"""
+    tokens = lex_process(text or "")
+    servings = None
+    body = 0
+    if len(tokens) >= 4 and [kind for kind, _ in tokens[:3]] == ["open", "num", "close"] \
+            and tokens[3][1].startswith("份"):
+        servings = _parse_number(tokens[1][1])[0]
+        body = 4
+    elif len(tokens) >= 4 and [kind for kind, _ in tokens[:4]] == ["open", "num", "word", "close"] \
+            and tokens[2][1] == "份":
+        servings = _parse_number(tokens[1][1])[0]
+        body = 4
+    markers = []  # (序号, 序号所在的词法单元位置)
+    idx = body
+    while idx < len(tokens):
+        number = len(markers) + 1
+        _split_step_number(tokens, idx, body, number)
+        kind, value = tokens[idx]
+        if kind == "num" and value == str(number) and idx + 1 < len(tokens) and tokens[idx + 1][0] == "dot" \
+                and (idx == body or tokens[idx - 1][0] in ("space", "sep", "close")):
+            markers.append((number, idx))
+        idx += 1
+    if not markers:
+        rest = tokens[body:]
+        steps = [_parse_step(1, rest)] if "".join(v for _, v in rest).strip() else []
+    else:
+        ends = [idx for _, idx in markers[1:]] + [len(tokens)]
+        steps = [_parse_step(number, tokens[idx + 2:end]) for (number, idx), end in zip(markers, ends)]
+    return {"份数": servings, "步骤": steps}
+
+# ---------------------- 表格模型（一次扫描建立字段索引）----------------------
+BASIC_FIELD_LABELS = ("味型", "最佳风味期", "加工等级")  # 右侧单元格即字段值的基本信息子字段
+COOKING_METHOD_RE = re.compile(r"烹饪方式[:：]?\s*([^\s，。；：]+)")
+_LEADING_DIGIT_RE = re.compile(r"\d+")
+
+class TableModel:
+    """合并表格的字段索引：构造时一次扫描所有单元格，记录字段标签所在的行列、品名行、工艺行和工艺单元格；
+    单元格清洗结果按单元格缓存，字段名命中由清洗器的字段名匹配器按单元格缓存，字段提取都变成索引查找，不再为每行重扫整张表"""
+
+    def __init__(self, cleaned_table, cleaner):
+        self.cleaner = cleaner
+        self.matcher = cleaner.field_matcher
+        self.rows = []  # 非空行的非空单元格
+        self.labels = []  # 每行的字段标签单元格[(列号, 标签)]，标签为BASIC_FIELD_LABELS、烹饪方式或配料
+        self.positions = defaultdict(list)  # 字段标签 → [(行号, 列号)]
+        self.name_rows = set()  # 首格含“基本信息”的行
+        self.process_cells = {}  # 工艺行（首格含“餐厅操作工艺”或任一单元格含“制作工艺”）→ 工艺单元格
+        self.cooking_cells = []  # 含“烹饪方式”的单元格[(行号, 列号)]，按表格顺序
+        self._clean_cache = {}
+        self._cooking_from_cells = None
+
+        for row in cleaned_table:
+            cells = [cell for cell in row if cell]
+            if not cells:
                 continue
-        elif not prev_valid and not next_valid:
-            continue
-
-        final_chars.append(char)
-
-    result = "".join(final_chars).strip()
-    result = re.sub(r"\s+", " ", result)
-    result = re.sub(r"^[,，、;；:：]+|[,，、;；:：]+$", "", result)
-
-    # 修复括号匹配问题
-    result = fix_brackets(result)
-
-    # 最终清理：确保数字格式正确，不添加多余的小数点
-    # 对于配料字段，跳过这些清理，避免删除有效字符
-    if field_context != "配料":
-        # 保护有效的小数格式（如0.5, 1.5等）
-        # 清理数字中间的多余标点，但保留合理的小数点
-        result = re.sub(r"(\d)\.+(\d)", r"\1.\2", result)  # 多个小数点变为单个
-        # 清理数字中间的水印字符（如果误插入）
-        result = re.sub(r"(\d)[" + "".join(WATERMARK_CHARS) + r"]+(\d)", r"\1\2", result)
-        result = re.sub(r"(\d)[" + "".join(WATERMARK_CHARS) + r"]+(\.\d)", r"\1\2", result)
-        result = re.sub(r"(\d\.)[" + "".join(WATERMARK_CHARS) + r"]+(\d)", r"\1\2", result)
-        # 保留"1."这种格式（整数后跟点），不删除
-
-    if len(result) > 0:
-        if len(result) == 1 and result in SINGLE_CHAR_WHITELIST:
-            return result
-        # 对于配料字段，跳过valid_content_ratio检查，因为我们已经保留了所有字符
-        if field_context == "配料":
-            return result
-        # 对于烹饪方式字段，清理开头和结尾的水印字符
-        if field_context == "烹饪方式":
-            result = re.sub(r"^[" + "".join(WATERMARK_CHARS) + r"]+", "", result)
-            result = re.sub(r"[" + "".join(WATERMARK_CHARS) + r"]+$", "", result)
-            result = result.strip()
-        valid_content_ratio = len("".join(valid_words)) / len(result) if len(result) > 0 else 0
-        if valid_content_ratio < 0.3 and not any(field in result for field in COMMON_FIELDS):
-            return ""
-
-    return result
+            row_idx = len(self.rows)
+            self.rows.append(cells)
+            row_labels = []
+            cell_fields = [self.matcher.fields(cell) for cell in cells]
+            is_process_row = "餐厅操作工艺" in cell_fields[0]
+            for col, (cell, fields) in enumerate(zip(cells, cell_fields)):
+                if cell in BASIC_FIELD_LABELS or cell in ("烹饪方式", "配料"):
+                    row_labels.append((col, cell))
+                    self.positions[cell].append((row_idx, col))
+                if "烹饪方式" in fields:
+                    self.cooking_cells.append((row_idx, col))
+                if "制作工艺" in fields:
+                    is_process_row = True
+            self.labels.append(row_labels)
+            if "基本信息" in cell_fields[0]:
+                self.name_rows.add(row_idx)
+            if is_process_row:
+                # 含字段名、以数字开头（步骤序号）或长文本（跨页续写的步骤）的单元格视为工艺内容
+                self.process_cells[row_idx] = [
+                    cell for cell, fields in zip(cells, cell_fields)
+                    if "制作工艺" in fields or "烹饪方式" in fields or _LEADING_DIGIT_RE.match(cell.strip())
+                    or len(cell) > 10]
+
+    def next_cell(self, row_idx, col):
+        """标签右侧的单元格（字段值），不存在时返回None"""
+        cells = self.rows[row_idx]
+        return cells[col + 1] if col + 1 < len(cells) else None
+
+    def clean(self, cell, field_context):
+        """按字段上下文清洗单元格（同一单元格+上下文只清洗一次）"""
+        key = (cell, field_context)
+        if key not in self._clean_cache:
+            self._clean_cache[key] = self.cleaner.clean(cell, field_context=field_context)
+        return self._clean_cache[key]
+
+    def has_common_field(self, cell):
+        return self.matcher.has_field(cell)
+
+    def cooking_method(self, cell):
+        """烹饪方式字段值：清洗后去掉开头的水印字（如"品现调"应该变成"现调"）"""
+        value = self.clean(cell, "烹饪方式")
+        return self.cleaner.strip_leading_watermark(value) if value else value
+
+    def dish_name(self, row_idx):
+        """基本信息行中第一个不含通用字段名的单元格"""
+        for cell in self.rows[row_idx][1:]:
+            if not self.has_common_field(cell):
+                return cell
+        return None
+
+    def cooking_method_from_cells(self):
+        """从所有含“烹饪方式”的单元格中查找烹饪方式（格式“烹饪方式：xxx”或值在右侧单元格），结果只计算一次"""
+        if self._cooking_from_cells is None:
+            self._cooking_from_cells = ""
+            for row_idx, col in self.cooking_cells:
+                cell = self.rows[row_idx][col]
+                cooking_match = COOKING_METHOD_RE.search(cell)
+                if cooking_match:
+                    value = self.cooking_method(cooking_match.group(1))
+                    if value:
+                        self._cooking_from_cells = value
+                        break
+                elif self.next_cell(row_idx, col) is not None:
+                    value = self.cooking_method(self.next_cell(row_idx, col))
+                    if value and not self.matcher.is_label(value):
+                        self._cooking_from_cells = value
+                        break
+        return self._cooking_from_cells
 
-def parse_table(cleaned_table):
-    """解析表格，只提取“基本信息”和“餐厅操作工艺”核心内容"""
+def parse_table(cleaned_table, cleaner=None):
+    """解析表格，只提取“基本信息”和“餐厅操作工艺”核心内容；cleaner默认为get_cell_cleaner()
+    先一次扫描建立TableModel字段索引，再按行序处理有字段标签、品名或工艺内容的行"""
     basic_info = defaultdict(str)  # 基本信息（品名、味型等）
     kitchen_process = defaultdict(str)  # 餐厅操作工艺（烹饪方式、制作工艺）
-    current_dish = ""
-
-    for row in cleaned_table:
-        if not any(row):
-            continue
-        non_empty_cells = [cell for cell in row if cell]
-        if not non_empty_cells:
-            continue
+    cleaner = cleaner or get_cell_cleaner()
+    model = TableModel(cleaned_table, cleaner)
 
+    for row_idx in sorted(model.name_rows | model.process_cells.keys() | {r for r, labels in enumerate(model.labels) if labels}):
         # 1. 提取品名（基本信息核心）
-        if "基本信息" in non_empty_cells[0]:
-            for cell in non_empty_cells[1:]:
-                if cell and not any(field in cell for field in COMMON_FIELDS):
-                    current_dish = cell
-                    basic_info["品名"] = current_dish
-                    break
-
-        # 2. 提取基本信息子字段（味型、最佳风味期等）
-        for idx, cell in enumerate(non_empty_cells):
-            if cell in ["味型", "最佳风味期", "加工等级"]:
-                if idx + 1 < len(non_empty_cells):
-                    basic_info[cell] = clean_cell_smart(non_empty_cells[idx + 1], field_context=cell)
-            elif cell == "烹饪方式":
-                # 改进：单独提取烹饪方式字段
-                if idx + 1 < len(non_empty_cells):
-                    cooking_method = clean_cell_smart(non_empty_cells[idx + 1], field_context="烹饪方式")
-                    if cooking_method:
-                        # 清理开头的水印字符（如"品现调"应该变成"现调"）
-                        cooking_method = re.sub(r"^[" + "".join(WATERMARK_CHARS) + r"]+", "", cooking_method)
-                        if cooking_method:
-                            kitchen_process["烹饪方式"] = cooking_method
-                # 如果右侧单元格为空，尝试从当前单元格提取（格式：烹饪方式：xxx）
-                elif "烹饪方式" in cell:
-                    cooking_match = re.search(r"烹饪方式[:：]\s*(\S+)", cell)
-                    if cooking_match:
-                        cooking_value = clean_cell_smart(cooking_match.group(1), field_context="烹饪方式")
-                        # 清理开头的水印字符
-                        cooking_value = re.sub(r"^[" + "".join(WATERMARK_CHARS) + r"]+", "", cooking_value)
-                        if cooking_value:
-                            kitchen_process["烹饪方式"] = cooking_value
-            elif cell == "配料":
-                if idx + 1 < len(non_empty_cells):
-                    # 改进配料拆分逻辑，处理括号匹配
-                    # 注意：这里直接使用原始单元格内容，不再调用clean_cell_smart
-                    # 因为clean_cell_smart可能在提取阶段就已经删除了字符
-                    ingredients_str = str(non_empty_cells[idx + 1]) if non_empty_cells[idx + 1] else ""
-
-                    # 对于配料字段，使用最保守的策略：只做最基本的字符清理
-                    # 只删除明显不是中文、数字、标点的字符，不删除任何可能是有效字符的内容
-                    ingredients_str = re.sub(r"[^\u4e00-\u9fa5a-zA-Z0-9，。、；：（）【】《》！？·\s]", "", ingredients_str)
-                    ingredients_str = ingredients_str.replace("\n", "").strip()
-
-                    # 修复括号匹配问题
-                    ingredients_str = fix_brackets(ingredients_str)
-
-                    # 注意：对于配料字段，不进行任何水印字符的删除
-                    # 因为"鸡"、"老"、"菜"等字符在食材名称中很常见，不应该被删除
-
-                    ingredients = []
-                    start = 0
-                    bracket_count = 0  # 括号计数器，用于处理成对括号
-
-                    for i, c in enumerate(ingredients_str):
-                        if c == '（':
-                            bracket_count += 1
-                        elif c == '）':
-                            bracket_count -= 1
-                            if bracket_count < 0:  # 处理不匹配的右括号
-                                bracket_count = 0
-                        # 只在括号平衡且遇到分隔符时拆分
-                        elif bracket_count == 0 and c in ['、', '，']:
-                            ingredient = ingredients_str[start:i].strip()
-                            if ingredient:
-                                # 对于配料字段，只做最基本的清理，不删除任何字符
-                                # 只去除首尾空白和特殊控制字符
-                                cleaned_ingredient = ingredient.strip()
-                                # 只删除明显的无效字符（非中文、非数字、非标点）
-                                cleaned_ingredient = re.sub(r"[^\u4e00-\u9fa5a-zA-Z0-9，。、；：（）【】《》！？·\s]", "", cleaned_ingredient)
-                                if cleaned_ingredient:
-                                    ingredients.append(cleaned_ingredient)
-                            start = i + 1
-
-                    # 添加最后一个配料
-                    last_ingredient = ingredients_str[start:].strip()
-                    if last_ingredient:
-                        # 对于配料字段，只做最基本的清理，不删除任何字符
-                        cleaned_last = re.sub(r"[^\u4e00-\u9fa5a-zA-Z0-9，。、；：（）【】《》！？·\s]", "", last_ingredient)
-                        if cleaned_last:
-                            ingredients.append(cleaned_last)
-
-                    basic_info[cell] = ingredients
+        if row_idx in model.name_rows:
+            dish_name = model.dish_name(row_idx)
+            if dish_name:
+                basic_info["品名"] = dish_name
+
+        # 2. 提取基本信息子字段（味型、最佳风味期等）、烹饪方式和配料：值在标签右侧的单元格
+        for col, label in model.labels[row_idx]:
+            value_cell = model.next_cell(row_idx, col)
+            if value_cell is None:
+                continue
+            if label == "烹饪方式":
+                cooking_method = model.cooking_method(value_cell)
+                if cooking_method:
+                    kitchen_process["烹饪方式"] = cooking_method
+            elif label == "配料":
+                # 配料使用最保守的策略：直接使用原始单元格内容，只删除明显不是中文、数字、标点的字符
+                # 不进行任何水印字符的删除，因为"鸡"、"老"、"菜"等字符在食材名称中很常见
+                ingredients_str = cleaner.strip_ingredient_chars(str(value_cell))
+                ingredients_str = ingredients_str.replace("\n", "").strip()
+                # 修复括号匹配问题并在括号外的“、”“，”处拆分（同一遍扫描）
+                basic_info[label] = split_ingredients(ingredients_str, cleaner)
+            else:
+                basic_info[label] = model.clean(value_cell, label)
 
         # 3. 提取餐厅操作工艺（兼容跨页步骤合并）
-        if "餐厅操作工艺" in non_empty_cells[0] or any("制作工艺" in cell for cell in non_empty_cells):
-            process_content = []
-            for cell in non_empty_cells:
-                if cell and (any(field in cell for field in ["制作工艺", "烹饪方式"]) or re.match(r"\d+", cell.strip())):
-                    cleaned_cell = clean_cell_smart(cell, field_context="制作工艺")
-                    if cleaned_cell:
-                        process_content.append(cleaned_cell)
-                elif cell and len(cell) > 10:  # 长文本视为工艺步骤
-                    cleaned_cell = clean_cell_smart(cell, field_context="制作工艺")
-                    if cleaned_cell:
-                        process_content.append(cleaned_cell)
-
-            # 解析烹饪方式（改进：更全面的提取逻辑）
-            if not kitchen_process["烹饪方式"]:
-                # 方法1：从process_content中查找"烹饪方式"字段
-                for content in process_content:
-                    if "烹饪方式" in content:
-                        # 尝试多种格式：烹饪方式：xxx 或 烹饪方式xxx
-                        cooking_match = re.search(r"烹饪方式[:：]?\s*([^\s，。；：]+)", content)
-                        if cooking_match:
-                            cooking_value = clean_cell_smart(cooking_match.group(1), field_context="烹饪方式")
-                            # 清理开头的水印字符
-                            cooking_value = re.sub(r"^[" + "".join(WATERMARK_CHARS) + r"]+", "", cooking_value)
-                            if cooking_value:
-                                kitchen_process["烹饪方式"] = cooking_value
-                                break
-                # 方法2：从所有单元格中查找"烹饪方式"（如果还没找到）
-                if not kitchen_process["烹饪方式"]:
-                    for row in cleaned_table:
-                        non_empty_row_cells = [c for c in row if c]
-                        for idx, cell in enumerate(non_empty_row_cells):
-                            if "烹饪方式" in str(cell):
-                                # 尝试从当前单元格提取
-                                cooking_match = re.search(r"烹饪方式[:：]?\s*([^\s，。；：]+)", str(cell))
-                                if cooking_match:
-                                    cooking_value = clean_cell_smart(cooking_match.group(1), field_context="烹饪方式")
-                                    # 清理开头的水印字符
-                                    cooking_value = re.sub(r"^[" + "".join(WATERMARK_CHARS) + r"]+", "", cooking_value)
-                                    if cooking_value:
-                                        kitchen_process["烹饪方式"] = cooking_value
-                                        break
-                                # 或者从下一个单元格提取
-                                elif idx + 1 < len(non_empty_row_cells):
-                                    cooking_value = clean_cell_smart(non_empty_row_cells[idx + 1], field_context="烹饪方式")
-                                    # 清理开头的水印字符
-                                    cooking_value = re.sub(r"^[" + "".join(WATERMARK_CHARS) + r"]+", "", cooking_value)
-                                    if cooking_value and cooking_value not in COMMON_FIELDS:
-                                        kitchen_process["烹饪方式"] = cooking_value
-                                        break
-                            if kitchen_process["烹饪方式"]:
-                                break
-                        if kitchen_process["烹饪方式"]:
-                            break
-                # 方法3：兜底：从步骤中匹配单字烹饪方式
-                if not kitchen_process["烹饪方式"]:
-                    for word in jieba.lcut(" ".join(process_content)):
-                        if word in SINGLE_CHAR_WHITELIST:
-                            kitchen_process["烹饪方式"] = word
-                            break
-
-            # 解析制作工艺（合并跨页步骤）
-            process_steps = ""
+        if row_idx not in model.process_cells:
+            continue
+        process_content = []
+        for cell in model.process_cells[row_idx]:
+            cleaned_cell = model.clean(cell, "制作工艺")
+            if cleaned_cell:
+                process_content.append(cleaned_cell)
+
+        # 解析烹饪方式（改进：更全面的提取逻辑）
+        if not kitchen_process["烹饪方式"]:
+            # 方法1：从process_content中查找"烹饪方式"字段（格式：烹饪方式：xxx 或 烹饪方式xxx）
             for content in process_content:
-                if "制作工艺" in content:
-                    steps = re.sub(r"制作工艺.*?[:：]?", "", content).strip()
-                    process_steps += steps + " "
-                elif "烹饪方式" not in content:  # 排除烹饪方式内容，避免重复
-                    process_steps += content + " "
-            if process_steps:
-                # 修复制作工艺中的括号匹配问题
-                process_steps = fix_brackets(process_steps.strip())
-                kitchen_process["制作工艺"] = kitchen_process["制作工艺"] + process_steps
+                cooking_match = COOKING_METHOD_RE.search(content) if "烹饪方式" in content else None
+                if cooking_match:
+                    cooking_value = model.cooking_method(cooking_match.group(1))
+                    if cooking_value:
+                        kitchen_process["烹饪方式"] = cooking_value
+                        break
+            # 方法2：从所有含“烹饪方式”的单元格中查找（索引查找，整张表只计算一次）
+            if not kitchen_process["烹饪方式"]:
+                kitchen_process["烹饪方式"] = model.cooking_method_from_cells()
+            # 方法3：兜底：从步骤中匹配单字烹饪方式
+            if not kitchen_process["烹饪方式"]:
+                for word in cached_lcut(" ".join(process_content)):
+                    if word in SINGLE_CHAR_WHITELIST:
+                        kitchen_process["烹饪方式"] = word
+                        break
+
+        # 解析制作工艺（合并跨页步骤）
+        process_steps = ""
+        for content in process_content:
+            if "制作工艺" in content:
+                steps = re.sub(r"制作工艺.*?[:：]?", "", content).strip()
+                process_steps += steps + " "
+            elif "烹饪方式" not in content:  # 排除烹饪方式内容，避免重复
+                process_steps += content + " "
+        if process_steps:
+            # 修复制作工艺中的括号匹配问题
+            process_steps = fix_brackets(process_steps.strip())
+            kitchen_process["制作工艺"] = kitchen_process["制作工艺"] + process_steps
 
     # 确保字段结构完整（避免缺失）
     return {
@@ -472,99 +1240,632 @@ def parse_table(cleaned_table):
         "餐厅操作工艺": dict(kitchen_process) or {}
     }
 
+# ---------------------- 页面缓存（按页面内容哈希复用提取/清洗结果）----------------------
+def cleaning_rules_key():
+    """清洗规则指纹：规则版本号+水印字/字段/白名单/术语配置，任一变化都会使清洗层缓存失效"""
+    rules = {
+        "version": CLEAN_RULES_VERSION,
+        "watermark": sorted(WATERMARK_CHARS),
+        "fields": sorted(COMMON_FIELDS),
+        "field_synonyms": FIELD_SYNONYMS,
+        "whitelist": sorted(SINGLE_CHAR_WHITELIST),
+        "culinary_terms": sorted(CULINARY_TERMS),
+        "tokenizer": tokenizer_key(),
+        "profiles": CLEAN_PROFILES,
+    }
+    return hashlib.sha256(json.dumps(rules, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+def _hash_pdf_object(obj, digest, seen, depth=0):
+    """递归哈希PDF对象（字典、数组、流），引用对象只哈希一次"""
+    if isinstance(obj, PDFObjRef):
+        if obj.objid in seen or depth > 8:
+            digest.update(b"R")  # 不使用对象编号，保证相同内容在不同文件/页中哈希一致
+            return
+        seen.add(obj.objid)
+        obj = resolve1(obj)
+    if isinstance(obj, PDFStream):
+        _hash_pdf_object(obj.attrs, digest, seen, depth + 1)
+        # 使用解码后的数据：pdfminer解析页面后会丢弃流的原始数据（rawdata）
+        digest.update(obj.get_data() or b"")
+    elif isinstance(obj, dict):
+        for key in sorted(obj, key=str):
+            digest.update(str(key).encode("utf-8"))
+            _hash_pdf_object(obj[key], digest, seen, depth + 1)
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            _hash_pdf_object(item, digest, seen, depth + 1)
+    else:
+        digest.update(repr(obj).encode("utf-8"))
+
+def page_content_hash(page):
+    """页面内容哈希：内容流+引用的资源（字体、XObject等），不依赖页码"""
+    digest = hashlib.sha256()
+    _hash_pdf_object([page.bbox, page.page_obj.contents, page.page_obj.resources], digest, set())
+    return digest.hexdigest()
+
+class PageCache:
+    """基于SQLite的单页缓存：原始表格层只依赖页面内容，清洗层额外依赖清洗规则指纹"""
+
+    def __init__(self, path):
+        self.path = path
+        self.rules_key = cleaning_rules_key()
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS raw_tables (page_hash TEXT PRIMARY KEY, table_json TEXT)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS cleaned_rows (page_hash TEXT, rules_key TEXT, rows_json TEXT,"
+            " PRIMARY KEY (page_hash, rules_key))")
+        self.conn.commit()
+
+    def get_raw(self, page_hash):
+        """返回(是否命中, 原始表格)"""
+        row = self.conn.execute(
+            "SELECT table_json FROM raw_tables WHERE page_hash = ?", (page_hash,)).fetchone()
+        return (True, json.loads(row[0])) if row else (False, None)
+
+    def put_raw(self, page_hash, table):
+        self.conn.execute("INSERT OR REPLACE INTO raw_tables VALUES (?, ?)",
+                          (page_hash, json.dumps(table, ensure_ascii=False)))
+        self.conn.commit()
+
+    def get_cleaned(self, page_hash):
+        """返回(是否命中, 清洗后的行列表或None)"""
+        row = self.conn.execute(
+            "SELECT rows_json FROM cleaned_rows WHERE page_hash = ? AND rules_key = ?",
+            (page_hash, self.rules_key)).fetchone()
+        return (True, json.loads(row[0])) if row else (False, None)
+
+    def put_cleaned(self, page_hash, rows):
+        self.conn.execute("INSERT OR REPLACE INTO cleaned_rows VALUES (?, ?, ?)",
+                          (page_hash, self.rules_key, json.dumps(rows, ensure_ascii=False)))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# ---------------------- 内存受限的逐页读取 ----------------------
+def current_rss_mb():
+    """当前进程常驻内存（MB），读取/proc失败时退回峰值内存"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb(include_children=False)
+
+def peak_rss_mb(include_children=True):
+    """峰值常驻内存（MB），include_children时取本进程与已结束子进程（工作进程）中的最大值"""
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if include_children:
+        peak_kb = max(peak_kb, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak_kb / 1024
+
+def _relieve_memory(pdf, handle, memory_limit_mb):
+    """内存超过上限：先清空pdfminer的对象缓存，仍超限则重新打开PDF（丢弃全部解析状态）
+    返回(页面来源, 是否已回到上限以内)；重新打开后仍超限说明上限低于进程基线（jieba、词典等），再重开也无济于事"""
+    cached_objs = getattr(handle.doc, "_cached_objs", None)
+    if cached_objs is not None:
+        cached_objs.clear()
+    gc.collect()
+    if current_rss_mb() <= memory_limit_mb or pdf.path is None:
+        return handle, True
+    if handle is not pdf:
+        handle.close()
+    profile_count("memory_reopen")
+    handle = pdfplumber.open(pdf.path)
+    gc.collect()
+    if current_rss_mb() > memory_limit_mb:
+        profile_count("memory_limit_exceeded")
+        return handle, False
+    return handle, True
+
+def iter_pdf_pages(pdf, page_nums, low_memory=False, memory_limit_mb=None):
+    """按页码逐页产出页面对象
+    low_memory时每页处理完立即释放其解析缓存（字符、线条等），内存不再随页数线性增长；
+    设置memory_limit_mb时每页检查常驻内存，超限则清空对象缓存或重新打开PDF；
+    重新打开后仍超限时提示一次并不再尝试（只保留逐页释放），避免每页都重新打开PDF"""
+    handle = pdf
+    relieve = bool(memory_limit_mb)
+    try:
+        for page_num in page_nums:
+            page = handle.pages[page_num - 1]
+            yield page
+            if low_memory or memory_limit_mb:
+                page.close()
+            if relieve and current_rss_mb() > memory_limit_mb:
+                handle, relieve = _relieve_memory(pdf, handle, memory_limit_mb)
+                if not relieve:
+                    print(f"⚠️  内存上限{memory_limit_mb:g}MB低于进程基线（重新打开PDF后仍占用{current_rss_mb():.0f}MB），"
+                          f"不再清空缓存或重新打开PDF，只逐页释放解析缓存")
+    finally:
+        if handle is not pdf:
+            handle.close()
+
+# ---------------------- 单页看门狗（时间/内存预算）----------------------
+DEGRADE_REASONS = {"timeout": "超时", "memory": "超出内存预算", "crashed": "工作进程异常退出", "error": "提取出错"}
+
+def _address_space_limit(budget_mb):
+    """把地址空间软上限设为当前占用+budget_mb（budget_mb为None时恢复为硬上限），返回是否设置成功"""
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if budget_mb is None:
+        resource.setrlimit(resource.RLIMIT_AS, (hard, hard))
+        return True
+    try:
+        with open("/proc/self/statm") as f:
+            used = int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return False
+    soft = used + int(budget_mb * 2**20)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+    return True
+
+def _watchdog_worker(conn, pdf_path, watermark_filter, memory_budget_mb):
+    """看门狗工作进程：常驻打开PDF，按请求(页码, 是否降级)提取单页原始表格，返回(结果, 表格或错误信息)"""
+    with pdfplumber.open(pdf_path) as pdf:
+        conn.send(("ready", None))  # PDF打开后再开始计时，打开耗时不计入单页预算
+        while True:
+            request = conn.recv()
+            if request is None:
+                return
+            page_num, degraded = request
+            page = pdf.pages[page_num - 1]
+            limited = memory_budget_mb is not None and _address_space_limit(memory_budget_mb)
+            try:
+                if degraded:
+                    target = filter_watermark_chars(page) if watermark_filter else page
+                    result = ("ok", target.extract_table(DEGRADED_TABLE_SETTINGS))
+                else:
+                    result = ("ok", extract_raw_table(page, watermark_filter))
+            except MemoryError:
+                result = ("memory", None)
+            except Exception as exc:
+                result = ("error", f"{type(exc).__name__}: {exc}")
+            finally:
+                page.close()
+                if limited:
+                    _address_space_limit(None)
+            conn.send(result)
+
+class PageWatchdog:
+    """单页看门狗：在常驻工作进程中逐页提取原始表格，每页限时time_budget秒、限内存memory_budget_mb
+    超出预算（或提取出错、工作进程崩溃）的页终止并重启工作进程，用DEGRADED_TABLE_SETTINGS降级重试
+    （时间预算放宽为DEGRADED_TIME_FACTOR倍）；
+    仍失败则跳过该页（返回None，跨页合并视为表格边界）。降级/跳过的页记录在degraded中并计入剖析报告"""
+
+    def __init__(self, pdf_path, time_budget=None, memory_budget_mb=None, watermark_filter=False):
+        self.pdf_path = str(pdf_path)
+        self.time_budget = time_budget
+        self.memory_budget_mb = memory_budget_mb
+        self.worker_args = (self.pdf_path, watermark_filter, memory_budget_mb)
+        self.degraded = []
+        self._process = None
+        self._conn = None
+
+    def _start(self):
+        self._conn, child_conn = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(target=_watchdog_worker, args=(child_conn, *self.worker_args),
+                                                daemon=True)
+        self._process.start()
+        child_conn.close()
+        self._conn.recv()
+
+    def _stop(self, graceful=True):
+        if self._process is None:
+            return
+        if graceful:
+            try:
+                self._conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self._process.join(1)
+        if self._process.is_alive():
+            self._process.kill()
+            self._process.join()
+        self._conn.close()
+        self._process = None
+        self._conn = None
+
+    def _request(self, page_num, degraded):
+        """在工作进程中提取一页，返回(结果, 表格或错误信息)；超时/超内存/崩溃时重启工作进程"""
+        if self._process is None:
+            self._start()
+        self._conn.send((page_num, degraded))
+        budget = self.time_budget * DEGRADED_TIME_FACTOR if self.time_budget and degraded else self.time_budget
+        if not self._conn.poll(budget):
+            self._stop(graceful=False)
+            return "timeout", None
+        try:
+            outcome, value = self._conn.recv()
+        except EOFError:
+            self._stop(graceful=False)
+            return "crashed", None
+        if outcome != "ok":
+            self._stop(graceful=False)  # 出错（尤其是MemoryError）之后的解析状态不可靠，换一个新进程
+        return outcome, value
+
+    def extract(self, page_num):
+        """提取单页原始表格，返回(表格, 状态)：状态为"ok"、"degraded"（降级重试成功）或"skipped"（已跳过）"""
+        reasons = []
+        started = time.perf_counter()
+        for degraded in (False, True):
+            outcome, value = self._request(page_num, degraded)
+            if outcome == "ok":
+                if not degraded:
+                    return value, "ok"
+                self._record(page_num, "degraded", reasons, started)
+                return value, "degraded"
+            reasons.append(outcome if outcome != "error" else f"error: {value}")
+        self._record(page_num, "skipped", reasons, started)
+        return None, "skipped"
+
+    def _record(self, page_num, status, reasons, started):
+        entry = {"page": page_num, "status": status, "reasons": reasons,
+                 "seconds": round(time.perf_counter() - started, 3)}
+        self.degraded.append(entry)
+        profile_count(f"pages_{status}")
+        profile_degraded(entry)
+        print(describe_degraded(entry))
+
+    def close(self):
+        self._stop()
+
+def describe_degraded(entry):
+    """降级/跳过页的说明文字"""
+    reasons = "、".join(DEGRADE_REASONS.get(reason.split(":")[0], reason) for reason in entry["reasons"])
+    action = "已用低成本表格设置重新提取" if entry["status"] == "degraded" else "已跳过（视为表格边界）"
+    return f"第{entry['page']}页{reasons}，{action}（{entry['seconds']}秒）"
+
+# ---------------------- 字符层水印过滤 ----------------------
+def is_watermark_char(char):
+    """按字符属性判断水印字：大字号、旋转（非水平排列）或属于水印字体"""
+    if char["size"] >= WATERMARK_MIN_SIZE:
+        return True
+    a, b, c, d = char["matrix"][:4]
+    if abs(b) > 1e-6 or abs(c) > 1e-6:
+        return True
+    return bool(WATERMARK_FONTS) and char["fontname"].split("+", 1)[-1] in WATERMARK_FONTS
+
+def filter_watermark_chars(page):
+    """返回去掉水印字后的页面视图（pdfplumber对象过滤），表格线等其他对象不受影响"""
+    return page.filter(lambda obj: obj["object_type"] != "char" or not is_watermark_char(obj))
+
+def watermark_filter_key():
+    """字符过滤规则指纹：过滤模式下原始表格随规则变化，需区分缓存"""
+    rules = [WATERMARK_MIN_SIZE, sorted(WATERMARK_FONTS)]
+    return hashlib.sha256(json.dumps(rules).encode("utf-8")).hexdigest()[:16]
+
+# ---------------------- 页面预扫描（跳过无表格页）----------------------
+# 只解压页面内容流并用正则统计操作符，不做版面解析（单页约数毫秒，完整解析+表格检测约100~300毫秒）
+_CONTENT_OP_RE = re.compile(rb"(?<![^\s\]\)>])(re|l|Do|Tj|TJ|'|\")(?=[\s\[\(<]|$)")
+_XOBJECT_NAME_RE = re.compile(rb"/([^\s/\[\]()<>{}%]+)\s+Do(?=\s|$)")
+
+def _count_content_ops(streams, resources, stats, depth=0):
+    """统计内容流中的表格线、文字绘制和图片操作符；Form XObject递归统计（最多3层）"""
+    xobjects = resolve1(resolve1(resources or {}).get("XObject", {})) or {}
+    for stream in streams:
+        stream = resolve1(stream)
+        if not isinstance(stream, PDFStream):
+            continue
+        data = stream.get_data()
+        for match in _CONTENT_OP_RE.finditer(data):
+            op = match.group(1)
+            if op == b"re":
+                stats["rulings"] += 4
+            elif op == b"l":
+                stats["rulings"] += 1
+            elif op != b"Do":
+                stats["text_ops"] += 1
+        for name in _XOBJECT_NAME_RE.findall(data):
+            xobject = resolve1(xobjects.get(name.decode("latin-1")))
+            if not isinstance(xobject, PDFStream):
+                continue
+            subtype = resolve1(xobject.attrs.get("Subtype"))
+            if _name(subtype) == "Image":
+                stats["images"] += 1
+            elif _name(subtype) == "Form" and depth < 3:
+                _count_content_ops([xobject], xobject.attrs.get("Resources", resources), stats, depth + 1)
+
+def _name(value):
+    return getattr(value, "name", value)
+
+def prescan_page(page):
+    """预扫描单页：返回{"page", "rulings", "text_ops", "images", "table", "divider"}
+    table：表格线足够多，需要完整提取；divider：没有任何表格线和图片、文字很少的分节页（章节封面）。
+    带少量表格线或菜品图片的续页（跨页表格的最后几行）不算分节页"""
+    stats = {"page": page.page_number, "rulings": 0, "text_ops": 0, "images": 0}
+    contents = resolve1(page.page_obj.attrs.get("Contents"))
+    streams = contents if isinstance(contents, list) else [contents] if contents is not None else []
+    with profile_stage("prescan", page.page_number):
+        _count_content_ops(streams, page.page_obj.resources, stats)
+    stats["table"] = stats["rulings"] >= PRESCAN_MIN_RULINGS
+    stats["divider"] = stats["rulings"] == 0 and stats["images"] == 0 and stats["text_ops"] <= PRESCAN_DIVIDER_MAX_TEXT
+    return stats
+
+def prescan_pages(pdf, page_nums):
+    """预扫描页码列表，返回各页的统计（见prescan_page）"""
+    return [prescan_page(pdf.pages[page_num - 1]) for page_num in page_nums]
+
+def suggest_page_categories(pdf, scans):
+    """按分节页划分章节，建议PAGE_TO_CATEGORY：[(起始页, 结束页, 类别, 英文类别)]
+    每个含表格页的章节为一项，范围从章节内第一个表格页到下一个分节页之前；
+    类别取分节页的第一行文字（只解析这几页），无分节页或无文字时为"分类N"，英文类别为"sectionN"（请按需修改）"""
+    sections = []  # [分节页或None, [表格页...], 章节最后一页]
+    for scan in scans:
+        if scan["divider"] or not sections:
+            sections.append([scan["page"] if scan["divider"] else None, [], scan["page"]])
+        if scan["table"]:
+            sections[-1][1].append(scan["page"])
+        sections[-1][2] = scan["page"]
+    suggestions = []
+    for divider, table_pages, last_page in sections:
+        if not table_pages:
+            continue
+        index = len(suggestions) + 1
+        title = ""
+        if divider is not None:
+            text = pdf.pages[divider - 1].extract_text() or ""
+            title = next((line.strip() for line in text.splitlines() if line.strip()), "")
+        suggestions.append((table_pages[0], last_page, title or f"分类{index}", f"section{index}"))
+    return suggestions
+
+def _fill_skipped(page_nums, page_rows):
+    """在预扫描跳过的页码处补上(页码, None)（跨页合并视为表格边界），保持页码顺序"""
+    page_rows = iter(page_rows)
+    pending = next(page_rows, None)
+    for page_num in page_nums:
+        if pending is not None and pending[0] == page_num:
+            yield pending
+            pending = next(page_rows, None)
+        else:
+            profile_count("prescan_skipped")
+            yield page_num, None
+
+# ---------------------- 单页表格提取与清洗 ----------------------
+def clean_table_rows(table, cleaner=None):
+    """清洗单页表格行，返回非空行列表；cleaner默认为get_cell_cleaner()"""
+    cleaner = cleaner or get_cell_cleaner()
+    matcher = cleaner.field_matcher
+    # 注意：对于配料字段，需要保留所有字符，所以在提取阶段使用更保守的策略
+    cleaned_rows = []
+    for row in table:
+        # 先扫描这一行各单元格的字段名（每个单元格只扫描一次），检查这一行是否包含"配料"、"基本信息"字段
+        row_fields = [matcher.fields(str(cell)) if cell else set() for cell in row]
+        has_ingredient_field = any("配料" in fields for fields in row_fields)
+        has_basic_field = any("基本信息" in fields for fields in row_fields)
+
+        cleaned_row = []
+        for cell, cell_fields in zip(row, row_fields):
+            if cell:
+                cell_str = str(cell) if cell else ""
+                # 检查是否是配料相关的单元格
+                is_ingredient_cell = False
+
+                # 方法1：检查是否包含"配料"字段名
+                if "配料" in cell_fields:
+                    is_ingredient_cell = True
+                # 方法2：如果这一行包含"配料"字段，检查当前单元格是否是配料内容
+                elif has_ingredient_field:
+                    # 配料内容通常在"配料"字段的右侧
+                    if "配料" not in cell_fields:
+                        # 不是"配料"字段本身，可能是配料内容
+                        # 如果包含分隔符或括号，很可能是配料内容
+                        if any(c in cell_str for c in ['、', '，', '（', '）']) or len(cell_str) > 3:
+                            is_ingredient_cell = True
+
+                # 方法3：检查是否包含常见食材字符（如"菜"、"鸡"、"汤"等）
+                # 这些字符在水印列表中，但在食材名称中很常见
+                common_ingredient_chars = {"菜", "鸡", "汤", "油", "肉", "盐"}
+                if not is_ingredient_cell and any(char in cell_str for char in common_ingredient_chars):
+                    # 如果单元格包含常见食材字符，且不是字段名，很可能是食材相关内容
+                    if not matcher.has_field(cell_str):
+                        is_ingredient_cell = True
+
+                # 方法4：检查是否是品名（通常在"基本信息"行的右侧）
+                if has_basic_field and not is_ingredient_cell:
+                    # 如果这一行包含"基本信息"，且当前单元格不是字段名，可能是品名
+                    if "基本信息" not in cell_fields and not matcher.has_field(cell_str):
+                        is_ingredient_cell = True
+
+                if is_ingredient_cell:
+                    # 对于配料/品名单元格，使用配料上下文，保护所有字符
+                    cleaned_cell = cleaner.clean(cell, field_context="配料")
+                else:
+                    # 对于其他单元格，正常处理
+                    cleaned_cell = cleaner.clean(cell)
+                cleaned_row.append(cleaned_cell)
+            else:
+                cleaned_row.append("")
+        if any(cleaned_row):
+            cleaned_rows.append(cleaned_row)
+    return cleaned_rows
+
+def extract_raw_table(page, watermark_filter=False):
+    """提取单页原始表格；watermark_filter=True时先按字符属性去掉水印字再提取"""
+    if watermark_filter:
+        page = filter_watermark_chars(page)
+    return page.extract_table()
+
+def _page_raw_table(page, watermark_filter, watchdog):
+    """单页原始表格及状态（见PageWatchdog.extract）；不使用看门狗时状态总是ok"""
+    if watchdog is not None:
+        return watchdog.extract(page.page_number)
+    return extract_raw_table(page, watermark_filter), "ok"
+
+def extract_page_rows(page, cache=None, watermark_filter=False, watchdog=None):
+    """提取并清洗单页表格；页面无表格或被看门狗跳过时返回None（作为跨页合并的表格边界）
+    watermark_filter=True时在字符层去掉水印字，之后只做不依赖分词的基础清洗
+    watchdog为PageWatchdog时在其工作进程中限时限内存提取；降级或跳过的结果不写入缓存"""
+    page_num = page.page_number
+    cleaner = get_cell_cleaner(watermark_free=watermark_filter)
+    if cache is None:
+        with profile_stage("extract", page_num):
+            table, _ = _page_raw_table(page, watermark_filter, watchdog)
+        with profile_stage("clean", page_num):
+            return clean_table_rows(table, cleaner) if table else None
+
+    page_hash = page_content_hash(page)
+    if watermark_filter:
+        page_hash += ":wf" + watermark_filter_key()
+    hit, rows = cache.get_cleaned(page_hash)
+    if hit:
+        profile_count("page_cache_hits_cleaned")
+        return rows
+    hit, table = cache.get_raw(page_hash)
+    status = "ok"
+    if hit:
+        profile_count("page_cache_hits_raw")
+    else:
+        profile_count("page_cache_misses")
+        with profile_stage("extract", page_num):
+            table, status = _page_raw_table(page, watermark_filter, watchdog)
+        if status == "ok":
+            cache.put_raw(page_hash, table)
+    with profile_stage("clean", page_num):
+        rows = clean_table_rows(table, cleaner) if table else None
+    if status == "ok":
+        cache.put_cleaned(page_hash, rows)
+    return rows
+
+def _extract_page_chunk(task):
+    """进程池工作函数：每个进程独立打开PDF（和缓存），提取并清洗一段连续页码"""
+    (pdf_path, page_nums, cache_path, profile, low_memory, memory_limit_mb,
+     watermark_filter, page_time_budget, page_memory_mb) = task
+    cache = PageCache(cache_path) if cache_path else None
+    watchdog = PageWatchdog(pdf_path, page_time_budget, page_memory_mb, watermark_filter) \
+        if page_time_budget or page_memory_mb else None
+    try:
+        with (profile_run() if profile else nullcontext()) as profiler:
+            with profile_stage("open"):
+                pdf = pdfplumber.open(pdf_path)
+            with pdf:
+                pages = iter_pdf_pages(pdf, page_nums, low_memory, memory_limit_mb)
+                results = [(page_num, extract_page_rows(page, cache, watermark_filter, watchdog))
+                           for page_num, page in zip(page_nums, pages)]
+            return results, (profiler.snapshot() if profiler else None)
+    finally:
+        if watchdog:
+            watchdog.close()
+        if cache:
+            cache.close()
+
+def split_page_chunks(page_nums, workers):
+    """把页码列表切分成连续的块（块数约为进程数的4倍，便于负载均衡）"""
+    chunk_size = max(1, -(-len(page_nums) // (workers * 4)))
+    return [page_nums[i:i + chunk_size] for i in range(0, len(page_nums), chunk_size)]
+
+def iter_page_rows(pdf, page_nums, workers=1, cache_path=None, low_memory=False, memory_limit_mb=None,
+                   watermark_filter=False, page_time_budget=None, page_memory_mb=None):
+    """按页码顺序逐页产出(页码, 清洗后的行列表或None)；workers>1时使用进程池并行提取
+    low_memory/memory_limit_mb见iter_pdf_pages；并行时内存上限由主进程和各工作进程平分
+    watermark_filter=True时在字符层过滤水印字，见extract_page_rows
+    page_time_budget/page_memory_mb为单页预算（秒/MB），设置任一项时每页在看门狗工作进程中提取，见PageWatchdog"""
+    use_watchdog = bool(page_time_budget or page_memory_mb)
+    if use_watchdog and pdf.path is None:
+        raise ValueError("单页预算需要通过文件路径打开PDF（pdfplumber.open(路径)）")
+    if workers <= 1 or len(page_nums) <= 1:
+        cache = PageCache(cache_path) if cache_path else None
+        watchdog = PageWatchdog(pdf.path, page_time_budget, page_memory_mb, watermark_filter) if use_watchdog else None
+        try:
+            pages = iter_pdf_pages(pdf, page_nums, low_memory, memory_limit_mb)
+            for page_num, page in zip(page_nums, pages):
+                yield page_num, extract_page_rows(page, cache, watermark_filter, watchdog)
+        finally:
+            if watchdog:
+                watchdog.close()
+            if cache:
+                cache.close()
+        return
+
+    if pdf.path is None:
+        raise ValueError("并行提取需要通过文件路径打开PDF（pdfplumber.open(路径)）")
+    profile = _profiler is not None
+    worker_limit_mb = memory_limit_mb / (workers + 1) if memory_limit_mb else None
+    tasks = [(str(pdf.path), chunk, cache_path, profile, low_memory, worker_limit_mb,
+              watermark_filter, page_time_budget, page_memory_mb)
+             for chunk in split_page_chunks(page_nums, workers)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # 按提交顺序取结果，保证页面顺序与串行一致；最多预提交2倍进程数的块，内存占用不随页数增长
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(_extract_page_chunk, task))
+            if len(pending) >= workers * 2:
+                yield from _chunk_results(pending.popleft())
+        while pending:
+            yield from _chunk_results(pending.popleft())
+
+def _chunk_results(future):
+    """取出工作进程的结果，并把其剖析数据合并到主进程"""
+    results, snapshot = future.result()
+    if snapshot and _profiler is not None:
+        _profiler.merge(snapshot)
+    return results
+
 # ---------------------- 跨页表格合并（记录表格对应的页码）----------------------
-def merge_cross_page_tables_with_page_num(pdf, start_page, end_page):
-    """合并跨页表格，并记录每个表格的“起始页码”（用于确定类别和图片路径）"""
-    merged_tables = []  # 元素格式：(合并后的表格, 表格起始页码)
-    current_table = []
-    current_table_start_page = None  # 当前表格的起始页码
+def iter_merged_tables(pdf, start_page, end_page, on_page=None, prescan=False, **options):
+    """逐个产出合并后的跨页表格(表格, 表格起始页码)，表格一旦结束（遇到新表格或无表格页）立即产出
+    on_page(页码, 已处理页数, 总页数)在每页提取完成后调用（用于进度显示）
+    prescan=True时先预扫描（见prescan_page），只完整提取候选表格页，其余页视为无表格页
+    options为单页提取选项（workers、cache_path、low_memory等），见iter_page_rows"""
     total_pages = len(pdf.pages)
     start_idx = start_page - 1
     end_idx = end_page - 1 if end_page and end_page <= total_pages else total_pages - 1
+    page_nums = list(range(start_idx + 1, end_idx + 2))  # 实际页码（从1开始）
 
-    for page_idx in range(start_idx, end_idx + 1):
-        current_page_num = page_idx + 1  # 实际页码（从1开始）
-        page = pdf.pages[page_idx]
-        table = page.extract_table()
-
-        if not table:
+    # 各页的提取与清洗可并行；跨页延续判断必须按页码顺序在merge_page_rows中串行进行
+    if prescan:
+        candidates = [scan["page"] for scan in prescan_pages(pdf, page_nums) if scan["table"]]
+        print(f"预扫描：{len(page_nums)}页中{len(candidates)}页可能含表格，跳过{len(page_nums) - len(candidates)}页")
+        page_rows = _fill_skipped(page_nums, iter_page_rows(pdf, candidates, **options))
+    else:
+        page_rows = iter_page_rows(pdf, page_nums, **options)
+    if on_page is not None:
+        page_rows = _report_pages(page_rows, on_page, len(page_nums))
+    yield from merge_page_rows(page_rows)
+
+def _report_pages(page_rows, on_page, total):
+    for pages_done, (page_num, rows) in enumerate(page_rows, 1):
+        on_page(page_num, pages_done, total)
+        yield page_num, rows
+
+def merge_page_rows(page_rows):
+    """按页码顺序合并跨页表格：page_rows为(页码, 清洗后的行列表或None)序列，逐个产出(表格, 表格起始页码)"""
+    current_table = []
+    current_table_start_page = None  # 当前表格的起始页码
+    for current_page_num, cleaned_rows in page_rows:
+        if cleaned_rows is None:
             # 保存当前未完成的表格
             if current_table:
-                merged_tables.append((current_table, current_table_start_page))
+                yield current_table, current_table_start_page
                 current_table = []
                 current_table_start_page = None
             continue
 
-        # 清洗当前页表格行
-        # 注意：对于配料字段，需要保留所有字符，所以在提取阶段使用更保守的策略
-        cleaned_rows = []
-        for row in table:
-            # 先检查这一行是否包含"配料"字段
-            row_str = " ".join(str(cell) if cell else "" for cell in row)
-            has_ingredient_field = "配料" in row_str
-
-            cleaned_row = []
-            for cell in row:
-                if cell:
-                    cell_str = str(cell) if cell else ""
-                    # 检查是否是配料相关的单元格
-                    is_ingredient_cell = False
-
-                    # 方法1：检查是否包含"配料"字段名
-                    if "配料" in cell_str:
-                        is_ingredient_cell = True
-                    # 方法2：如果这一行包含"配料"字段，检查当前单元格是否是配料内容
-                    elif has_ingredient_field:
-                        # 配料内容通常在"配料"字段的右侧
-                        if "配料" not in cell_str:
-                            # 不是"配料"字段本身，可能是配料内容
-                            # 如果包含分隔符或括号，很可能是配料内容
-                            if any(c in cell_str for c in ['、', '，', '（', '）']) or len(cell_str) > 3:
-                                is_ingredient_cell = True
-
-                    # 方法3：检查是否包含常见食材字符（如"菜"、"鸡"、"汤"等）
-                    # 这些字符在水印列表中，但在食材名称中很常见
-                    common_ingredient_chars = {"菜", "鸡", "汤", "油", "肉", "盐"}
-                    if not is_ingredient_cell and any(char in cell_str for char in common_ingredient_chars):
-                        # 如果单元格包含常见食材字符，且不是字段名，很可能是食材相关内容
-                        if not any(field in cell_str for field in COMMON_FIELDS):
-                            is_ingredient_cell = True
-
-                    # 方法4：检查是否是品名（通常在"基本信息"行的右侧）
-                    if "基本信息" in row_str and not is_ingredient_cell:
-                        # 如果这一行包含"基本信息"，且当前单元格不是字段名，可能是品名
-                        if "基本信息" not in cell_str and not any(field in cell_str for field in COMMON_FIELDS):
-                            is_ingredient_cell = True
-
-                    if is_ingredient_cell:
-                        # 对于配料/品名单元格，使用配料上下文，保护所有字符
-                        cleaned_cell = clean_cell_smart(cell, field_context="配料")
-                    else:
-                        # 对于其他单元格，正常处理
-                        cleaned_cell = clean_cell_smart(cell)
-                    cleaned_row.append(cleaned_cell)
-                else:
-                    cleaned_row.append("")
-            if any(cleaned_row):
-                cleaned_rows.append(cleaned_row)
-
         # 改进跨页判断：更准确地检测表格延续
         # 判断是否为跨页延续：
         # 1. 当前表格不为空
         # 2. 新页首行不包含核心字段（基本信息、餐厅操作工艺等）
         # 3. 新页首行与上一页最后一行在结构上连续（列数相同或相似）
         is_continue = False
-        if len(current_table) > 0 and len(cleaned_rows) > 0:
-            first_row_str = "".join(str(cell) for cell in cleaned_rows[0])
-            has_core_field = any(field in first_row_str for field in COMMON_FIELDS)
-
-            # 如果首行没有核心字段，且列数匹配，则视为延续
-            if not has_core_field:
-                last_row_cols = len([c for c in current_table[-1] if c])
-                first_row_cols = len([c for c in cleaned_rows[0] if c])
-                # 列数相同或相差不超过1，视为延续
-                if abs(last_row_cols - first_row_cols) <= 1:
-                    is_continue = True
+        with profile_stage("merge", current_page_num):
+            if len(current_table) > 0 and len(cleaned_rows) > 0:
+                first_row_str = "".join(str(cell) for cell in cleaned_rows[0])
+                has_core_field = get_field_matcher().has_field(first_row_str)
+
+                # 如果首行没有核心字段，且列数匹配，则视为延续
+                if not has_core_field:
+                    last_row_cols = len([c for c in current_table[-1] if c])
+                    first_row_cols = len([c for c in cleaned_rows[0] if c])
+                    # 列数相同或相差不超过1，视为延续
+                    if abs(last_row_cols - first_row_cols) <= 1:
+                        is_continue = True
 
         if is_continue:
             # 延续上一表格，不修改起始页码
@@ -572,20 +1873,74 @@ def merge_cross_page_tables_with_page_num(pdf, start_page, end_page):
         else:
             # 保存上一表格，开始新表格（记录新表格的起始页码）
             if current_table:
-                merged_tables.append((current_table, current_table_start_page))
-            current_table = cleaned_rows
+                yield current_table, current_table_start_page
+            current_table = list(cleaned_rows)  # 复制：延续时会追加行，不修改调用方的单页结果
             current_table_start_page = current_page_num  # 新表格的起始页码为当前页
 
     # 保存最后一个表格
     if current_table and current_table_start_page:
-        merged_tables.append((current_table, current_table_start_page))
+        yield current_table, current_table_start_page
 
-    return merged_tables
+def merge_cross_page_tables_with_page_num(pdf, start_page, end_page, **options):
+    """合并跨页表格，并记录每个表格的“起始页码”（用于确定类别和图片路径）"""
+    # 元素格式：(合并后的表格, 表格起始页码)
+    return list(iter_merged_tables(pdf, start_page, end_page, **options))
 
 # ---------------------- 主逻辑（按页码分类别+格式化图片路径）----------------------
-def extract_dish_info_final(pdf_path, start_page, end_page=None):
-    all_dishes = []
-    with pdfplumber.open(pdf_path) as pdf:
+def parse_dish(table, table_start_page, cleaner=None, structured_steps=False):
+    """解析阶段：合并表格 → {"基本信息", "餐厅操作工艺"}
+    structured_steps=True时在“餐厅操作工艺”中追加份数和步骤（见parse_process_steps），原有字段不变"""
+    with profile_stage("parse", table_start_page):
+        parsed_data = parse_table(table, cleaner)
+        if structured_steps:
+            process = parsed_data["餐厅操作工艺"]
+            process.update(parse_process_steps(process.get("制作工艺", "")))
+    return parsed_data
+
+def assemble_dish(parsed_data, table_start_page, page_to_category=None, default_category=None):
+    """分类阶段：按表格起始页码确定类别和图片路径，组装最终输出字段
+    page_to_category/default_category为该PDF的类别配置，见get_category_by_page"""
+    with profile_stage("categorize", table_start_page):
+        # 1. 根据表格起始页码获取类别
+        dish_category,dish_category_eng = get_category_by_page(
+            table_start_page, page_to_category, default_category)
+
+        # 2. 格式化图片路径：类别_page_页码_img.png
+        # img_path = f"{dish_category}_page_{table_start_page}_img.png"
+        # （可选）如果需要图片路径带目录，比如 output/images/xxx.png，可改为：
+        img_path = f"./images/{dish_category_eng}_page_{table_start_page}_img.png"
+
+    # 3. 组装最终输出字段（严格保留4个指定字段）
+    return {
+        "基本信息": parsed_data["基本信息"],
+        "餐厅操作工艺": parsed_data["餐厅操作工艺"],
+        "图片": img_path,
+        "类别": dish_category
+    }
+
+def build_dish(table, table_start_page, table_idx, page_to_category=None, default_category=None, cleaner=None,
+               structured_steps=False):
+    """解析单个合并表格并组装指定字段（parse_dish+assemble_dish）；未识别到品名时返回None"""
+    parsed_data = parse_dish(table, table_start_page, cleaner, structured_steps)
+    final_dish = assemble_dish(parsed_data, table_start_page, page_to_category, default_category)
+
+    # 过滤无品名的无效数据
+    dish_name = parsed_data["基本信息"].get("品名")
+    if dish_name:
+        print(f"表格{table_idx+1}：{dish_name} → 类别：{final_dish['类别']} → 图片：{final_dish['图片']}")
+        return final_dish
+    print(f"表格{table_idx+1}未识别到品名，跳过")
+    return None
+
+def iter_dishes(pdf_path, start_page, end_page=None, page_to_category=None, default_category=None, **options):
+    """流式提取：跨页合并每结束一个表格就解析并产出对应菜品（下游可在提取完成前开始消费）
+    page_to_category/default_category为该PDF的类别配置（不指定则用模块配置）
+    options为单页提取选项（workers、cache_path、low_memory等，见iter_page_rows）、进度回调on_page和预扫描prescan
+    （见iter_merged_tables）及structured_steps（见build_dish）"""
+    structured_steps = options.pop("structured_steps", False)
+    with profile_stage("open"):
+        pdf = pdfplumber.open(pdf_path)
+    with pdf:
         total_pages = len(pdf.pages)
         # 页码合法性校验
         if start_page < 1:
@@ -598,56 +1953,197 @@ def extract_dish_info_final(pdf_path, start_page, end_page=None):
             start_page, end_page = end_page, start_page
         print(f"正在提取页码范围：{start_page} - {end_page}")
 
-        # 合并跨页表格（带起始页码）
-        merged_tables = merge_cross_page_tables_with_page_num(pdf, start_page, end_page)
-        print(f"合并后表格数量：{len(merged_tables)}")
-
-        # 解析每个表格并组装指定字段
-        for table_idx, (table, table_start_page) in enumerate(merged_tables):
-            parsed_data = parse_table(table)
-            dish_name = parsed_data["基本信息"].get("品名", f"未命名菜品_{table_idx+1}")
-
-            # 1. 根据表格起始页码获取类别
-            dish_category,dish_category_eng = get_category_by_page(table_start_page)
-
-            # 2. 格式化图片路径：类别_page_页码_img.png
-            # img_path = f"{dish_category}_page_{table_start_page}_img.png"
-            # （可选）如果需要图片路径带目录，比如 output/images/xxx.png，可改为：
-            img_path = f"./images/{dish_category_eng}_page_{table_start_page}_img.png"
-
-            # 3. 组装最终输出字段（严格保留4个指定字段）
-            final_dish = {
-                "基本信息": parsed_data["基本信息"],
-                "餐厅操作工艺": parsed_data["餐厅操作工艺"],
-                "图片": img_path,
-                "类别": dish_category
-            }
-
-            # 过滤无品名的无效数据
-            if parsed_data["基本信息"].get("品名"):
-                all_dishes.append(final_dish)
-                print(f"表格{table_idx+1}：{dish_name} → 类别：{dish_category} → 图片：{img_path}")
-            else:
-                print(f"表格{table_idx+1}未识别到品名，跳过")
-
-    return all_dishes
+        # 合并跨页表格（带起始页码），逐个解析
+        cleaner = get_cell_cleaner(watermark_free=options.get("watermark_filter", False))
+        table_count = 0
+        for table_idx, (table, table_start_page) in enumerate(
+                iter_merged_tables(pdf, start_page, end_page, **options)):
+            table_count += 1
+            final_dish = build_dish(table, table_start_page, table_idx, page_to_category, default_category, cleaner,
+                                    structured_steps)
+            if final_dish:
+                yield final_dish
+        print(f"合并后表格数量：{table_count}")
+
+def extract_dish_info_final(pdf_path, start_page, end_page=None, page_to_category=None, default_category=None,
+                            **options):
+    return list(iter_dishes(pdf_path, start_page, end_page, page_to_category, default_category, **options))
+
+def write_dishes_json(dishes, output_path):
+    """写入JSON文件（严格保留指定4个字段）"""
+    with profile_stage("write"):
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(dishes, f, ensure_ascii=False, indent=2)
+
+def write_dishes_jsonl(dishes, output_path):
+    """以JSON Lines格式流式写出菜品（每行一道菜，逐行刷新），返回写出的数量和第一条数据"""
+    count = 0
+    first_dish = None
+    with open(output_path, "w", encoding="utf-8") as f:
+        for dish in dishes:
+            with profile_stage("write"):
+                f.write(json.dumps(dish, ensure_ascii=False) + "\n")
+                f.flush()
+            if first_dish is None:
+                first_dish = dish
+            count += 1
+    return count, first_dish
 
 # ---------------------- 执行提取 ----------------------
+def extraction_options(args):
+    """命令行参数→单页提取选项"""
+    return {
+        "workers": args.workers,
+        "cache_path": args.cache,
+        "low_memory": args.low_memory or bool(args.memory_limit),
+        "memory_limit_mb": args.memory_limit,
+        "watermark_filter": args.watermark_filter,
+        "structured_steps": args.structured_steps,
+        "page_time_budget": args.page_timeout,
+        "page_memory_mb": args.page_memory,
+        "prescan": args.prescan,
+    }
+
+def run_extraction(args, output_path):
+    """按命令行参数提取并写出结果，返回(菜品数量, 第一条数据)"""
+    options = extraction_options(args)
+    if args.jsonl:
+        dish_iter = iter_dishes(PDF_PATH, START_PAGE, END_PAGE, **options)
+        return write_dishes_jsonl(dish_iter, output_path)
+
+    dishes = extract_dish_info_final(PDF_PATH, START_PAGE, END_PAGE, **options)
+    write_dishes_json(dishes, output_path)
+    return len(dishes), (dishes[0] if dishes else None)
+
+def run_image_stage(args, output_path):
+    """图片阶段：按写出的菜品为每道菜生成多尺寸图片（未变化的图片跳过）"""
+    import extract_images  # 图片阶段依赖Pillow，仅在需要时导入
+    with profile_stage("images"):
+        image_stats = extract_images.extract_dish_images(
+            PDF_PATH, extract_outputs.load_dishes(output_path), args.images, args.workers)
+    extract_images.print_image_stats(image_stats, args.images)
+
+def run_pipeline(args, output_path):
+    """提取菜品，并按需生成分片输出、紧凑编码、检索索引、运行图片阶段，返回(菜品数量, 第一条数据)"""
+    result = run_extraction(args, output_path)
+    if args.index or args.shards or args.compact or args.sqlite:
+        write_derived_outputs(args, extract_outputs.load_dishes(output_path))
+    if args.images:
+        run_image_stage(args, output_path)
+    return result
+
+def write_derived_outputs(args, dishes):
+    """按命令行参数写出分片输出、紧凑编码、检索索引和SQLite数据库"""
+    if args.shards:
+        with profile_stage("write"):
+            manifest = extract_outputs.write_category_shards(dishes, args.shards, category_shard_names())
+        extract_outputs.print_shard_summary(manifest, args.shards)
+    if args.compact:
+        with profile_stage("write"):
+            size = extract_outputs.write_compact(dishes, args.compact)
+        print(f"紧凑编码：{args.compact}（{size}字节）")
+    if args.index:
+        with profile_stage("write"):
+            index = extract_outputs.write_search_index(dishes, args.index)
+        print(f"检索索引：{args.index}（{len(index['fields']['配料'])}个配料检索词，{len(index['name_ngrams'])}个品名n-gram）")
+    if args.sqlite:
+        edition = args.edition or os.path.splitext(os.path.basename(PDF_PATH))[0]
+        with profile_stage("write"):
+            count = extract_outputs.write_sqlite(dishes, args.sqlite, edition)
+        print(f"SQLite数据库：{args.sqlite}（版本{edition}，{count}道菜品）")
+
 if __name__ == "__main__":
     # 安装依赖提示（首次运行需执行）
     # print("请确保已安装依赖：pip install pdfplumber jieba")
-
-    dishes = extract_dish_info_final(PDF_PATH, START_PAGE, END_PAGE)
-
-    # 写入JSON文件（严格保留指定4个字段）
-    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
-        json.dump(dishes, f, ensure_ascii=False, indent=2)
+    parser = argparse.ArgumentParser(description="从PDF中提取菜品信息并输出JSON")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="并行提取的进程数（默认%(default)s，1表示串行）")
+    parser.add_argument("--cache", default=CACHE_PATH, help="页面缓存数据库路径（不指定则不启用缓存）")
+    parser.add_argument("--watermark-filter", action="store_true", default=WATERMARK_FILTER,
+                        help="表格提取前按字符属性（字号/旋转/字体）去掉水印字，跳过基于分词的水印清洗（更快）")
+    parser.add_argument("--structured-steps", action="store_true", default=STRUCTURED_STEPS,
+                        help="在“餐厅操作工艺”中追加份数和结构化步骤（用量、时长）")
+    parser.add_argument("--low-memory", action="store_true", default=LOW_MEMORY,
+                        help="逐页释放解析缓存，内存占用不随页数增长（超大PDF使用）")
+    parser.add_argument("--memory-limit", type=float, default=MEMORY_LIMIT_MB, metavar="MB",
+                        help="常驻内存上限（MB），超限时清空解析缓存或重新打开PDF（隐含--low-memory）")
+    parser.add_argument("--page-timeout", type=float, default=PAGE_TIME_BUDGET, metavar="SECONDS",
+                        help="单页表格提取的时间预算：每页在看门狗工作进程中提取，超时的页用低成本表格设置重试，仍超时则跳过")
+    parser.add_argument("--page-memory", type=float, default=PAGE_MEMORY_BUDGET_MB, metavar="MB",
+                        help="单页表格提取的内存预算（MB），超出时同样降级重试或跳过")
+    parser.add_argument("--prescan", action="store_true", default=PRESCAN,
+                        help="完整提取前预扫描页面内容流（表格线/文字/图片操作符计数），跳过不可能含菜品表格的页")
+    parser.add_argument("--suggest-categories", action="store_true",
+                        help="只预扫描页码范围，按分节页输出建议的PAGE_TO_CATEGORY后退出")
+    parser.add_argument("--jsonl", action="store_true", help="以JSON Lines格式流式输出（每提取一道菜写一行）")
+    parser.add_argument("--output", help=f"输出文件路径（默认{OUTPUT_JSON}，--jsonl时默认{OUTPUT_JSONL}）")
+    parser.add_argument("--shards", metavar="SHARD_DIR",
+                        help="同时按类别分片输出：概要清单manifest.json+各类别详情分片（文件名带内容哈希，供前端按需加载）")
+    parser.add_argument("--compact", metavar="PATH",
+                        help="同时写出紧凑列式编码（按扩展名选择.json/.msgpack，可加.gz/.br压缩，解码见extract_outputs.read_compact）")
+    parser.add_argument("--index", metavar="INDEX_JSON",
+                        help="同时生成前端预构建检索索引（配料/味型/烹饪方式/类别倒排索引、品名n-gram、类别计数）")
+    parser.add_argument("--sqlite", metavar="DB",
+                        help="同时写入SQLite数据库（菜品/配料/步骤表，品名/配料/制作工艺FTS5全文索引，查询见extract_outputs.py query）")
+    parser.add_argument("--edition", help="写入SQLite时的版本名（同名版本整体替换，默认为PDF文件名）")
+    parser.add_argument("--images", metavar="IMAGE_DIR",
+                        help="提取完成后运行图片阶段，把菜品图片的多尺寸WebP/AVIF写入该目录（需要Pillow，见extract_images.py）")
+    parser.add_argument("--rebuild-dict", action="store_true",
+                        help="提取前重新构建预构建分词词典（词典不存在或餐饮术语变化时会自动构建）")
+    parser.add_argument("--watch", metavar="CONFIG",
+                        help="监视模式：PDF常驻内存，配置文件（TOML/JSON）变化后只重新运行受影响的阶段（见extract_watch.py，串行提取，忽略--workers/--cache）")
+    parser.add_argument("--profile", metavar="REPORT_JSON", help="启用剖析，把各阶段/各页耗时与计数写入该JSON报告")
+    parser.add_argument("--profile-top", type=int, default=10, help="剖析摘要中列出的最慢页数（默认%(default)s）")
+    args = parser.parse_args()
+    output_path = args.output or (OUTPUT_JSONL if args.jsonl else OUTPUT_JSON)
+
+    if args.rebuild_dict and TOKENIZER_DICT_PATH:
+        header = build_tokenizer_dict()
+        print(f"已重新构建分词词典：{TOKENIZER_DICT_PATH}（{header['words']}个词条，新增餐饮术语{header['added']}个）")
+
+    if args.suggest_categories:
+        with pdfplumber.open(PDF_PATH) as pdf:
+            end_page = END_PAGE if END_PAGE and END_PAGE <= len(pdf.pages) else len(pdf.pages)
+            started = time.perf_counter()
+            scans = prescan_pages(pdf, list(range(max(START_PAGE, 1), end_page + 1)))
+            elapsed = time.perf_counter() - started
+            suggestions = suggest_page_categories(pdf, scans)
+        tables = sum(scan["table"] for scan in scans)
+        dividers = [scan["page"] for scan in scans if scan["divider"]]
+        print(f"预扫描：第{scans[0]['page']}-{scans[-1]['page']}页，可能含表格{tables}页，无表格{len(scans) - tables}页"
+              f"（分节页：{dividers or '无'}），用时{elapsed:.2f}秒")
+        print("建议的页码范围→类别映射（类别名取自分节页首行文字，请核对后写入PAGE_TO_CATEGORY）：")
+        print("PAGE_TO_CATEGORY = [")
+        for item in suggestions:
+            print(f"    {item!r},")
+        print("]")
+        raise SystemExit(0)
+
+    if args.watch:
+        import extract_watch  # 监视模式，仅在需要时导入
+        print(f"监视配置文件：{args.watch}（Ctrl+C退出）")
+        extract_watch.run_watch(args, output_path, args.watch)
+        raise SystemExit(0)
+
+    if args.profile:
+        with profile_run() as profiler:
+            dish_count, first_dish = run_pipeline(args, output_path)
+        with open(args.profile, "w", encoding="utf-8") as f:
+            json.dump(profiler.report(args.profile_top), f, ensure_ascii=False, indent=2)
+    else:
+        dish_count, first_dish = run_pipeline(args, output_path)
 
     # 输出结果统计
-    print(f"\n提取完成！共成功提取{len(dishes)}道菜品信息")
-    print(f"输出文件路径：{OUTPUT_JSON}")
+    print(f"\n提取完成！共成功提取{dish_count}道菜品信息")
+    print(f"输出文件路径：{output_path}")
 
     # 预览第一条数据（验证字段结构）
-    if dishes:
+    if first_dish:
         print("\n字段结构预览（仅展示第一条）：")
-        print(json.dumps(dishes[0], ensure_ascii=False, indent=2))
\ No newline at end of file
+        print(json.dumps(first_dish, ensure_ascii=False, indent=2))
+
+    if args.low_memory or args.memory_limit:
+        print(f"峰值内存：{peak_rss_mb():.1f}MB" + (f"（上限{args.memory_limit}MB）" if args.memory_limit else ""))
+
+    if args.profile:
+        profiler.print_summary(args.profile_top)
+        print(f"剖析报告：{args.profile}")
@@ -0,0 +1,260 @@
+"""监视模式：PDF只解析一次并常驻内存，配置文件变化后只重新运行受影响的阶段（调参循环从几分钟缩短到亚秒级）
+
+用法示例：
+    python extract_watch.py watch.toml                                  # 监视配置文件，输出到OUTPUT_JSON
+    python extract_watch.py watch.json --output out.json --index public/search_index.json
+    python extract_table.py --watch watch.toml                          # 同上，使用extract_table.py的其他参数
+
+配置文件（TOML或JSON，所有键都可省略，省略或删除的键恢复为extract_table.py中的模块配置）：
+    start_page = 14
+    end_page = 210
+    page_to_category = [[14, 138, "正餐菜品", "main"], [139, 150, "炸品", "fried"]]
+    default_category = ["其他", "other"]
+    watermark_chars = ["告", "报", "源"]
+    common_fields = ["基本信息", "品名", "味型"]
+    field_synonyms = {"工艺流程": "制作工艺"}
+    single_char_whitelist = ["炒", "蒸"]
+    culinary_terms = ["鸡蛋", "鸡油"]
+    clean_profiles = {"配料": {"protect_watermark": true}}
+    structured_steps = true
+
+各配置项影响的最早阶段（该阶段及其下游阶段重新运行）：
+    start_page/end_page                      提取：只解析新增的页，已解析过的页保留在内存中
+    watermark_chars/common_fields/field_synonyms/single_char_whitelist/culinary_terms/clean_profiles
+                                             清洗：重新清洗所有页（不重新解析PDF）
+    structured_steps                         解析
+    page_to_category/default_category        分类：只重新确定类别和图片路径
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+import tomllib
+
+import pdfplumber
+
+import extract_table
+from batch_extract import load_config_file
+
+WATCH_INTERVAL = 0.5  # 检查配置文件修改时间的间隔（秒）
+STAGES = ("extract", "clean", "merge", "parse", "categorize", "write")
+STAGE_NAMES = {"extract": "提取", "clean": "清洗", "merge": "合并", "parse": "解析", "categorize": "分类", "write": "写出"}
+# 配置键 → (extract_table中的模块常量, 最早失效的阶段)
+WATCH_SETTINGS = {
+    "start_page": (("START_PAGE",), "extract"),
+    "end_page": (("END_PAGE",), "extract"),
+    "watermark_chars": (("WATERMARK_CHARS",), "clean"),
+    "common_fields": (("COMMON_FIELDS",), "clean"),
+    "field_synonyms": (("FIELD_SYNONYMS",), "clean"),
+    "single_char_whitelist": (("SINGLE_CHAR_WHITELIST",), "clean"),
+    "culinary_terms": (("CULINARY_TERMS",), "clean"),
+    "clean_profiles": (("CLEAN_PROFILES",), "clean"),
+    "structured_steps": (("STRUCTURED_STEPS",), "parse"),
+    "page_to_category": (("PAGE_TO_CATEGORY",), "categorize"),
+    "default_category": (("DEFAULT_CATEGORY", "DEFAULT_CATEGORY_ENG"), "categorize"),
+}
+SET_SETTINGS = ("watermark_chars", "common_fields", "single_char_whitelist", "culinary_terms")
+
+# ---------------------- 配置 ----------------------
+def setting_values(key, value):
+    """配置值 → 对应模块常量的值（与extract_table中的类型一致）"""
+    if key in SET_SETTINGS:
+        return (set(value),)
+    if key == "page_to_category":
+        items = [tuple(item) for item in value]
+        for item in items:
+            if len(item) != 4:
+                raise ValueError(f"page_to_category每项应为[起始页, 结束页, 类别, 英文类别]，实际为{list(item)}")
+        return (items,)
+    if key == "default_category":
+        if len(value) != 2:
+            raise ValueError("default_category应为[类别, 英文类别]")
+        return tuple(value)
+    if key in ("start_page", "end_page") and value is not None and not isinstance(value, int):
+        raise ValueError(f"{key}应为整数")
+    return (value,)
+
+def validate_config(config):
+    """检查配置文件内容，返回{配置键: 模块常量的值}"""
+    if not isinstance(config, dict):
+        raise ValueError("配置文件应为键值表")
+    unknown = set(config) - set(WATCH_SETTINGS)
+    if unknown:
+        raise ValueError(f"未知配置项{sorted(unknown)}，可用配置项为{list(WATCH_SETTINGS)}")
+    return {key: setting_values(key, value) for key, value in config.items()}
+
+# ---------------------- 常驻会话 ----------------------
+class WatchSession:
+    """监视会话：PDF保持打开，各页原始表格、清洗结果、合并表格和解析结果常驻内存，
+    每次运行从失效的最早阶段开始，上游阶段的结果直接复用"""
+
+    def __init__(self, pdf_path, output_path, args):
+        self.pdf = pdfplumber.open(pdf_path)
+        self.output_path = output_path
+        self.args = args
+        self.raw = {}  # 页码 → 原始表格（None表示该页无表格）
+        self.cleaned = {}  # 页码 → 清洗后的行列表（None表示该页无表格）
+        self.tables = []  # [(合并表格, 起始页码)]
+        self.parsed = {}  # (起始页码, 表格指纹) → parse_dish结果
+        self.dishes = []
+        self.defaults = {const: getattr(extract_table, const)
+                         for consts, _ in WATCH_SETTINGS.values() for const in consts}
+        self.applied = {}  # 当前生效的配置：配置键 → 模块常量的值
+
+    def close(self):
+        self.pdf.close()
+
+    def apply_config(self, settings):
+        """把配置写入extract_table的模块常量，返回(变化的配置键, 变化的配置键使之失效的阶段集合)"""
+        changed = sorted(key for key in set(settings) | set(self.applied)
+                         if settings.get(key) != self.applied.get(key))
+        for key in changed:
+            consts, _ = WATCH_SETTINGS[key]
+            values = settings.get(key) or tuple(self.defaults[const] for const in consts)
+            for const, value in zip(consts, values):
+                setattr(extract_table, const, value)
+        self.applied = dict(settings)
+        invalidated = frozenset(WATCH_SETTINGS[key][1] for key in changed)
+        if "clean" in invalidated:
+            extract_table.reset_cell_cleaner()
+        return changed, invalidated
+
+    def page_nums(self):
+        """按当前START_PAGE/END_PAGE得到的页码列表（与iter_dishes的页码校验一致）"""
+        total_pages = len(self.pdf.pages)
+        start_page = max(extract_table.START_PAGE, 1)
+        end_page = extract_table.END_PAGE if extract_table.END_PAGE and extract_table.END_PAGE <= total_pages \
+            else total_pages
+        if start_page > end_page:
+            start_page, end_page = end_page, start_page
+        return list(range(start_page, end_page + 1))
+
+    def run(self, invalidated=("extract",)):
+        """从失效阶段中最早的一个开始运行到写出，返回各阶段耗时（秒）
+        各阶段的缓存按该阶段本身是否失效来清空（而不是按最早阶段）：页码范围与清洗配置同时变化时，
+        新页照常提取，已清洗的旧页也要重新清洗"""
+        timings = {}
+        first_stage = min(invalidated, key=STAGES.index)
+        stages = STAGES[STAGES.index(first_stage):]
+        page_nums = self.page_nums()
+        watermark_filter = self.args.watermark_filter
+        cleaner = extract_table.get_cell_cleaner(watermark_free=watermark_filter)
+
+        if "extract" in stages:
+            started = time.perf_counter()
+            missing = [page_num for page_num in page_nums if page_num not in self.raw]
+            pages = extract_table.iter_pdf_pages(self.pdf, missing, low_memory=True)
+            for page_num, page in zip(missing, pages):
+                self.raw[page_num] = extract_table.extract_raw_table(page, watermark_filter)
+            timings["extract"] = time.perf_counter() - started
+        if "clean" in stages:
+            started = time.perf_counter()
+            if "clean" in invalidated:
+                self.cleaned.clear()
+            for page_num in page_nums:
+                if page_num not in self.cleaned:
+                    table = self.raw[page_num]
+                    self.cleaned[page_num] = extract_table.clean_table_rows(table, cleaner) if table else None
+            timings["clean"] = time.perf_counter() - started
+        if "merge" in stages:
+            started = time.perf_counter()
+            self.tables = list(extract_table.merge_page_rows(
+                (page_num, self.cleaned[page_num]) for page_num in page_nums))
+            timings["merge"] = time.perf_counter() - started
+        if "parse" in stages:
+            started = time.perf_counter()
+            if "clean" in invalidated or "parse" in invalidated:
+                self.parsed.clear()
+            for table, start_page in self.tables:
+                key = (start_page, table_fingerprint(table))
+                if key not in self.parsed:
+                    self.parsed[key] = extract_table.parse_dish(table, start_page, cleaner,
+                                                                extract_table.STRUCTURED_STEPS)
+            timings["parse"] = time.perf_counter() - started
+        if "categorize" in stages:
+            started = time.perf_counter()
+            self.dishes = []
+            for table, start_page in self.tables:
+                parsed_data = self.parsed[(start_page, table_fingerprint(table))]
+                if parsed_data["基本信息"].get("品名"):
+                    self.dishes.append(extract_table.assemble_dish(parsed_data, start_page))
+            timings["categorize"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        if self.args.jsonl:
+            extract_table.write_dishes_jsonl(self.dishes, self.output_path)
+        else:
+            extract_table.write_dishes_json(self.dishes, self.output_path)
+        extract_table.write_derived_outputs(self.args, self.dishes)
+        timings["write"] = time.perf_counter() - started
+        return timings
+
+def table_fingerprint(table):
+    """合并表格内容的指纹（页码范围变化后重新合并，内容未变的表格复用解析结果）"""
+    return hashlib.sha1(json.dumps(table, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+# ---------------------- 监视循环 ----------------------
+def read_config(config_path):
+    """读取并校验配置文件；文件不存在时视为空配置（全部使用模块配置）"""
+    if not os.path.exists(config_path):
+        return {}
+    return validate_config(load_config_file(config_path))
+
+def print_run(session, changed, timings):
+    stages = " → ".join(STAGE_NAMES[stage] for stage in timings)
+    detail = "，".join(f"{STAGE_NAMES[stage]}{seconds:.2f}s" for stage, seconds in timings.items())
+    reason = f"配置变化：{', '.join(changed)}" if changed else "首次运行"
+    print(f"[{time.strftime('%H:%M:%S')}] {reason} → 重新运行 {stages}：{len(session.dishes)}道菜，"
+          f"用时{sum(timings.values()):.2f}秒（{detail}）→ {session.output_path}")
+
+def run_watch(args, output_path, config_path, once=False, interval=WATCH_INTERVAL):
+    """首次完整运行，之后轮询配置文件，每次变化只重新运行失效的阶段；once=True时只运行一次"""
+    session = WatchSession(extract_table.PDF_PATH, output_path, args)
+    last_mtime = None
+    first_run = True
+    try:
+        while True:
+            mtime = os.stat(config_path).st_mtime_ns if os.path.exists(config_path) else None
+            if first_run or mtime != last_mtime:
+                last_mtime = mtime
+                try:
+                    settings = read_config(config_path)
+                except (OSError, ValueError, TypeError, tomllib.TOMLDecodeError) as exc:
+                    print(f"[{time.strftime('%H:%M:%S')}] 配置文件无效，保持上一次的配置：{exc}")
+                    settings = None
+                if settings is not None:
+                    changed, invalidated = session.apply_config(settings)
+                    if first_run or invalidated:
+                        timings = session.run({"extract"} if first_run else invalidated)
+                        print_run(session, [] if first_run else changed, timings)
+                        first_run = False
+            if once:
+                return session.dishes
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\n已退出监视模式")
+    finally:
+        session.close()
+    return session.dishes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="监视配置文件，只重新运行受影响的提取阶段")
+    parser.add_argument("config", help="监视的配置文件（TOML或JSON，见模块说明）")
+    parser.add_argument("--pdf", default=extract_table.PDF_PATH, help="源PDF（默认%(default)s）")
+    parser.add_argument("--output", help=f"输出文件路径（默认{extract_table.OUTPUT_JSON}，--jsonl时默认{extract_table.OUTPUT_JSONL}）")
+    parser.add_argument("--jsonl", action="store_true", help="以JSON Lines格式输出")
+    parser.add_argument("--watermark-filter", action="store_true", default=extract_table.WATERMARK_FILTER,
+                        help="表格提取前按字符属性去掉水印字（见extract_table.py --watermark-filter）")
+    parser.add_argument("--shards", metavar="SHARD_DIR", help="每次运行同时写出类别分片")
+    parser.add_argument("--compact", metavar="PATH", help="每次运行同时写出紧凑列式编码")
+    parser.add_argument("--index", metavar="INDEX_JSON", help="每次运行同时写出检索索引")
+    parser.add_argument("--sqlite", metavar="DB", help="每次运行同时写入SQLite数据库")
+    parser.add_argument("--edition", help="写入SQLite时的版本名（默认为PDF文件名）")
+    parser.add_argument("--interval", type=float, default=WATCH_INTERVAL, help="检查配置文件的间隔秒数（默认%(default)s）")
+    parser.add_argument("--once", action="store_true", help="只运行一次（不进入监视循环）")
+    args = parser.parse_args()
+    extract_table.PDF_PATH = args.pdf
+    output_path = args.output or (extract_table.OUTPUT_JSONL if args.jsonl else extract_table.OUTPUT_JSON)
+    print(f"监视配置文件：{args.config}（Ctrl+C退出）")
+    run_watch(args, output_path, args.config, once=args.once, interval=args.interval)
@@ -0,0 +1,48 @@
+"""括号修复与配料切分：repair_brackets / split_ingredients"""
+import time
+
+import pytest
+
+import extract_table
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("鸡油（10g，", "鸡油（10g）"),  # 数字+单位后的逗号是被识别错的右括号
+    ("盐（5g；鸡精", "盐（5g）鸡精"),
+    ("（1，份", "（1）份"),  # 纯数字、其后没有右括号
+    ("娃娃菜（300g", "娃娃菜（300g）"),  # 未闭合：在数字/字母片段之后补右括号
+    ("配料（a（b", "配料（a）（b）"),
+    ("毛豆烧鸡料（水、香辛料，", "毛豆烧鸡料（水、香辛料）"),  # 逗号后即结束
+    ("（10）份", "（10）份"),
+    ("", ""),
+])
+def test_repair_brackets(text, expected):
+    assert extract_table.repair_brackets(text)[0] == expected
+    assert extract_table.fix_brackets(text) == expected
+
+
+def test_repair_brackets_separators_outside_brackets():
+    text = "鸡块（雪山草、小母鸡、鸡边腿）、豆米、菜籽油"
+    repaired, separators = extract_table.repair_brackets(text, "、，")
+    assert repaired == text
+    assert separators == [15, 18]
+    assert all(repaired[i] == "、" for i in separators)
+
+
+def test_split_ingredients_keeps_bracket_contents():
+    assert extract_table.split_ingredients("鸡块（雪山草、小母鸡、鸡边腿）、豆米，菜籽油") == \
+        ["鸡块（雪山草、小母鸡、鸡边腿）", "豆米", "菜籽油"]
+
+
+def test_repair_brackets_linear_on_many_unclosed():
+    small = "盐（5g" * 2000
+    large = small * 10
+    started = time.perf_counter()
+    extract_table.repair_brackets(small, "、，")
+    small_time = time.perf_counter() - started
+    started = time.perf_counter()
+    repaired, _ = extract_table.repair_brackets(large, "、，")
+    large_time = time.perf_counter() - started
+    assert repaired.count("（") == repaired.count("）")
+    # 输入长10倍，耗时应约为10倍（平方级会是100倍），留足余量
+    assert large_time < max(small_time, 0.01) * 40
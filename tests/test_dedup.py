@@ -0,0 +1,40 @@
+"""跨版本去重（extract_dedup）"""
+import extract_dedup
+
+
+def _dish(name, process):
+    return {"基本信息": {"品名": name, "配料": ["鸡蛋液", "鸡油", "清酱汁"]},
+            "餐厅操作工艺": {"烹饪方式": "蒸", "制作工艺": process}}
+
+
+STEAMED = _dish("鸡蛋羹", "1.调制蛋液：将鸡蛋打成蛋液，加入水和盐搅拌均匀；2.蒸柜上汽后蒸制10分钟出品。")
+STEAMED_EDITED = _dish("鸡蛋羹", "1.调制蛋液：将鸡蛋打成蛋液，加入水和盐搅拌均匀；2.蒸柜上汽后蒸制12分钟出品。")
+FRIED = _dish("炸鸡腿", "生炸大鸡腿解冻后放入170度的油锅中炸制8分钟，沥油后装盘。")
+
+
+def test_bucket_members_are_all_checked(monkeypatch):
+    # 所有菜品落入同一个LSH分桶：首个菜品（炸鸡腿）未达阈值时，仍应与桶内的鸡蛋羹比较
+    monkeypatch.setattr(extract_dedup, "lsh_keys", lambda signature, bands=None: [(0, ())])
+    roots, _, _ = extract_dedup.cluster_dishes([FRIED, STEAMED, STEAMED_EDITED])
+    assert roots == [0, 1, 1]
+
+
+def test_canonical_ids_survive_a_different_edition_set():
+    first = extract_dedup.dedup_editions([("春", [FRIED, STEAMED]), ("夏", [FRIED, STEAMED_EDITED])])
+    ids = {entry["name"]: entry["canonical_id"] for entry in first["dishes"]}
+    assert len(set(ids.values())) == 2
+
+    # 只给新版本：不带上一次报告时id取决于本次最早的成员，带上时沿用
+    later = [("秋", [STEAMED_EDITED, FRIED])]
+    fresh = extract_dedup.dedup_editions(later)
+    assert {entry["name"]: entry["canonical_id"] for entry in fresh["dishes"]} != ids
+    report = extract_dedup.dedup_editions(later, previous=first)
+    assert {entry["name"]: entry["canonical_id"] for entry in report["dishes"]} == ids
+    assert report["changes"]["秋"] == {"unchanged": sorted(ids.values()), "changed": [], "new": [], "removed": []}
+
+
+def test_near_duplicate_matched_through_previous_signatures():
+    first = extract_dedup.dedup_editions([("春", [STEAMED])])
+    report = extract_dedup.dedup_editions([("夏", [STEAMED_EDITED])], previous=first)
+    assert report["dishes"][0]["canonical_id"] == first["dishes"][0]["canonical_id"]
+    assert report["changes"]["夏"]["changed"] == [first["dishes"][0]["canonical_id"]]
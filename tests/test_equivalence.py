@@ -0,0 +1,68 @@
+"""提取模式等价性：并行、页面缓存、预扫描、低内存、监视模式等与串行提取的输出逐字节相同（合成PDF）"""
+import argparse
+import contextlib
+import io
+import json
+import os
+
+import pytest
+
+import bench_extract
+import extract_table
+import extract_watch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def synthetic_pdf(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("synthetic") / "synthetic.pdf")
+    bench_extract.make_synthetic_pdf(path, bench_extract.SYNTHETIC_GOLDEN_PAGES)
+    return path
+
+
+@pytest.fixture(scope="module")
+def serial_output(synthetic_pdf):
+    return bench_extract.extract_synthetic(synthetic_pdf)
+
+
+def test_serial_output_matches_golden(serial_output):
+    with open(os.path.join(ROOT, bench_extract.SYNTHETIC_GOLDEN), encoding="utf-8") as f:
+        assert serial_output == f.read()
+
+
+@pytest.mark.parametrize("options", [
+    {"workers": 2},
+    {"prescan": True},
+    {"prescan": True, "workers": 2},
+    {"low_memory": True},
+    {"low_memory": True, "memory_limit_mb": 1},
+], ids=lambda options: ",".join(f"{key}={value}" for key, value in options.items()))
+def test_modes_match_serial(synthetic_pdf, serial_output, options):
+    assert bench_extract.extract_synthetic(synthetic_pdf, **options) == serial_output
+
+
+def test_page_cache_matches_serial(synthetic_pdf, serial_output, tmp_path):
+    cache_path = str(tmp_path / "pages.sqlite")
+    assert bench_extract.extract_synthetic(synthetic_pdf, cache_path=cache_path) == serial_output  # 冷缓存
+    assert bench_extract.extract_synthetic(synthetic_pdf, cache_path=cache_path) == serial_output  # 全部命中
+    assert bench_extract.extract_synthetic(synthetic_pdf, cache_path=cache_path, workers=2) == serial_output
+
+
+def test_watch_session_matches_serial(synthetic_pdf, serial_output, tmp_path):
+    args = argparse.Namespace(watermark_filter=False, jsonl=False, shards=None, compact=None, index=None,
+                              sqlite=None, edition=None)
+    session = extract_watch.WatchSession(synthetic_pdf, str(tmp_path / "watch.json"), args)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            # 先只提取前半部分并改变清洗配置，再扩展到全部页面并恢复：结果应与一次完整提取相同
+            _, invalidated = session.apply_config(extract_watch.validate_config(
+                {"start_page": 1, "end_page": 20, "culinary_terms": ["鸡蛋"]}))
+            session.run({"extract"})
+            _, invalidated = session.apply_config(extract_watch.validate_config({"start_page": 1, "end_page": None}))
+            session.run(invalidated)
+        assert json.dumps(session.dishes, ensure_ascii=False, indent=2) == serial_output
+    finally:
+        session.apply_config({})
+        session.close()
+        extract_table.reset_cell_cleaner()
@@ -0,0 +1,50 @@
+"""图片阶段：内嵌图片的颜色空间解析与编码"""
+import zlib
+
+import pytest
+
+pytest.importorskip("PIL")
+
+import extract_images
+
+WIDTH, HEIGHT = 32, 24
+
+
+def _write_pdf(path, color_spaces):
+    """每页一张WIDTH×HEIGHT的图片，color_spaces[i]为第i+1页图片的颜色空间（PDF语法，可引用对象3即ICC配置）"""
+    objects = [None, None, b"<< /N 3 /Length 4 >>\nstream\nicc!\nendstream"]
+    page_ids = []
+    for color_space, components in color_spaces:
+        data = zlib.compress(bytes(range(256)) * (WIDTH * HEIGHT * components // 256 + 1))
+        objects.append(b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace %s /BitsPerComponent 8"
+                       b" /Filter /FlateDecode /Length %d >>\nstream\n" % (WIDTH, HEIGHT, color_space, len(data))
+                       + data + b"\nendstream")
+        image_id = len(objects)
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 200 200]"
+                       b" /Resources << /XObject << /Im1 %d 0 R >> >> >>" % image_id)
+        page_ids.append(len(objects))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % i for i in page_ids), len(page_ids))
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for obj_id, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % obj_id + obj + b"\nendobj\n"
+    xref_pos = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_pos)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def test_icc_based_and_indexed_color_spaces(tmp_path):
+    pdf_path = str(tmp_path / "images.pdf")
+    _write_pdf(pdf_path, [(b"[/ICCBased 3 0 R]", 3), (b"[/Indexed /DeviceRGB 1 <000000FFFFFF>]", 1)])
+    dishes = [{"图片": "images/main_page_1_img.png"}, {"图片": "images/main_page_2_img.png"}]
+    stats = extract_images.extract_dish_images(pdf_path, dishes, str(tmp_path / "out"), workers=1)
+    assert stats["encoded"] == 1
+    assert list(stats["failed"]) == ["main_page_2_img"]
+    assert stats["failed"]["main_page_2_img"].startswith("ValueError: 不支持的图片格式：Indexed")
@@ -0,0 +1,42 @@
+"""派生输出（extract_outputs）"""
+import json
+import os
+
+import extract_outputs
+
+
+def _dishes(label):
+    return [{"基本信息": {"品名": f"{label}菜{i}"}, "类别": "正餐菜品" if i % 2 else "炸品"} for i in range(4)]
+
+
+def _write(output_dir, label):
+    return extract_outputs.write_category_shards(_dishes(label), str(output_dir), {"正餐菜品": "main", "炸品": "fried"})
+
+
+def _files(manifest):
+    return {info["file"] for info in manifest["shards"].values()}
+
+
+def test_shards_keep_previous_generation_and_unrelated_files(tmp_path):
+    unrelated = tmp_path / "app.0123456789.json"
+    unrelated.write_text("{}")
+    first = _write(tmp_path, "一")
+    second = _write(tmp_path, "二")
+    assert second["previous_files"] == sorted(_files(first))
+    # 持有上一代清单的客户端仍能加载上一代分片
+    assert all(os.path.exists(tmp_path / name) for name in _files(first) | _files(second))
+
+    third = _write(tmp_path, "三")
+    assert not any(os.path.exists(tmp_path / name) for name in _files(first))
+    assert all(os.path.exists(tmp_path / name) for name in _files(second) | _files(third))
+    assert unrelated.exists()
+    with open(tmp_path / extract_outputs.SHARD_MANIFEST_NAME, encoding="utf-8") as f:
+        assert json.load(f)["previous_files"] == sorted(_files(second))
+
+
+def test_unchanged_rewrite_keeps_files(tmp_path):
+    first = _write(tmp_path, "一")
+    _write(tmp_path, "一")
+    third = _write(tmp_path, "一")
+    assert third["previous_files"] == []
+    assert all(os.path.exists(tmp_path / name) for name in _files(first))
@@ -0,0 +1,18 @@
+"""页面预扫描（prescan_page/suggest_page_categories）"""
+import pdfplumber
+
+import bench_extract
+import extract_table
+
+
+def test_suggested_sections_match_synthetic_book(tmp_path):
+    pdf_path = str(tmp_path / "synthetic.pdf")
+    book = bench_extract.make_synthetic_pdf(pdf_path, 60)
+    with pdfplumber.open(pdf_path) as pdf:
+        scans = extract_table.prescan_pages(pdf, range(1, len(pdf.pages) + 1))
+        suggestions = extract_table.suggest_page_categories(pdf, scans)
+    dividers = [scan["page"] for scan in scans if scan["divider"]]
+    assert dividers == [start for start, _, _ in book["sections"]]
+    # 建议的范围从章节内第一个表格页开始（分节页本身不含表格）
+    assert [(start, end, title) for start, end, title, _ in suggestions] == \
+        [(start + 1, end, category) for start, end, category in book["sections"]]
@@ -0,0 +1,66 @@
+"""制作工艺结构化（parse_process_steps）"""
+from extract_table import lex_process, parse_process_steps
+
+
+def _summary(text):
+    result = parse_process_steps(text)
+    return result["份数"], [(step["序号"], step["内容"]) for step in result["步骤"]]
+
+
+def test_servings_and_numbered_steps():
+    servings, steps = _summary("（10）份 1.下入200g大豆油、575g鸡蛋液；2.大火翻炒出品。")
+    assert servings == 10
+    assert steps == [(1, "下入200g大豆油、575g鸡蛋液"), (2, "大火翻炒出品")]
+
+
+def test_servings_with_unit_inside_brackets():
+    servings, steps = _summary("（1份） 1.锅中下入750g水；2.将8g陈皮丝平铺")
+    assert servings == 1
+    assert [number for number, _ in steps] == [1, 2]
+
+
+def test_step_number_followed_by_amount():
+    result = parse_process_steps("1.800g肉片；2.下入")
+    assert [step["内容"] for step in result["步骤"]] == ["800g肉片", "下入"]
+    assert result["步骤"][0]["用量"] == [{"数量": 800, "单位": "g", "原料": "肉片", "原文": "800g"}]
+
+
+def test_step_number_followed_by_portion_count():
+    result = parse_process_steps("（1份） 1.10份糖水；2.取150g南瓜；3.30g鸡血，开水焯烫")
+    steps = result["步骤"]
+    assert [step["序号"] for step in steps] == [1, 2, 3]
+    assert steps[0]["用量"][0]["原文"] == "10份"
+    assert steps[2]["用量"][0] == {"数量": 30, "单位": "g", "原料": "鸡血", "原文": "30g"}
+
+
+def test_decimals_inside_steps_are_kept():
+    result = parse_process_steps("1.下入，2.5kg水；2.蒸1.5小时")
+    steps = result["步骤"]
+    assert [step["序号"] for step in steps] == [1, 2]
+    assert steps[0]["用量"][0]["数量"] == 2.5
+    assert steps[1]["时长"][0]["秒数"] == 5400
+
+
+def test_minutes_and_seconds_and_ranges():
+    steps = parse_process_steps("1.沸水汆烫2分30秒；2.蒸制40-45分钟出品")["步骤"]
+    assert steps[0]["时长"][0]["秒数"] == 150
+    assert steps[0]["时长"][0]["动作"] == "汆烫"
+    assert steps[1]["时长"][0]["秒数"] == 2400
+    assert steps[1]["时长"][0]["秒数上限"] == 2700
+
+
+def test_title_before_colon():
+    step = parse_process_steps("1.调制蛋液：将650g鸡蛋液搅拌均匀")["步骤"][0]
+    assert step["标题"] == "调制蛋液"
+    assert step["用量"][0]["原料"] == "鸡蛋液"
+
+
+def test_unnumbered_text_is_one_step():
+    servings, steps = _summary("（5）份 下入120g大豆油，大火爆炒出品。")
+    assert servings == 5
+    assert steps == [(1, "下入120g大豆油，大火爆炒出品")]
+    assert parse_process_steps("")["步骤"] == []
+
+
+def test_lexer_keeps_decimals():
+    assert lex_process("蒸1.5小时") == [("word", "蒸"), ("num", "1.5"), ("word", "小时")]
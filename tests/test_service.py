@@ -0,0 +1,126 @@
+"""本地提取服务（extract_service）"""
+import asyncio
+import hashlib
+import json
+import os
+
+import pytest
+
+import extract_service
+import extract_table
+
+SAMPLE_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), extract_table.PDF_PATH)
+
+
+@pytest.mark.parametrize("query", [
+    "page_to_category=5",
+    "page_to_category=[[1,2,\"a\"]]",
+    "page_to_category=[[1,2,3,4]]",
+    "default_category=\"ab\"",
+    "default_category=[\"a\"]",
+    "default_category={}",
+    "start_page=x",
+    "page_to_category=[",
+])
+def test_bad_job_config_is_rejected(query):
+    with pytest.raises(ValueError):
+        extract_service.parse_job_config(query)
+
+
+def test_job_config_shapes():
+    config = extract_service.parse_job_config(
+        "page_to_category=[[1,4,\"正餐菜品\",\"main\"]]&default_category=[\"其他\",\"other\"]&prescan=1")
+    assert config["page_to_category"] == [[1, 4, "正餐菜品", "main"]]
+    assert config["default_category"] == ["其他", "other"]
+    assert config["prescan"] is True
+
+
+async def _request(port, method, target, body=b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    # 按Content-Length读取：工作进程由fork创建时会继承连接，不能等对端关闭
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("utf-8")
+    length = int(next(line.split(":", 1)[1] for line in head.splitlines() if line.lower().startswith("content-length")))
+    payload = await reader.readexactly(length)
+    writer.close()
+    return int(head.split()[1]), json.loads(payload) if payload else None
+
+
+async def _wait_job(port, job_id):
+    for _ in range(600):
+        status, job = await _request(port, "GET", f"/jobs/{job_id}")
+        if job["status"] in ("done", "failed"):
+            return job
+        await asyncio.sleep(0.1)
+    raise TimeoutError(job_id)
+
+
+def _crash_on_marker(pdf_path, *args, **kwargs):
+    if open(pdf_path, "rb").read().endswith(b"%CRASH"):
+        os._exit(1)
+    return _iter_dishes(pdf_path, *args, **kwargs)
+
+
+_iter_dishes = extract_table.iter_dishes
+
+
+def test_service_errors_and_pool_recovery(tmp_path, monkeypatch):
+    # 工作进程由fork创建，继承这里替换的iter_dishes：带标记的PDF让工作进程直接退出
+    monkeypatch.setattr(extract_table, "iter_dishes", _crash_on_marker)
+    monkeypatch.setattr(extract_service, "EVENT_DRAIN_TIMEOUT", 0.5)
+    with open(SAMPLE_PDF, "rb") as f:
+        pdf = f.read()
+
+    async def scenario():
+        service = extract_service.ExtractionService(workers=1, data_dir=str(tmp_path))
+        await service.start()
+        server = await asyncio.start_server(extract_service.make_handler(service, 2**30), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            assert (await _request(port, "POST", "/jobs?page_to_category=5", pdf))[0] == 400
+            assert (await _request(port, "POST", "/jobs?default_category=%22ab%22", pdf))[0] == 400
+
+            status, job = await _request(port, "POST", "/jobs?start_page=1&end_page=1", pdf + b"\n%CRASH")
+            assert status == 202
+            assert (await _wait_job(port, job["job_id"]))["status"] == "failed"
+
+            # 进程池已重建，后续任务正常完成
+            status, job = await _request(port, "POST", "/jobs?start_page=1&end_page=4", pdf)
+            assert (await _wait_job(port, job["job_id"]))["status"] == "done"
+
+            monkeypatch.setattr(service, "health", lambda: 1 / 0)
+            assert (await _request(port, "GET", "/health"))[0] == 500
+        finally:
+            server.close()
+            service.close()
+
+    asyncio.run(scenario())
+
+
+def test_finished_jobs_are_evicted(tmp_path):
+    async def scenario():
+        service = extract_service.ExtractionService(workers=1, data_dir=str(tmp_path), max_finished=3,
+                                                    finished_ttl=60)
+        try:
+            pdf = b"%PDF-1.4 cached"
+            config = extract_service.parse_job_config("")
+            key = extract_service.result_key(hashlib.sha256(pdf).hexdigest(), config)
+            service._save_result(key, [{"菜品名称": "鸡汤"}])
+            jobs = [service.submit(pdf, config)[0] for _ in range(10)]
+            assert len({job.id for job in jobs}) == 10
+            assert all(job.cached and job.status == "done" for job in jobs)
+            assert all(job.result is jobs[0].result for job in jobs)  # 重复提交共用同一份结果
+            assert list(service.jobs) == [job.id for job in jobs[-3:]]
+            health = service.health()
+            assert (health["jobs"], health["finished"], health["evicted"]) == (3, 3, 7)
+
+            jobs[-1].finished -= 120  # 超过保留时间
+            jobs[-2].finished -= 120
+            jobs[-3].finished -= 120
+            assert service.health()["evicted"] == 10
+            assert not service.jobs
+        finally:
+            service.close()
+
+    asyncio.run(scenario())
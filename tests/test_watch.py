@@ -0,0 +1,61 @@
+"""监视模式：配置变更后热会话的结果与用同一配置全新提取的结果相同"""
+import argparse
+import contextlib
+import io
+import json
+
+import pytest
+
+import bench_extract
+import extract_table
+import extract_watch
+
+REMOVED_TERMS = ("蒸柜", "娃娃菜", "老鸡汤")
+
+
+@pytest.fixture
+def session(tmp_path):
+    pdf_path = str(tmp_path / "synthetic.pdf")
+    bench_extract.make_synthetic_pdf(pdf_path, 12)
+    args = argparse.Namespace(watermark_filter=False, jsonl=False, shards=None, compact=None, index=None,
+                              sqlite=None, edition=None)
+    session = extract_watch.WatchSession(pdf_path, str(tmp_path / "watch.json"), args)
+    session.pdf_path = pdf_path
+    yield session
+    session.apply_config({})
+    session.close()
+    extract_table.reset_cell_cleaner()
+
+
+def test_removed_culinary_terms_take_effect(session):
+    for term in REMOVED_TERMS:
+        assert extract_table.is_valid_word(term)
+    terms = sorted(extract_table.CULINARY_TERMS - set(REMOVED_TERMS))
+    session.apply_config(extract_watch.validate_config({"culinary_terms": terms}))
+    for term in REMOVED_TERMS:
+        assert not extract_table.is_valid_word(term)
+    session.apply_config({})
+    for term in REMOVED_TERMS:
+        assert extract_table.is_valid_word(term)
+
+
+def test_warm_run_matches_fresh_run(session):
+    terms = sorted(extract_table.CULINARY_TERMS - set(REMOVED_TERMS))
+    pages = {"start_page": 1, "end_page": None}
+    with contextlib.redirect_stdout(io.StringIO()):
+        session.apply_config(extract_watch.validate_config(pages))
+        session.run({"extract"})
+        _, invalidated = session.apply_config(extract_watch.validate_config({**pages, "culinary_terms": terms}))
+        session.run(invalidated)
+    warm = json.dumps(session.dishes, ensure_ascii=False, indent=2)
+    # 全新提取：同一配置、重新编译的清洗器
+    defaults = extract_table.CULINARY_TERMS
+    session.apply_config({})
+    extract_table.CULINARY_TERMS = set(terms)
+    extract_table.reset_cell_cleaner()
+    try:
+        fresh = bench_extract.extract_synthetic(session.pdf_path)
+    finally:
+        extract_table.CULINARY_TERMS = defaults
+        extract_table.reset_cell_cleaner()
+    assert warm == fresh